@@ -76,6 +76,42 @@ html_theme_options = {
                 },{
                     "title": "topyly",
                     "url": "./topyly"
+                },{
+                    "title": "midi",
+                    "url": "./midi"
+                },{
+                    "title": "player",
+                    "url": "./player"
+                },{
+                    "title": "musicxml",
+                    "url": "./musicxml"
+                },{
+                    "title": "reader",
+                    "url": "./reader"
+                },{
+                    "title": "preview",
+                    "url": "./preview"
+                },{
+                    "title": "audio",
+                    "url": "./audio"
+                },{
+                    "title": "analysis",
+                    "url": "./analysis"
+                },{
+                    "title": "pcset",
+                    "url": "./pcset"
+                },{
+                    "title": "keys",
+                    "url": "./keys"
+                },{
+                    "title": "tuning",
+                    "url": "./tuning"
+                },{
+                    "title": "serial",
+                    "url": "./serial"
+                },{
+                    "title": "roughness",
+                    "url": "./roughness"
                 }
             ]
         },{
@@ -8,16 +8,48 @@ Submodules
 ----------
 - core
 - pitch
+- pcset
 - durs
 - velo
 - topyly
+- midi
+- player
+- musicxml
+- reader
+- preview
+- audio
+- analysis
+- keys
+- tuning
+- serial
+- roughness
+
+``pcset``, ``topyly``, ``midi``, ``player``, ``musicxml``, ``reader``, ``preview``, ``audio``, ``analysis``, ``keys``, ``tuning``, ``serial`` and ``roughness`` are imported on first use (PEP 562), so ``import musicnpy``
+does not pay for the lilypond tables when only ``_Set`` is needed.
 """
 __version__ = "0.1.0"
 # Import principale
 from .core import _Set
 from .pitch import _PSet, Scale
-from .topyly import Staff, _Voice, _Print, _Map, Score
 from .data import PMod
 
+# Import differito: nome --> sottomodulo
+_LAZY = {
+    "Staff": "topyly", "_Voice": "topyly", "_Print": "topyly", "_Map": "topyly", "Score": "topyly",
+    "pcset": None, "topyly": None, "midi": None, "player": None, "musicxml": None, "reader": None, "preview": None, "audio": None, "analysis": None, "keys": None, "tuning": None, "serial": None, "roughness": None,
+}
+
+def __getattr__(name):
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+    module = import_module(f".{_LAZY[name] or name}", __name__)
+    value = module if _LAZY[name] is None else getattr(module, name)
+    globals()[name] = value         # i prossimi accessi non passano da qui
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
+
 # # Definisce cosa viene esportato con 'from musicnpy import *'
-__all__ = ["_Set", "_PSet", "Scale", "Staff", "_Voice", "_Print", "_Map", "Score", "PMod"]
\ No newline at end of file
+__all__ = ["_Set", "_PSet", "Scale", "Staff", "_Voice", "_Print", "_Map", "Score", "PMod"]
@@ -0,0 +1,210 @@
+"""
+musicnpy.analysis
+"""
+
+from __future__ import annotations
+import struct
+import wave
+import numpy as np
+from collections import deque
+from collections.abc import Iterator
+from numpy.lib.stride_tricks import sliding_window_view
+from .pitch import _PSet
+
+SIZE = 4096          # samples per analysis window
+HOP = 1024           # samples between windows
+CHUNK = 256          # windows transformed together
+PEAKS = 6            # peaks kept per window
+THRESHOLD = -30.0    # dB below the loudest peak of the window
+FLOOR = -60.0        # dBFS, quieter peaks are ignored
+
+_DTYPES = {1: np.uint8, 2: np.dtype('<i2'), 4: np.dtype('<i4')}
+
+def read_wav(path: str) -> tuple[np.ndarray, int]:
+
+    """
+    Map the samples of a PCM WAV file without reading them.
+
+    The header is read with ``wave``; the data chunk is located with ``struct``
+    and memory-mapped, so only the frames that are used are loaded.
+
+    :param path: WAV file.
+    :type path: str
+    :return: ``(frames, channels)`` integer array (read only) and the sample rate.
+    :rtype: tuple[np.ndarray, int]
+    :raises ValueError: If the sample width is not 8, 16 or 32 bit.
+    """
+
+    with wave.open(path, 'rb') as w:
+        channels, width, rate, count = w.getnchannels(), w.getsampwidth(), w.getframerate(), w.getnframes()
+    if width not in _DTYPES:
+        raise ValueError(f"Unsupported sample width: {8 * width} bit")
+
+    with open(path, 'rb') as f:                  # find the 'data' chunk
+        f.seek(12)
+        while True:
+            tag, size = struct.unpack('<4sI', f.read(8))
+            if tag == b'data':
+                offset = f.tell()
+                break
+            f.seek(size + (size & 1), 1)
+    if not count:
+        return np.zeros((0, channels), dtype=_DTYPES[width]), rate
+    data = np.memmap(path, dtype=_DTYPES[width], mode='r', offset=offset, shape=(count, channels))
+    return data, rate
+
+def _mono(data: np.ndarray) -> np.ndarray:
+    x = data.astype(np.float32)
+    if data.dtype == np.uint8:
+        x = (x - 128) / 128
+    else:
+        x /= float(np.iinfo(data.dtype).max) + 1
+    return x.mean(axis=1)
+
+def find_peaks(mag: np.ndarray, n: int = PEAKS, threshold: float = THRESHOLD, floor: float = FLOOR) -> tuple[np.ndarray, np.ndarray]:
+
+    """
+    Strongest local maxima of a batch of magnitude spectra, with parabolic interpolation.
+
+    :param mag: ``(frames, bins)`` magnitudes in dB.
+    :type mag: np.ndarray
+    :param n: Peaks kept per frame.
+    :type n: int
+    :param threshold: dB below the loudest peak of the frame.
+    :type threshold: float
+    :param floor: Absolute level in dB under which peaks are ignored.
+    :type floor: float
+    :return: Fractional bins and interpolated levels, ``(frames, n)``, NaN where there is no peak.
+    :rtype: tuple[np.ndarray, np.ndarray]
+
+    :Example:
+
+    >>> b, m = find_peaks(np.array([[-90., -20., -10., -14., -90., -50., -90.]]), n=2)
+    >>> np.round(b, 2).tolist()
+    [[2.21, nan]]
+    """
+
+    left, mid, right = mag[:, :-2], mag[:, 1:-1], mag[:, 2:]
+    ok = (mid > left) & (mid >= right) & (mid > floor)
+    loud = np.where(ok, mid, -np.inf)
+    loud[loud < loud.max(axis=1, keepdims=True) + threshold] = -np.inf
+
+    n = min(n, loud.shape[1])
+    top = np.argpartition(-loud, n - 1, axis=1)[:, :n]
+    top = np.take_along_axis(top, np.argsort(-np.take_along_axis(loud, top, 1), axis=1), 1)   # loudest first
+    a, b, c = (np.take_along_axis(x, top, 1) for x in (left, mid, right))
+    den = a - 2 * b + c
+    p = np.where(den != 0, 0.5 * (a - c) / np.where(den != 0, den, 1), 0)
+    bins = top + 1 + p
+    level = b - 0.25 * (a - c) * p
+    bad = ~np.isfinite(np.take_along_axis(loud, top, 1))
+    bins[bad] = np.nan
+    level[bad] = np.nan
+    return bins, level
+
+def iter_peaks(path: str, size: int = SIZE, hop: int = HOP, n: int = PEAKS, threshold: float = THRESHOLD,
+               floor: float = FLOOR, chunk: int = CHUNK, workers: int = 1) -> Iterator[tuple[np.ndarray, np.ndarray, np.ndarray]]:
+
+    """
+    Spectral peaks of a WAV file, ``chunk`` windows at a time.
+
+    Windows (Hann, ``size`` samples every ``hop``) are strided views of the
+    memory-mapped samples and each chunk is transformed with a single ``rfft``.
+    With ``workers > 1`` chunks are analysed in a thread pool, never more than
+    ``2 * workers`` at once, so memory stays bounded for any file length.
+
+    :param path: WAV file.
+    :type path: str
+    :param size: Window length in samples. Defaults to 4096.
+    :type size: int
+    :param hop: Samples between windows. Defaults to 1024.
+    :type hop: int
+    :param n: Peaks kept per window. Defaults to 6.
+    :type n: int
+    :param threshold: dB below the loudest peak. Defaults to -30.
+    :type threshold: float
+    :param floor: Absolute level in dBFS. Defaults to -60.
+    :type floor: float
+    :param chunk: Windows per batch. Defaults to 256.
+    :type chunk: int
+    :param workers: Threads. Defaults to 1.
+    :type workers: int
+    :return: For each chunk: times in seconds ``(frames,)``, frequencies and levels in dB ``(frames, n)``.
+    :rtype: Iterator[tuple[np.ndarray, np.ndarray, np.ndarray]]
+    """
+
+    data, rate = read_wav(path)
+    total = max(0, (len(data) - size) // hop + 1)
+    window = np.hanning(size).astype(np.float32)
+    scale = 2 / window.sum()                     # full scale sine --> 0 dB
+
+    def analyse(first: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        count = min(chunk, total - first)
+        x = _mono(data[first * hop: (first + count - 1) * hop + size])
+        frames = sliding_window_view(x, size)[::hop]
+        mag = np.abs(np.fft.rfft(frames * window, axis=1)) * scale
+        bins, level = find_peaks(20 * np.log10(mag + 1e-12), n, threshold, floor)
+        times = (first + np.arange(count)) * hop / rate
+        return times, bins * rate / size, level
+
+    starts = range(0, total, chunk)
+    if workers <= 1:
+        for first in starts:
+            yield analyse(first)
+        return
+
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        queue = deque()
+        for first in starts:
+            queue.append(pool.submit(analyse, first))
+            if len(queue) >= 2 * workers:
+                yield queue.popleft().result()
+        while queue:
+            yield queue.popleft().result()
+
+def frame_psets(path: str, **kwargs) -> Iterator[tuple[float, _PSet]]:
+
+    """
+    One ``_PSet`` (fractional midinotes, loudest first) per analysis window.
+
+    :param path: WAV file.
+    :type path: str
+    :param kwargs: Arguments of ``iter_peaks``.
+    :return: ``(time, _PSet)`` for each window; silent windows give an empty set.
+    :rtype: Iterator[tuple[float, _PSet]]
+    """
+
+    for times, freqs, _ in iter_peaks(path, **kwargs):
+        for t, f in zip(times.tolist(), freqs):
+            yield t, _PSet.from_freq(f[np.isfinite(f)])
+
+def chord_sequence(path: str, min_frames: int = 2, **kwargs) -> list[tuple[float, float, tuple[int, ...]]]:
+
+    """
+    Chords of a WAV file: consecutive windows with the same rounded midinotes are merged.
+
+    :param path: WAV file.
+    :type path: str
+    :param min_frames: Chords lasting fewer windows are dropped. Defaults to 2.
+    :type min_frames: int
+    :param kwargs: Arguments of ``iter_peaks``.
+    :return: ``(onset, duration, midinotes)`` with times in seconds and midinotes sorted.
+    :rtype: list[tuple[float, float, tuple[int, ...]]]
+    """
+
+    hop = kwargs.get('hop', HOP)
+    out = []
+    current, start, count, step = None, 0.0, 0, None
+    for t, p in frame_psets(path, **kwargs):
+        notes = tuple(sorted(set(np.rint(p.vals).astype(int).tolist())))
+        if notes != current:
+            if current and count >= min_frames:
+                out.append((start, t - start, current))
+            current, start, count = notes, t, 0
+        count += 1
+        step = t
+    if current and count >= min_frames:
+        rate = read_wav(path)[1]
+        out.append((start, step - start + hop / rate, current))
+    return out
@@ -0,0 +1,165 @@
+"""
+musicnpy.audio
+"""
+
+from __future__ import annotations
+import wave
+import numpy as np
+from .pitch import _PSet, Numeric
+from .midi import table, TEMPO
+from .topyly import TPQ
+
+RATE = 44100
+BLOCK = 8192                         # samples rendered at a time
+PARTIALS = (1.0, 0.5, 0.25, 0.125)   # amplitude of harmonics 1, 2, 3, ...
+ATTACK = 0.01                        # seconds
+RELEASE = 0.08                       # seconds
+
+def polyphony(start: np.ndarray, end: np.ndarray) -> int:
+
+    """
+    Largest number of notes sounding at the same time.
+
+    :Example:
+
+    >>> polyphony(np.array([0, 0, 5]), np.array([10, 4, 6]))
+    2
+    """
+
+    if not len(start):
+        return 0
+    t = np.concatenate((start, end))
+    step = np.concatenate((np.ones(len(start), dtype=np.int64), -np.ones(len(end), dtype=np.int64)))
+    order = np.lexsort((step, t))                # ends before starts at the same time
+    return int(np.cumsum(step[order]).max())
+
+class _Bank:
+
+    """
+    Additive oscillator bank for the notes of one voice (sorted by onset).
+    """
+
+    def __init__(self, start: np.ndarray, end: np.ndarray, freq: np.ndarray, amp: np.ndarray, rate: int, partials: tuple) -> None:
+        self.start, self.end, self.freq, self.amp = start, end, freq, amp
+        self.rate = rate
+        self.partials = np.asarray(partials, dtype=np.float64)
+        self.harm = np.arange(1, len(partials) + 1)
+        self.attack = max(1, int(ATTACK * rate))
+        self.release = max(1, int(RELEASE * rate))
+        self.longest = int((end - start).max()) + self.release if len(start) else 0
+
+    def render(self, s0: int, size: int) -> np.ndarray:
+
+        """
+        Samples ``s0`` to ``s0 + size`` of the voice.
+        """
+
+        out = np.zeros(size, dtype=np.float64)
+        a = np.searchsorted(self.start, s0 - self.longest, 'left')
+        b = np.searchsorted(self.start, s0 + size, 'left')
+        sel = np.arange(a, b)
+        sel = sel[self.end[sel] + self.release > s0]        # still sounding
+        if not len(sel):
+            return out
+
+        n = s0 + np.arange(size)
+        t = (n[None, :] - self.start[sel, None])            # samples since the onset (notes x block)
+        length = (self.end - self.start)[sel, None]
+        env = np.clip(t / self.attack, 0, 1, dtype=np.float32)
+        env *= np.clip(1 - (t - length) / self.release, 0, 1)
+        env *= self.amp[sel, None]
+
+        phase = np.mod((2 * np.pi / self.rate) * self.freq[sel, None] * t, 2 * np.pi).astype(np.float32)
+        s1, c1 = np.sin(phase), np.cos(phase)
+        prev, cur = np.zeros_like(s1), s1               # sin(0 * phase), sin(1 * phase)
+        osc = np.zeros_like(s1)
+        nyquist = self.rate / 2
+        for h, g in zip(self.harm, self.partials):      # sin((h+1)x) = 2cos(x)sin(hx) - sin((h-1)x)
+            g = np.where(self.freq[sel, None] * h < nyquist, g, 0).astype(np.float32)
+            osc += g * cur
+            prev, cur = cur, 2 * c1 * cur - prev
+        out += (osc * env).sum(axis=0)
+        return out
+
+def render_audio(filename: str, note=60, dur=None, vel=None, *, tempo: Numeric = TEMPO, rate: int = RATE,
+                 partials: tuple = PARTIALS, block: int = BLOCK, workers: int = 1) -> str:
+
+    """
+    Render a score to a mono 16 bit WAV file with additive synthesis.
+
+    Each note is a bank of harmonics (``partials``) with a linear attack and
+    release; velocity sets the amplitude. Audio is produced ``block`` samples at
+    a time and written as it is produced, so memory does not grow with the length
+    of the score. With ``workers > 1`` the voices of each block are rendered in a
+    thread pool (numpy releases the GIL).
+
+    :param filename: Output path (``.wav`` is added if missing).
+    :type filename: str
+    :param note: ``_Voice``, ``Staff``, ``Score``, event table or midinotes (tuple of lists for more voices).
+    :param dur: Durations when ``note`` holds midinotes.
+    :param vel: Velocities when ``note`` holds midinotes.
+    :param tempo: Quarter notes per minute. Defaults to 60.
+    :type tempo: Numeric
+    :param rate: Sample rate. Defaults to 44100.
+    :type rate: int
+    :param partials: Amplitude of each harmonic. Defaults to ``PARTIALS``.
+    :type partials: tuple
+    :param block: Samples per block. Defaults to 8192.
+    :type block: int
+    :param workers: Threads rendering the voices. Defaults to 1.
+    :type workers: int
+    :return: The path of the written file.
+    :rtype: str
+
+    :Example:
+
+    >>> import os, tempfile
+    >>> path = render_audio(os.path.join(tempfile.mkdtemp(), 'scale'), [60, 62, 64, [60, 64, 67]], [4],
+    ...                     [40, 60, 80, 100], tempo=240)
+    >>> os.path.basename(path)
+    'scale.wav'
+    """
+
+    ev = table(note, dur, vel)
+    ev = ev[ev['pitch'] >= 0]
+    spt = 60 * rate / (tempo * TPQ)               # samples per tick
+    start = np.rint(ev['onset'] * spt).astype(np.int64)
+    end = np.rint((ev['onset'] + ev['dur']) * spt).astype(np.int64)
+    freq = np.asarray(_PSet(ev['pitch'].astype(np.float64)).to_freq())
+    amp = np.clip(ev['vel'], 0, 127) / 127
+
+    gain = 0.9 / (max(1, polyphony(start, end)) * sum(partials))   # never clips
+    ids = ev['staff'].astype(np.int64) << 16 | ev['voice']
+    banks = []
+    for k in np.unique(ids):
+        sel = np.flatnonzero(ids == k)
+        sel = sel[np.argsort(start[sel], kind='stable')]
+        banks.append(_Bank(start[sel], end[sel], freq[sel], amp[sel] * gain, rate, partials))
+
+    total = int(end.max()) + int(RELEASE * rate) if len(ev) else 0
+    if not filename.endswith('.wav'):
+        filename += '.wav'
+
+    pool = None
+    if workers > 1 and len(banks) > 1:
+        from concurrent.futures import ThreadPoolExecutor
+        pool = ThreadPoolExecutor(max_workers=workers)
+    try:
+        with wave.open(filename, 'wb') as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(rate)
+            for s0 in range(0, total, block):
+                size = min(block, total - s0)
+                if pool is None:
+                    parts = [b.render(s0, size) for b in banks]
+                else:
+                    parts = pool.map(lambda b: b.render(s0, size), banks)
+                mix = np.zeros(size)
+                for p in parts:
+                    mix += p
+                w.writeframes((np.clip(mix, -1, 1) * 32767).astype('<i2').tobytes())
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return filename
@@ -1,10 +1,36 @@
+def _rotate(intervals: list[int], k: int) -> list[int]:
+    return [(i - intervals[k]) % 12 for i in intervals[k:] + intervals[:k]]
+
+def _catalog(named: dict[str, list[int]], families: dict[str, list[str]]) -> dict[str, list[int]]:
+    out, seen = {}, set()
+    def add(name, intervals):
+        if tuple(intervals) not in seen:
+            seen.add(tuple(intervals))
+            out[name] = intervals
+    for name, intervals in named.items():
+        modes = families.get(name, [name])
+        for k in range(len(intervals)):
+            add(modes[k] if k < len(modes) else f"{name} mode {k + 1}", _rotate(intervals, k))
+    return out
+
 class PMod:
     """
     A list of possibile pitch models available.
 
+    ``maj`` and ``minNat`` are complete models; ``scales`` and ``chords`` are the
+    catalog used by ``Scale.identify`` and ``Chord.identify`` (intervals from
+    the root, every mode of the listed scales included).
+
+    .. note:: ``minNat`` is the natural minor (aeolian) scale. It used to repeat the
+        intervals and triads of ``maj``, so ``Scale.new(PMod.minNat, root)``
+        built a major scale.
+
     :Example:
-    >>> s = Scale.new(PMode.maj, 60)
+    >>> from musicnpy.pitch import Scale
+    >>> s = Scale.new(PMod.maj, 60)
     >>> Scale = [60, 62, 64, 65, 67, 69, 71]
+    >>> PMod.minNat["intervals"], PMod.minNat["scale_harmo"][:3]
+    ([0, 2, 3, 5, 7, 8, 10], ['min', 'dim', 'maj'])
     """
 
     maj = {
@@ -14,7 +40,150 @@ class PMod:
     }
 
     minNat = {
-        "intervals": [0, 2, 4, 5, 7, 9, 11],
-        "scale_harmo": ['maj', 'min', 'min', 'maj', 'maj', 'min', 'dim'],
+        "intervals": [0, 2, 3, 5, 7, 8, 10],
+        "scale_harmo": ['min', 'dim', 'maj', 'min', 'min', 'maj', 'maj'],
         "chord": [0, 3, 7]
-    }
\ No newline at end of file
+    }
+
+    scales = _catalog({
+        # eptatoniche
+        "major": [0, 2, 4, 5, 7, 9, 11],
+        "melodic minor": [0, 2, 3, 5, 7, 9, 11],
+        "harmonic minor": [0, 2, 3, 5, 7, 8, 11],
+        "harmonic major": [0, 2, 4, 5, 7, 8, 11],
+        "double harmonic major": [0, 1, 4, 5, 7, 8, 11],
+        "neapolitan major": [0, 1, 3, 5, 7, 9, 11],
+        "neapolitan minor": [0, 1, 3, 5, 7, 8, 11],
+        "hungarian major": [0, 3, 4, 6, 7, 9, 10],
+        "enigmatic": [0, 1, 4, 6, 8, 10, 11],
+        "persian": [0, 1, 4, 5, 6, 8, 11],
+        "todi": [0, 1, 3, 6, 7, 8, 11],
+        "marva": [0, 1, 4, 6, 7, 9, 11],
+        "purvi": [0, 1, 4, 6, 7, 8, 11],
+        "leading whole tone": [0, 2, 4, 6, 8, 10, 11],
+        # pentatoniche
+        "major pentatonic": [0, 2, 4, 7, 9],
+        "hirajoshi": [0, 2, 3, 7, 8],
+        "kumoi": [0, 2, 3, 7, 9],
+        "pelog": [0, 1, 3, 7, 8],
+        "insen": [0, 1, 5, 7, 10],
+        "dominant pentatonic": [0, 2, 4, 7, 10],
+        # esatoniche
+        "whole tone": [0, 2, 4, 6, 8, 10],
+        "augmented": [0, 3, 4, 7, 8, 11],
+        "blues": [0, 3, 5, 6, 7, 10],
+        "major blues": [0, 2, 3, 4, 7, 9],
+        "prometheus": [0, 2, 4, 6, 9, 10],
+        "tritone": [0, 1, 4, 6, 7, 10],
+        "messiaen 5": [0, 1, 5, 6, 7, 11],
+        # ottatoniche e oltre
+        "octatonic half-whole": [0, 1, 3, 4, 6, 7, 9, 10],
+        "bebop dominant": [0, 2, 4, 5, 7, 9, 10, 11],
+        "bebop major": [0, 2, 4, 5, 7, 8, 9, 11],
+        "bebop dorian": [0, 2, 3, 4, 5, 7, 9, 10],
+        "bebop melodic minor": [0, 2, 3, 5, 7, 8, 9, 11],
+        "spanish eight tone": [0, 1, 3, 4, 5, 6, 8, 10],
+        "messiaen 4": [0, 1, 2, 5, 6, 7, 8, 11],
+        "messiaen 6": [0, 2, 4, 5, 6, 8, 10, 11],
+        "messiaen 3": [0, 2, 3, 4, 6, 7, 8, 10, 11],
+        "messiaen 7": [0, 1, 2, 3, 5, 6, 7, 8, 9, 11],
+        "chromatic": list(range(12)),
+    }, {
+        "major": ["major", "dorian", "phrygian", "lydian", "mixolydian", "minor", "locrian"],
+        "melodic minor": ["melodic minor", "dorian b2", "lydian augmented", "lydian dominant",
+                          "mixolydian b6", "locrian #2", "altered"],
+        "harmonic minor": ["harmonic minor", "locrian #6", "ionian #5", "dorian #4",
+                           "phrygian dominant", "lydian #2", "ultralocrian"],
+        "harmonic major": ["harmonic major", "dorian b5", "phrygian b4", "lydian b3",
+                           "mixolydian b2", "lydian augmented #2", "locrian bb7"],
+        "double harmonic major": ["double harmonic major", "lydian #2 #6", "ultraphrygian",
+                                  "hungarian minor", "oriental", "ionian #2 #5", "locrian bb3 bb7"],
+        "major pentatonic": ["major pentatonic", "suspended pentatonic", "man gong",
+                             "ritusen", "minor pentatonic"],
+        "hirajoshi": ["hirajoshi", "iwato", "hirajoshi mode 3", "in"],
+        "octatonic half-whole": ["octatonic half-whole", "octatonic whole-half"],
+    })
+
+    chords = {
+        "maj": [0, 4, 7],
+        "min": [0, 3, 7],
+        "dim": [0, 3, 6],
+        "aug": [0, 4, 8],
+        "sus2": [0, 2, 7],
+        "sus4": [0, 5, 7],
+        "5": [0, 7],
+        "maj7": [0, 4, 7, 11],
+        "min7": [0, 3, 7, 10],
+        "7": [0, 4, 7, 10],
+        "min7b5": [0, 3, 6, 10],
+        "dim7": [0, 3, 6, 9],
+        "minmaj7": [0, 3, 7, 11],
+        "augmaj7": [0, 4, 8, 11],
+        "aug7": [0, 4, 8, 10],
+        "7b5": [0, 4, 6, 10],
+        "7sus4": [0, 5, 7, 10],
+        "7sus2": [0, 2, 7, 10],
+        "maj7sus2": [0, 2, 7, 11],
+        "dimmaj7": [0, 3, 6, 11],
+        "6": [0, 4, 7, 9],
+        "min6": [0, 3, 7, 9],
+        "add9": [0, 4, 7, 14],
+        "minadd9": [0, 3, 7, 14],
+        "add11": [0, 4, 7, 17],
+        "6/9": [0, 4, 7, 9, 14],
+        "min6/9": [0, 3, 7, 9, 14],
+        "maj9": [0, 4, 7, 11, 14],
+        "min9": [0, 3, 7, 10, 14],
+        "9": [0, 4, 7, 10, 14],
+        "minmaj9": [0, 3, 7, 11, 14],
+        "7b9": [0, 4, 7, 10, 13],
+        "7#9": [0, 4, 7, 10, 15],
+        "9sus4": [0, 5, 7, 10, 14],
+        "min7b9": [0, 3, 7, 10, 13],
+        "maj7#11": [0, 4, 7, 11, 18],
+        "7#11": [0, 4, 7, 10, 18],
+        "min11": [0, 3, 7, 10, 14, 17],
+        "11": [0, 4, 7, 10, 14, 17],
+        "maj9#11": [0, 4, 7, 11, 14, 18],
+        "9#11": [0, 4, 7, 10, 14, 18],
+        "maj13": [0, 4, 7, 11, 14, 21],
+        "13": [0, 4, 7, 10, 14, 21],
+        "min13": [0, 3, 7, 10, 14, 21],
+        "7b13": [0, 4, 7, 10, 20],
+        "7b9b13": [0, 4, 7, 10, 13, 20],
+        "7#9b13": [0, 4, 7, 10, 15, 20],
+        "13b9": [0, 4, 7, 10, 13, 21],
+        "quartal": [0, 5, 10],
+        "quartal4": [0, 5, 10, 15],
+        "quintal": [0, 7, 14],
+    }
+
+    @classmethod
+    def model(cls, name: str) -> dict:
+
+        """
+        A catalog scale as a model (the format of ``maj`` and ``minNat``).
+
+        :param name: Name in ``PMod.scales``.
+        :type name: str
+        :return: ``intervals`` and, for scales built by thirds, ``scale_harmo`` and ``chord``.
+        :rtype: dict
+        :raises KeyError: If the scale is not in the catalog.
+
+        :Example:
+        >>> PMod.model('dorian')['scale_harmo']
+        ['min', 'min', 'maj', 'maj', 'min', 'dim', 'maj']
+        """
+
+        intervals = cls.scales[name]
+        n = len(intervals)
+        harmo = []
+        for k in range(n):                                    # triade su ogni grado
+            triad = [(intervals[(k + j) % n] - intervals[k]) % 12 for j in (0, 2, 4)]
+            quality = [q for q in ('maj', 'min', 'dim', 'aug') if cls.chords[q] == triad]
+            harmo.append(quality[0] if quality else None)
+        model = {"intervals": list(intervals)}
+        if n == 7:
+            model["scale_harmo"] = harmo
+            model["chord"] = [(intervals[j] - intervals[0]) for j in (0, 2, 4)]
+        return model
@@ -0,0 +1,202 @@
+"""
+musicnpy.keys
+"""
+
+from __future__ import annotations
+import numpy as np
+from collections.abc import Iterable, Iterator
+from .core import _Set
+
+# Krumhansl-Kessler probe-tone profiles, tonic first
+MAJOR = np.array([6.35, 2.23, 3.48, 2.33, 4.38, 4.09, 2.52, 5.19, 2.39, 3.66, 2.29, 2.88])
+MINOR = np.array([6.33, 2.68, 3.52, 5.38, 2.60, 3.53, 2.54, 4.75, 3.98, 2.69, 3.34, 3.17])
+
+def _z(x: np.ndarray) -> np.ndarray:
+    x = x - x.mean(axis=-1, keepdims=True)
+    norm = np.sqrt((x * x).sum(axis=-1, keepdims=True))
+    return np.divide(x, norm, out=np.zeros_like(x), where=norm > 0)
+
+# key k: 0-11 major on pitch class k, 12-23 minor on pitch class k - 12
+PROFILES = _z(np.array([np.roll(MAJOR, k) for k in range(12)] + [np.roll(MINOR, k) for k in range(12)]))
+
+MAJOR_NAMES = ['c', 'df', 'd', 'ef', 'e', 'f', 'fs', 'g', 'af', 'a', 'bf', 'b']
+MINOR_NAMES = ['c', 'cs', 'd', 'ef', 'e', 'f', 'fs', 'g', 'gs', 'a', 'bf', 'b']
+KEYS = tuple([f"{n} major" for n in MAJOR_NAMES] + [f"{n} minor" for n in MINOR_NAMES])
+
+WINDOW = 16     # notes per window
+HOP = 4         # notes between windows
+
+def _notes(pitch, dur=None) -> tuple[np.ndarray, np.ndarray]:
+    if hasattr(pitch, 'events'):
+        pitch = pitch.events
+    if isinstance(pitch, np.ndarray) and pitch.dtype.names:
+        ev = pitch[pitch['pitch'] >= 0]
+        return ev['pitch'].astype(np.int64), ev['dur'].astype(np.float64)
+    p = np.asarray(pitch.vals if isinstance(pitch, _Set) else pitch, dtype=np.float64).ravel()
+    w = np.ones(len(p)) if dur is None else np.broadcast_to(np.asarray(dur, dtype=np.float64), p.shape)
+    ok = p >= 0
+    return np.rint(p[ok]).astype(np.int64), w[ok]
+
+def histogram(pitch, dur=None) -> np.ndarray:
+
+    """
+    Pitch-class histogram, weighted by duration.
+
+    :param pitch: Midinotes, ``_Set``, event table or object with ``events`` (rests are skipped).
+    :param dur: Weights of the midinotes (e.g. durations). Defaults to 1 per note.
+    :return: ``(12,)`` weights.
+    :rtype: np.ndarray
+
+    :Example:
+
+    >>> histogram([60, 64, 67, 72], [2, 1, 1, 1]).tolist()
+    [3.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0]
+    """
+
+    p, w = _notes(pitch, dur)
+    return np.bincount(p % 12, weights=w, minlength=12)
+
+def correlate(hist: np.ndarray) -> np.ndarray:
+
+    """
+    Correlation of histograms with the 24 key profiles, in one matrix product.
+
+    :param hist: ``(..., 12)`` histograms.
+    :type hist: np.ndarray
+    :return: ``(..., 24)`` Pearson coefficients (0 for empty or flat histograms).
+    :rtype: np.ndarray
+    """
+
+    return _z(np.asarray(hist, dtype=np.float64)) @ PROFILES.T
+
+def find_key(pitch, dur=None) -> int:
+
+    """
+    Most likely key of a whole passage.
+
+    :return: Index in ``KEYS``, -1 if there are no pitches.
+    :rtype: int
+
+    :Example:
+
+    >>> KEYS[find_key([57, 59, 60, 62, 64, 65, 68, 69], [4, 1, 2, 1, 3, 1, 1, 4])]
+    'a minor'
+    """
+
+    r = correlate(histogram(pitch, dur))
+    return int(r.argmax()) if r.any() else -1
+
+def find_keys(pitch, dur=None, window: int = WINDOW, hop: int = HOP) -> dict[str, np.ndarray]:
+
+    """
+    Key of every window of ``window`` notes, every ``hop`` notes.
+
+    The histograms of all windows come from cumulative sums (one pitch class at a
+    time, so memory stays linear in the number of notes) and are correlated with
+    the 24 profiles in a single matrix product. Notes after the last complete
+    window get one more, shorter window (a passage shorter than ``window`` is a
+    single window).
+
+    :param pitch: Midinotes, ``_Set``, event table or object with ``events``.
+    :param dur: Weights of the midinotes. Defaults to 1 per note.
+    :param window: Notes per window. Defaults to 16.
+    :type window: int
+    :param hop: Notes between windows. Defaults to 4.
+    :type hop: int
+    :return: ``start`` (first note of each window), ``key`` (index in ``KEYS``, -1 if undecided)
+        and ``r`` (its correlation).
+    :rtype: dict[str, np.ndarray]
+
+    :Example:
+
+    >>> c, fs = [60, 62, 64, 65, 67, 69, 71, 72], [66, 68, 70, 71, 73, 75, 77, 78]
+    >>> [KEYS[k] for k in find_keys(c + fs, window=8, hop=8)['key']]
+    ['c major', 'fs major']
+    >>> find_keys(c + fs[:3], window=8, hop=4)['start'].tolist()
+    [0, 4]
+    """
+
+    p, w = _notes(pitch, dur)
+    starts = np.arange(0, max(len(p) - window, 0) + 1, hop) if len(p) else np.zeros(0, dtype=np.int64)
+    if len(starts) and starts[-1] + window < len(p) and starts[-1] + hop < len(p):
+        starts = np.append(starts, starts[-1] + hop)                  # tail after the last full window
+    ends = np.minimum(starts + window, len(p))
+    hist = np.empty((len(starts), 12))
+    pc = p % 12
+    for c in range(12):
+        cs = np.concatenate(([0.0], np.cumsum(np.where(pc == c, w, 0.0))))
+        hist[:, c] = cs[ends] - cs[starts]
+    r = correlate(hist)
+    key = r.argmax(axis=1)
+    best = r[np.arange(len(key)), key]
+    key[~r.any(axis=1)] = -1
+    return {'start': starts, 'key': key, 'r': best}
+
+def iter_keys(chunks: Iterable, window: int = WINDOW, hop: int = HOP) -> Iterator[tuple[int, int, float]]:
+
+    """
+    ``find_keys`` over a stream of ``(pitch, dur)`` chunks (or pitches only).
+
+    Notes not yet covered by a complete window are kept for the next chunk; at the
+    end of the stream they are flushed as a last, shorter window. The windows are
+    the same as those of ``find_keys`` on the whole stream.
+
+    :return: ``(start, key, r)`` for each window as soon as it is complete.
+    :rtype: Iterator[tuple[int, int, float]]
+
+    :Example:
+
+    >>> [(s, KEYS[k]) for s, k, _ in iter_keys([[60, 62, 64], [65, 67]], window=8)]
+    [(0, 'c major')]
+    """
+
+    p, w = np.zeros(0, dtype=np.int64), np.zeros(0)
+    offset, skip, done = 0, 0, False
+    for chunk in chunks:
+        cp, cw = _notes(*chunk) if isinstance(chunk, tuple) else _notes(chunk)
+        p, w = np.concatenate((p, cp)), np.concatenate((w, cw))
+        if skip:                                                      # hop > window: notes between windows
+            k = min(skip, len(p))
+            p, w, skip = p[k:], w[k:], skip - k
+        if len(p) < window:
+            continue
+        end = len(p) - (len(p) - window) % hop                        # complete windows only
+        out = find_keys(p[:end], w[:end], window, hop)
+        yield from zip((out['start'] + offset).tolist(), out['key'].tolist(), out['r'].tolist())
+        drop = int(out['start'][-1]) + hop
+        skip = max(drop - len(p), 0)
+        p, w = p[drop:], w[drop:]
+        offset += drop
+        done = True
+    if len(p) > (window - hop if done else 0):                         # notes after the last full window
+        out = find_keys(p, w, window, hop)
+        yield from zip((out['start'] + offset).tolist(), out['key'].tolist(), out['r'].tolist())
+
+def staff_key(key: int) -> str | None:
+
+    """
+    Major key for ``Staff(key=...)`` and ``tonalita``: the relative major of minor keys.
+
+    :Example:
+
+    >>> staff_key(KEYS.index('e minor')), staff_key(KEYS.index('bf major'))
+    ('g', 'bf')
+    """
+
+    if key < 0:
+        return None
+    return MAJOR_NAMES[key] if key < 12 else MAJOR_NAMES[(key - 12 + 3) % 12]
+
+def spelling(key: int) -> str:
+
+    """
+    ``'diesis'`` or ``'bemoli'`` for a key, as ``tonalita`` chooses it.
+
+    :Example:
+
+    >>> spelling(KEYS.index('d minor'))
+    'bemoli'
+    """
+
+    from .topyly import tonalita
+    return tonalita(staff_key(key))
@@ -0,0 +1,179 @@
+"""
+musicnpy.midi
+"""
+
+from __future__ import annotations
+import numpy as np
+from .pitch import Numeric
+from .topyly import events, EVENT, TPQ
+
+TEMPO = 60            # bpm, same default as the lilypond \midi { } block
+CHANNELS = np.array([0, 1, 2, 3, 4, 5, 6, 7, 8, 10, 11, 12, 13, 14, 15])  # channel 9 (drums) skipped
+
+def varlen(a: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+
+    """
+    Encode integers as MIDI variable-length quantities.
+
+    :param a: Non negative integers lower than 2**28.
+    :type a: np.ndarray
+    :return: A ``(n, 4)`` byte matrix, right aligned, and the mask of the used bytes.
+    :rtype: tuple[np.ndarray, np.ndarray]
+
+    :Example:
+
+    >>> b, m = varlen(np.array([0, 128]))
+    >>> b[m].tolist()
+    [0, 129, 0]
+    """
+
+    a = np.asarray(a, dtype=np.int64)
+    shift = np.array([21, 14, 7, 0])
+    out = ((a[:, None] >> shift) & 0x7F).astype(np.uint8)
+    nbytes = 1 + (a >= 1 << 7) + (a >= 1 << 14) + (a >= 1 << 21)
+    mask = np.arange(4) >= (4 - nbytes)[:, None]
+    out[:, :3] |= 0x80                       # continuation bit, not on the last byte
+    return out, mask
+
+def chunk(time: np.ndarray, status: np.ndarray, data1: np.ndarray, data2: np.ndarray, meta: bytes = b'') -> bytes:
+
+    """
+    Pack channel events into an ``MTrk`` chunk.
+
+    Events are sorted by time (note-offs before note-ons on the same tick),
+    converted to delta times and packed in a single pass.
+
+    :param time: Absolute times in ticks.
+    :param status: Status bytes (``0x80``/``0x90`` | channel).
+    :param data1: First data byte (pitch).
+    :param data2: Second data byte (velocity).
+    :param meta: Already encoded events placed at tick 0 (tempo, track name).
+    :type meta: bytes
+    :return: The complete track chunk.
+    :rtype: bytes
+    """
+
+    order = np.lexsort((status >> 4 == 0x9, time))
+    time  = time[order]
+    delta = np.diff(time, prepend=0)
+
+    vl, mask = varlen(delta)
+    body = np.empty((len(time), 7), dtype=np.uint8)
+    body[:, :4] = vl
+    body[:, 4] = status[order]
+    body[:, 5] = data1[order]
+    body[:, 6] = data2[order]
+    used = np.concatenate((mask, np.ones((len(time), 3), dtype=bool)), axis=1)
+
+    data = meta + body[used].tobytes() + b'\x00\xff\x2f\x00'   # end of track
+    return b'MTrk' + len(data).to_bytes(4, 'big') + data
+
+def _meta(kind: int, data: bytes) -> bytes:
+    return b'\x00\xff' + bytes([kind, len(data)]) + data
+
+def _tempo(bpm: Numeric) -> bytes:
+    return _meta(0x51, int(round(60_000_000 / bpm)).to_bytes(3, 'big'))
+
+def _channel(ev: np.ndarray, ch: np.ndarray, scale: Numeric = 1) -> tuple[np.ndarray, ...]:
+
+    """
+    Turn an event table into note-on/note-off arrays, one channel per event.
+    Rests and spaces (negative pitches) are skipped.
+    """
+
+    keep = ev['pitch'] >= 0
+    ev, ch = ev[keep], ch[keep]
+    on  = np.rint(ev['onset'] * scale).astype(np.int64)
+    off = np.rint((ev['onset'] + ev['dur']) * scale).astype(np.int64)
+    n = len(ev)
+    time   = np.concatenate((on, off))
+    status = np.concatenate((0x90 | ch, 0x80 | ch)).astype(np.uint8)
+    data1  = np.tile(np.clip(ev['pitch'], 0, 127), 2).astype(np.uint8)
+    data2  = np.concatenate((np.clip(ev['vel'], 1, 127), np.zeros(n, dtype=np.int64))).astype(np.uint8)
+    return time, status, data1, data2
+
+def table(note=60, dur=None, vel=None) -> np.ndarray:
+
+    """
+    Build the event table for ``write_midi``.
+
+    :param note: A ``_Voice``, ``Staff`` or ``Score`` (their ``events`` are used),
+        an ``EVENT`` array, or midinotes as accepted by ``Staff`` (tuple for more voices).
+    :param dur: Durations when ``note`` holds midinotes.
+    :param vel: Velocities when ``note`` holds midinotes.
+    :return: The event table.
+    :rtype: np.ndarray
+    """
+
+    if hasattr(note, 'events'):
+        return note.events
+    if isinstance(note, np.ndarray) and note.dtype == EVENT:
+        return note
+    if type(note) == tuple:
+        return np.concatenate([events(note[i],
+                                      None if dur is None else dur[i],
+                                      None if vel is None else vel[i], voice=i) for i in range(len(note))])
+    return events(note, dur, vel)
+
+def write_midi(filename: str, note=60, dur=None, vel=None, *, tempo: Numeric = TEMPO, format: int = 1, tpq: int = TPQ) -> bytes:
+
+    """
+    Write a Standard MIDI File without running lilypond.
+
+    ``note`` can be a ``_Voice``, ``Staff`` or ``Score`` (their event table is used)
+    or midinotes following ``Staff``: a list describes one voice, a tuple of lists
+    describes several voices. Each voice gets its own channel; with ``format=1``
+    each voice is also written on its own track after a tempo track, with
+    ``format=0`` everything is merged on a single track.
+
+    :param filename: Output path (``.mid`` is added if missing).
+    :type filename: str
+    :param note: ``_Voice``, ``Staff``, ``Score``, event table or midinotes (tuple of lists for more voices).
+    :param dur: Durations (tuple of lists for more voices).
+    :param vel: Velocities (tuple of lists for more voices).
+    :param tempo: Quarter notes per minute. Defaults to 60.
+    :type tempo: Numeric
+    :param format: SMF format, 0 or 1. Defaults to 1.
+    :type format: int
+    :param tpq: Ticks per quarter note. Defaults to ``TPQ``.
+    :type tpq: int
+    :return: The bytes written to the file.
+    :rtype: bytes
+    :raises ValueError: If format is not 0 or 1.
+
+    :Example:
+
+    >>> import os, tempfile
+    >>> data = write_midi(os.path.join(tempfile.mkdtemp(), 'scale'), [60, 62, 64, 65], [8, 'mod'], [80])
+    >>> data[:4]
+    b'MThd'
+    """
+
+    if format not in (0, 1):
+        raise ValueError("format must be 0 or 1")
+
+    ev = table(note, dur, vel)
+    scale = tpq / TPQ
+    ids = ev['staff'].astype(np.int64) << 16 | ev['voice']       # one channel/track per voice
+    keys, inv = np.unique(ids, return_inverse=True)
+    ch = CHANNELS[inv % len(CHANNELS)]
+
+    if format == 0:
+        tracks = [chunk(*_channel(ev, ch, scale), meta=_tempo(tempo))]
+    else:
+        empty  = np.zeros(0, dtype=np.int64)
+        tracks = [chunk(empty, empty.astype(np.uint8), empty.astype(np.uint8), empty.astype(np.uint8), meta=_tempo(tempo))]
+        order  = np.argsort(inv, kind='stable')
+        bounds = np.searchsorted(inv[order], np.arange(len(keys) + 1))
+        for k in range(len(keys)):
+            sel = order[bounds[k]:bounds[k + 1]]
+            tracks.append(chunk(*_channel(ev[sel], ch[sel], scale)))
+
+    header = b'MThd' + (6).to_bytes(4, 'big') + format.to_bytes(2, 'big') + len(tracks).to_bytes(2, 'big') + tpq.to_bytes(2, 'big')
+    data = header + b''.join(tracks)
+
+    if not filename.endswith(('.mid', '.midi')):
+        filename += '.mid'
+    with open(filename, 'wb') as f:
+        f.write(data)
+    return data
@@ -0,0 +1,399 @@
+"""
+musicnpy.musicxml
+"""
+
+from __future__ import annotations
+import numpy as np
+from fractions import Fraction
+from functools import lru_cache
+from itertools import zip_longest
+from math import lcm
+from xml.sax.saxutils import escape
+from typing import Iterator
+from .topyly import (NOTE_DIESIS, NOTE_BEMOLI, VELS, EXPR_KEYS, TUPLETS,
+                     tonalita, events, splitmode, fitmode, ffill, check_staff, validate)
+
+# Per-pitch spelling, same choice as PCHS: SPELL[tonalita(key)][midinote]
+SPELL = {}
+for mode, names in (('diesis', NOTE_DIESIS), ('bemoli', NOTE_BEMOLI)):
+    SPELL[mode] = tuple(
+        f"<pitch><step>{names[n % 12][0].upper()}</step>"
+        + {'s': '<alter>1</alter>', 'f': '<alter>-1</alter>', '': ''}[names[n % 12][1:]]
+        + f"<octave>{n // 12 - 1}</octave></pitch>"
+        for n in range(128))
+
+# \key <name> \major --> circle of fifths
+FIFTHS = {'c': 0, 'g': 1, 'd': 2, 'a': 3, 'e': 4, 'b': 5, 'fs': 6, 'cs': 7,
+          'f': -1, 'bf': -2, 'ef': -3, 'af': -4, 'df': -5, 'gf': -6, 'cf': -7}
+
+# \clef <name> --> (sign, line)
+CLEFS = {'G': ('G', 2), 'treble': ('G', 2), 'violin': ('G', 2), 'french': ('G', 1),
+         'F': ('F', 4), 'bass': ('F', 4), 'baritone': ('F', 3), 'subbass': ('F', 5),
+         'C': ('C', 3), 'alto': ('C', 3), 'tenor': ('C', 4), 'soprano': ('C', 1),
+         'mezzosoprano': ('C', 2), 'percussion': ('percussion', 2)}
+
+# actual:normal notes for each DURS table, same order as RATIOS (\tuplet 3/2, 5/4, ...)
+TIME_MOD = ((1, 1), (3, 2), (5, 4), (6, 4), (7, 4), (9, 8), (11, 8), (13, 8), (15, 8))
+
+# note types, longest first, in quarter notes
+TYPES = tuple((Fraction(4, 2 ** k), name) for k, name in
+              enumerate(('whole', 'half', 'quarter', 'eighth', '16th', '32nd', '64th', '128th', '256th')))
+
+DYNAMICS = tuple(f"<{v.lstrip(chr(92))}/>" for v in VELS)   # same bands as mapVel
+
+# EXPR key --> (where, element) inside <notations> or as a <direction> before the note
+XML_EXPR = {
+    '>':          ('articulations', '<accent/>'),
+    '^':          ('articulations', '<strong-accent/>'),
+    '!':          ('articulations', '<staccatissimo/>'),
+    '.':          ('articulations', '<staccato/>'),
+    '_':          ('articulations', '<detached-legato/>'),
+    '-':          ('articulations', '<tenuto/>'),
+    'tie':        ('tie', ''),
+    'expr':       ('articulations', '<other-articulation>espressivo</other-articulation>'),
+    'tr':         ('ornaments', '<trill-mark/>'),
+    'm':          ('ornaments', '<mordent/>'),
+    'cor':        ('notations', '<fermata/>'),
+    'turn':       ('ornaments', '<turn/>'),
+    'arpeggio':   ('notations', '<arpeggiate/>'),
+    'gliss':      ('gliss', ''),
+    'cresc':      ('direction', '<wedge type="crescendo"/>'),
+    'dim':        ('direction', '<wedge type="diminuendo"/>'),
+    'end':        ('direction', '<wedge type="stop"/>'),
+    'breathe':    ('articulations', '<breath-mark/>'),
+    'upbow':      ('technical', '<up-bow/>'),
+    'downbow':    ('technical', '<down-bow/>'),
+    'harmonic':   ('technical', '<harmonic/>'),
+    'flageolet':  ('technical', '<harmonic><natural/></harmonic>'),
+    'pizzicato':  ('direction', '<words>pizz.</words>'),
+    'bartokPizz': ('technical', '<snap-pizzicato/>'),
+    00:           ('', ''),
+}
+EXPR_XML = tuple(XML_EXPR[k] for k in EXPR_KEYS)   # indexed by the 'exp' column
+
+HEADER = ('<?xml version="1.0" encoding="UTF-8" standalone="no"?>\n'
+          '<!DOCTYPE score-partwise PUBLIC "-//Recordare//DTD MusicXML 4.0 Partwise//EN" '
+          '"http://www.musicxml.org/dtds/partwise.dtd">\n'
+          '<score-partwise version="4.0">\n')
+
+def _voices(note, dur, vel, exp):
+    if type(note) == tuple:
+        return [(note[i],
+                 None if dur is None else dur[i],
+                 None if vel is None else vel[i],
+                 None if exp is None else exp[i]) for i in range(len(note))]
+    return [(note, dur, vel, exp)]
+
+def _meter(t_sig: str | None) -> tuple[int, int]:
+    if t_sig is None:
+        return 4, 4
+    beats, beat_type = str(t_sig).split('/')
+    return int(beats), int(beat_type)
+
+def divisions(dur, t_sig: str | None = None) -> int:
+
+    """
+    Smallest ``<divisions>`` (ticks per quarter note) giving integer durations.
+
+    Only the duration pattern is read, not the expanded sequence.
+
+    :param dur: Durations as accepted by ``Staff`` (tuple for more voices).
+    :param t_sig: Time signature (``'3/4'``).
+    :type t_sig: str
+    :return: Ticks per quarter note.
+    :rtype: int
+
+    :Example:
+
+    >>> divisions([4, [8, [1, 1, 1]]], '3/8'), divisions([4.0, 16.0])
+    (6, 4)
+    """
+
+    beats, beat_type = _meter(t_sig)
+    out = Fraction(4 * beats, beat_type).denominator
+    for d in dur if type(dur) == tuple else (dur,):
+        d, _ = splitmode(d, 4)
+        for i in d:
+            if type(i) == list:
+                tot = Fraction(i[0]) * sum(i[1])            # Fraction(4.0): float durations as in Staff
+                for x in i[1]:
+                    out = lcm(out, (4 * Fraction(x) / tot).denominator)
+            elif i:
+                out = lcm(out, (4 / Fraction(i)).denominator)
+    return out
+
+def ratios(dur, size: int) -> np.ndarray:
+
+    """
+    Tuplet of every note, as an index in ``TIME_MOD`` (same expansion as ``events``).
+
+    :param dur: Durations of one voice.
+    :param size: Number of notes in the voice.
+    :type size: int
+    :rtype: np.ndarray
+    """
+
+    dur, mode = splitmode(dur)
+    idx = []
+    for i in dur:
+        if type(i) == list:
+            idx.extend([TUPLETS.get(sum(i[1]), 0) + 1] * len(i[1]))
+        else:
+            idx.append(1 if i else 0)           # 00 --> previous
+    idx = ffill(fitmode(np.asarray(idx, dtype=np.int64), mode, size), 1)
+    return idx - 1
+
+@lru_cache(maxsize=1024)
+def pieces(length: Fraction) -> tuple[tuple[Fraction, str, int], ...]:
+
+    """
+    Split a written length (in quarter notes) into tied note values.
+
+    :param length: Written length.
+    :type length: Fraction
+    :return: ``(length, type, dots)`` for each tied note.
+    :rtype: tuple
+
+    :Example:
+
+    >>> [(str(q), t, d) for q, t, d in pieces(Fraction(5, 4))]
+    [('1', 'quarter', 0), ('1/4', '16th', 0)]
+    """
+
+    out = []
+    rest = length
+    while rest >= TYPES[-1][0]:
+        k = next(k for k, (q, _) in enumerate(TYPES) if q <= rest)
+        q, name = TYPES[k]
+        dots = 0
+        while dots < 3 and k + dots + 1 < len(TYPES) and q + TYPES[k + dots + 1][0] <= rest:
+            q += TYPES[k + dots + 1][0]
+            dots += 1
+        out.append((q, name, dots))
+        rest -= q
+    if not out:                                 # shorter than the shortest type
+        out.append((length, TYPES[-1][1], 0))
+    return tuple(out)
+
+@lru_cache(maxsize=1024)
+def written(length: int, actual: int, normal: int, div: int) -> tuple[tuple[int, int, str, int], ...]:
+
+    """
+    Tied note values of a length in divisions (``pieces`` converted back to divisions).
+
+    :return: ``(offset, duration, type, dots)`` for each tied note; durations add up to ``length``.
+    :rtype: tuple
+    """
+
+    out = []
+    done = 0
+    for q, name, dots in pieces(Fraction(length, div) * actual / normal):
+        d = int(round(float(q * normal / actual * div)))
+        out.append([done, d, name, dots])
+        done += d
+    out[-1][1] += length - done                 # rounding stays in the same measure
+    return tuple(map(tuple, out))
+
+def _measures(ev: np.ndarray, tmod: np.ndarray, div: int, span: int, voice: int, spell: tuple) -> Iterator[tuple[str, int]]:
+
+    """
+    Stream one voice, measure by measure.
+
+    :return: For every measure, the xml of the voice and its duration in divisions.
+    """
+
+    starts = np.flatnonzero(np.diff(ev['chord'], prepend=-1))
+    first = ev[starts]                          # one row per note/chord, as python lists
+    onsets, lengths = first['onset'].tolist(), first['dur'].tolist()
+    tmods, exps, vels = tmod[first['chord']].tolist(), first['exp'].tolist(), first['vel'].tolist()
+    pitch, bounds = ev['pitch'].tolist(), starts.tolist() + [len(ev)]
+    chords = (pitch[bounds[k]:bounds[k + 1]] for k in range(len(starts)))
+    buf = []
+    pos = 0                                     # written so far in the current measure
+    measure = 0
+    band = -1
+    tie_in, gliss_in = (), False
+
+    for onset, length, tm, ex, vel, chord in zip(onsets, lengths, tmods, exps, vels, chords):
+        a, n = TIME_MOD[tm]
+        where, elem = EXPR_XML[ex]
+        pitches = [p for p in chord if p >= 0] or chord[:1]
+
+        head = ''                               # directions before the first note
+        if pitches[0] >= 0 and min(vel // 10, 11) != band:
+            band = min(vel // 10, 11)
+            head += f'<direction-type><dynamics>{DYNAMICS[band]}</dynamics></direction-type>'
+        if where == 'direction':
+            head += f'<direction-type>{elem}</direction-type>'
+        if head:
+            buf.append(f'<direction placement="below">{head}<voice>{voice}</voice></direction>\n')
+
+        # split at barlines, then into written values
+        segs = []
+        t, end = onset, onset + length
+        while t < end:
+            cut = min(end, (t // span + 1) * span)
+            segs.extend((t + o, d, name, dots) for o, d, name, dots in written(cut - t, a, n, div))
+            t = cut
+
+        for k, (t, d, name, dots) in enumerate(segs):
+            while t >= (measure + 1) * span:
+                yield ''.join(buf), pos
+                buf, pos, measure = [], 0, measure + 1
+            first, final = k == 0, k == len(segs) - 1
+            note_tail = (f'<voice>{voice}</voice><type>{name}</type>' + '<dot/>' * dots
+                         + (f'<time-modification><actual-notes>{a}</actual-notes>'
+                            f'<normal-notes>{n}</normal-notes></time-modification>' if a != 1 else ''))
+            marks = ''
+            if first and gliss_in:
+                marks += '<glissando type="stop"/>'
+            if final and where == 'gliss':
+                marks += '<glissando type="start"/>'
+            if first and where in ('articulations', 'ornaments', 'technical'):
+                marks += f'<{where}>{elem}</{where}>'
+            if first and where == 'notations':
+                marks += elem
+
+            for c, p in enumerate(pitches):
+                if p < 0:
+                    hidden = ' print-object="no"' if p == -2 else ''    # space
+                    buf.append(f"<note{hidden}><rest/><duration>{d}</duration>{note_tail}</note>\n")
+                    continue
+                stop  = not first or p in tie_in        # tied from the previous piece or note
+                start = not final or where == 'tie'
+                tie   = ('<tie type="stop"/>' if stop else '') + ('<tie type="start"/>' if start else '')
+                tied  = ('<tied type="stop"/>' if stop else '') + ('<tied type="start"/>' if start else '')
+                notations = f"<notations>{tied}{marks}</notations>" if tied or marks else ''
+                buf.append(f"<note dynamics=\"{vel / 0.9:.2f}\">{'<chord/>' if c else ''}{spell[min(p, 127)]}"
+                           f"<duration>{d}</duration>{tie}{note_tail}{notations}</note>\n")
+            pos = t + d - measure * span
+        tie_in = set(pitches) if where == 'tie' else ()
+        gliss_in = where == 'gliss' and pitches[0] >= 0
+    yield ''.join(buf), pos
+
+def iter_part(index: int, note=60, dur=None, vel=None, exp=None, key=None, t_sig=None, clef=None,
+              i_name=None, i_short=None, i_midi=None) -> Iterator[str]:
+
+    """
+    Stream a ``<part>`` element for ``Staff`` arguments.
+
+    Voices are written one after the other inside each measure (``<backup>``
+    between them), so only one measure of xml exists at a time.
+
+    :param index: Part number (1 for the first part).
+    :type index: int
+    :return: Chunks of xml.
+    :rtype: Iterator[str]
+    :raises ValueError: If a clef is unknown.
+    """
+
+    if clef is not None and clef not in CLEFS:
+        raise ValueError(f"Unknown clef {clef!r}, use one of {sorted(CLEFS)}")
+    beats, beat_type = _meter(t_sig)
+    div = divisions(dur, t_sig)
+    span = div * 4 * beats // beat_type
+    voices = [(events(n, d, ve, e, voice=v, tpq=div), d) for v, (n, d, ve, e) in enumerate(_voices(note, dur, vel, exp))]
+    if key == 'auto':                                    # as Staff(key='auto'): relative major of the estimate
+        from .keys import find_key, staff_key
+        key = staff_key(find_key(np.concatenate([ev for ev, _ in voices])))
+    spell = SPELL[tonalita(key)]
+
+    streams = []
+    for v, (ev, d) in enumerate(voices):
+        streams.append(_measures(ev, ratios(d, int(ev['chord'][-1]) + 1), div, span, v + 1, spell))
+
+    sign, line = CLEFS[clef or 'G']
+    attributes = (f"<attributes><divisions>{div}</divisions>"
+                  f"<key><fifths>{FIFTHS.get(key, 0)}</fifths><mode>major</mode></key>"
+                  f"<time><beats>{beats}</beats><beat-type>{beat_type}</beat-type></time>"
+                  f"<clef><sign>{sign}</sign><line>{line}</line></clef></attributes>\n")
+
+    yield f'<part id="P{index}">\n'
+    for m, measure in enumerate(zip_longest(*streams, fillvalue=('', 0))):
+        yield f'<measure number="{m + 1}">\n' + (attributes if m == 0 else '')
+        for k, (xml, length) in enumerate(measure):
+            if k and back:
+                yield f'<backup><duration>{back}</duration></backup>\n'
+            yield xml
+            back = length
+        yield '</measure>\n'
+    yield '</part>\n'
+
+def _score_part(index: int, p: dict) -> str:
+    name = p.get('i_name') or f'P{index}'
+    out = f'<score-part id="P{index}"><part-name>{escape(name)}</part-name>'
+    if p.get('i_short'):
+        out += f"<part-abbreviation>{escape(p['i_short'])}</part-abbreviation>"
+    out += (f'<score-instrument id="P{index}-I1"><instrument-name>'
+            f"{escape(p.get('i_midi') or 'acoustic grand')}</instrument-name></score-instrument>")
+    return out + '</score-part>\n'
+
+def iter_musicxml(parts: list[dict], title: str = None, composer: str = None) -> Iterator[str]:
+
+    """
+    Stream a partwise MusicXML document.
+
+    All parts are checked before the first chunk is produced.
+
+    :param parts: One dict of ``Staff`` arguments per part (as ``Score.from_parts``).
+    :type parts: list[dict]
+    :param title: Work title.
+    :type title: str
+    :param composer: Composer.
+    :type composer: str
+    :return: Chunks of xml.
+    :rtype: Iterator[str]
+    :raises ValueError: If the input of any part is not valid.
+    """
+
+    err = []
+    for n, p in enumerate(parts):
+        err += check_staff(p.get('note', 60), p.get('dur'), p.get('vel'), p.get('exp'), f"staff {n}, ")
+    validate(err)
+
+    yield HEADER
+    if title is not None:
+        yield f'<work><work-title>{escape(title)}</work-title></work>\n'
+    if composer is not None:
+        yield f'<identification><creator type="composer">{escape(composer)}</creator></identification>\n'
+    yield '<part-list>\n' + ''.join(_score_part(n + 1, p) for n, p in enumerate(parts)) + '</part-list>\n'
+    for n, p in enumerate(parts):
+        yield from iter_part(n + 1, **p)
+    yield '</score-partwise>\n'
+
+def write_musicxml(filename: str, *parts: dict, title: str = None, composer: str = None, **staff) -> str:
+
+    """
+    Write a MusicXML file without running lilypond.
+
+    Takes the arguments of ``Staff`` (one part) or one dict of them per part
+    (as ``Score.from_parts``). The document is written while it is generated.
+
+    :param filename: Output path (``.musicxml`` is added if missing).
+    :type filename: str
+    :param parts: Dicts of ``Staff`` arguments, one per part.
+    :param title: Work title.
+    :type title: str
+    :param composer: Composer.
+    :type composer: str
+    :param staff: ``Staff`` arguments when ``parts`` is empty.
+    :return: The path of the written file.
+    :rtype: str
+
+    :Example:
+
+    >>> import os, tempfile
+    >>> path = write_musicxml(os.path.join(tempfile.mkdtemp(), 'scale'), note=[60, 62, 64, 65],
+    ...                       dur=[4, [4, [1, 1, 1]]], key='d', t_sig='3/4')
+    >>> os.path.basename(path)
+    'scale.musicxml'
+    """
+
+    if not parts:
+        parts = (staff,)
+    if not filename.endswith(('.musicxml', '.xml')):
+        filename += '.musicxml'
+    with open(filename, 'w', encoding='utf-8') as f:
+        for chunk in iter_musicxml(list(parts), title, composer):
+            f.write(chunk)
+    return filename
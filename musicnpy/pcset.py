@@ -0,0 +1,318 @@
+"""
+musicnpy.pcset
+"""
+
+from __future__ import annotations
+import numpy as np
+from collections.abc import Sequence
+from functools import cache
+
+# Forte's list, by cardinality, in Forte order (prime forms as pitch classes, T = 10).
+# Cardinalities 7-9 are the complements of 5-3 with the same ordinal, 10 of 2.
+_FORTE = {
+    3: ("012", "013", "014", "015", "016", "024", "025", "026", "027", "036", "037", "048"),
+    4: ("0123", "0124", "0134", "0125", "0126", "0127", "0145", "0156", "0167", "0235",
+        "0135", "0236", "0136", "0237", "0146", "0157", "0347", "0147", "0148", "0158",
+        "0246", "0247", "0257", "0248", "0268", "0358", "0258", "0369", "0137"),
+    5: ("01234", "01235", "01245", "01236", "01237", "01256", "01267", "02346", "01246", "01346",
+        "02347", "01356", "01248", "01257", "01268", "01347", "01348", "01457", "01367", "01568",
+        "01458", "01478", "02357", "01357", "02358", "02458", "01358", "02368", "01368", "01468",
+        "01369", "01469", "02468", "02469", "02479", "01247", "03458", "01258"),
+    6: ("012345", "012346", "012356", "012456", "012367", "012567", "012678", "023457", "012357", "013457",
+        "012457", "012467", "013467", "013458", "012458", "014568", "012478", "012578", "013478", "014589",
+        "023468", "012468", "023568", "013468", "013568", "013578", "013469", "013569", "013689", "013679",
+        "013589", "024579", "023579", "013579", "02468T", "012347", "012348", "012378", "023458", "012358",
+        "012368", "012369", "012568", "012569", "023469", "012469", "012479", "012579", "013479", "014679"),
+}
+
+BITS = 1 << np.arange(12)
+FULL = 0xFFF
+
+def _rot(m: np.ndarray, k: int) -> np.ndarray:
+    return ((m << k) | (m >> (12 - k))) & FULL if k % 12 else m
+
+def _inv(m: np.ndarray) -> np.ndarray:
+    out = np.zeros_like(m)
+    for pc in range(12):                         # pc --> -pc
+        out |= ((m >> pc) & 1) << ((12 - pc) % 12)
+    return out
+
+def to_mask(pcs: Sequence[int]) -> int:
+
+    """
+    12 bit mask of a collection of pitches (bit ``n`` = pitch class ``n``).
+
+    Float pitches are rounded to the nearest midinote, as ``_PSet.mask`` does.
+
+    :Example:
+
+    >>> to_mask([60, 64, 67])
+    145
+    >>> to_mask([59.9999, 64, 67])
+    145
+    """
+
+    return int(np.bitwise_or.reduce(BITS[np.rint(np.asarray(pcs, dtype=np.float64)).astype(np.int64) % 12])) if len(pcs) else 0
+
+def to_pcs(mask: int) -> list[int]:
+
+    """
+    Pitch classes of a mask, ascending.
+
+    :Example:
+
+    >>> to_pcs(145)
+    [0, 4, 7]
+    """
+
+    return [pc for pc in range(12) if mask >> pc & 1]
+
+def _build() -> None:
+    global COUNT, PRIME, START, ICV, CLASS, Z, NAMES
+
+    m = np.arange(4096, dtype=np.int64)
+    COUNT = np.zeros(4096, dtype=np.int8)
+    for pc in range(12):
+        COUNT += (m >> pc & 1).astype(np.int8)
+
+    # prime form (Rahn): smallest mask among the 12 transpositions of the set and of its inversion
+    inv = _inv(m)
+    rots = np.stack([_rot(m, -k % 12) for k in range(12)])            # T-k: rotate right by k
+    PRIME = np.minimum(rots.min(axis=0), np.stack([_rot(inv, k) for k in range(12)]).min(axis=0)).astype(np.int16)
+    START = np.argmin(rots, axis=0).astype(np.int8)                  # first pc of the normal form
+
+    ICV = np.stack([COUNT[m & _rot(m, k)] for k in range(1, 7)], axis=1).astype(np.int8)
+    ICV[:, 5] //= 2                                                   # tritones are counted twice
+
+    # Forte names: the class of each listed prime, complements for 7-10
+    names, reps = [], []
+    by_prime = np.full(4096, -1, dtype=np.int16)
+    def name(card, n, mask):
+        by_prime[PRIME[mask]] = len(names)
+        names.append(f"{card}-{n}")
+        reps.append(int(PRIME[mask]))
+    name(0, 1, 0)
+    name(1, 1, 1)
+    for n in range(1, 7):
+        name(2, n, 1 | 1 << n)
+    for card, primes in _FORTE.items():
+        for n, p in enumerate(primes, 1):
+            name(card, n, sum(1 << int(c, 16) for c in p.replace('T', 'A')))
+    for card in (7, 8, 9, 10):
+        for n in range(1, len(_FORTE.get(12 - card, range(6))) + 1):
+            name(card, n, FULL ^ reps[names.index(f"{12 - card}-{n}")])
+    name(11, 1, FULL ^ 1)
+    name(12, 1, FULL)
+    CLASS = by_prime[PRIME]
+
+    # Z-relation: different classes, same cardinality and interval vector
+    reps = np.array(reps)
+    key = (ICV[reps].astype(np.int64) @ (16 ** np.arange(6))) * 16 + COUNT[reps]
+    partner = np.full(len(names), -1, dtype=np.int16)
+    for c, k in enumerate(key.tolist()):
+        other = np.flatnonzero((key == k) & (np.arange(len(names)) != c))
+        if len(other):
+            partner[c] = reps[other[0]]
+            card, n = names[c].split('-')
+            names[c] = f"{card}-Z{n}"
+    Z = partner[CLASS]
+    NAMES = tuple(names)
+
+_build()
+
+def masks(batch) -> np.ndarray:
+
+    """
+    Masks of many chords at once.
+
+    :param batch: ``(n, k)`` array of pitches (negative or NaN entries are ignored)
+        or a sequence of chords of any size.
+    :return: ``(n,)`` masks.
+    :rtype: np.ndarray
+
+    :Example:
+
+    >>> masks([[60, 64, 67], [62, 65, 69, -1]]).tolist()
+    [145, 548]
+    >>> masks(np.array([[59.9999, 64, 67]])).tolist()
+    [145]
+    """
+
+    if not isinstance(batch, np.ndarray):
+        rows = list(batch)
+        width = max((len(r) for r in rows), default=0)
+        a = np.full((len(rows), width), -1.0)
+        for i, r in enumerate(rows):
+            a[i, :len(r)] = r
+        batch = a
+    a = np.asarray(batch)
+    ok = a >= 0 if a.dtype.kind in 'iu' else np.isfinite(a) & (a >= 0)
+    pcs = np.rint(np.where(ok, a, 0)).astype(np.int64) % 12       # nearest midinote, as to_mask
+    return np.bitwise_or.reduce(np.where(ok, BITS[pcs], 0), axis=1) if a.ndim == 2 else np.atleast_1d(to_mask(a[ok]))
+
+def classify(m: np.ndarray) -> dict[str, np.ndarray]:
+
+    """
+    Table lookups for an array of masks.
+
+    :param m: Masks (``masks`` output).
+    :type m: np.ndarray
+    :return: ``prime`` (masks), ``cls`` (index in ``NAMES``), ``icv`` (``(n, 6)``),
+        ``z`` (prime mask of the Z partner, -1 if none) and ``start`` (first pc of the normal form).
+    :rtype: dict[str, np.ndarray]
+
+    :Example:
+
+    >>> r = classify(masks([[0, 4, 7], [0, 3, 7], [0, 1, 4, 6]]))
+    >>> [NAMES[c] for c in r['cls']], r['prime'].tolist()
+    (['3-11', '3-11', '4-Z15'], [137, 137, 83])
+    """
+
+    m = np.asarray(m, dtype=np.int64)
+    return {'prime': PRIME[m], 'cls': CLASS[m], 'icv': ICV[m], 'z': Z[m], 'start': START[m]}
+
+def forte(m: np.ndarray) -> np.ndarray:
+
+    """
+    Forte names of an array of masks.
+
+    :Example:
+
+    >>> forte(masks([[0, 4, 7, 10], [0, 2, 4, 5, 7, 9, 11]])).tolist()
+    ['4-27', '7-35']
+    """
+
+    return np.asarray(NAMES, dtype=object)[CLASS[np.asarray(m, dtype=np.int64)]]
+
+def normal_form(mask: int) -> list[int]:
+
+    """
+    Normal form (Rahn): the most compact ordering of the pitch classes.
+
+    :Example:
+
+    >>> normal_form(to_mask([7, 0, 4]))
+    [0, 4, 7]
+    >>> normal_form(to_mask([2, 5, 7, 11]))
+    [11, 2, 5, 7]
+    """
+
+    start = int(START[mask])
+    return [(pc + start) % 12 for pc in to_pcs(int(_rot(np.int64(mask), -start % 12)))]
+
+class Index:
+
+    """
+    Reverse lookup of named interval models (``PMod.scales``, ``PMod.chords``) by mask.
+
+    Every model is entered on the 12 roots. For each of the 4096 masks the exact
+    matches and the smallest supersets are precomputed, so a query is a table
+    access. Results keep the catalog order, then the root order.
+
+    :param models: Name --> intervals from the root.
+    :type models: dict[str, Sequence[int]]
+
+    :Example:
+
+    >>> idx = Index({'maj': [0, 4, 7], 'min': [0, 3, 7]})
+    >>> idx(to_mask([64, 67, 71]))
+    [('min', 4)]
+    >>> idx(to_mask([60, 64]))
+    [('maj', 0), ('min', 9)]
+    """
+
+    def __init__(self, models: dict[str, Sequence[int]]) -> None:
+        self.names = tuple(models)
+        base = np.array([to_mask(v) for v in models.values()], dtype=np.int64)
+        entry = np.stack([_rot(base, r) for r in range(12)], axis=1).ravel()     # (model, root)
+        self.masks = entry
+
+        # esatti: entrate ordinate per maschera, intervallo per ogni maschera
+        order = np.argsort(entry, kind='stable')
+        self._exact = order
+        self._bounds = np.searchsorted(entry[order], np.arange(4097))
+
+        # sovrainsiemi di cardinalità minima (gli esatti compresi). Prima la cardinalità minima
+        # per ogni maschera (minimo sui sovrainsiemi, un bit alla volta), poi ogni maschera
+        # si confronta solo con le entrate di quella cardinalità
+        q = np.arange(4096, dtype=np.int64)
+        card = COUNT[entry]
+        best = np.full(4096, 99, dtype=np.int8)
+        np.minimum.at(best, entry, card)
+        for b in range(12):
+            low = q[(q >> b & 1) == 0]
+            best[low] = np.minimum(best[low], best[low | 1 << b])
+        q16, e16 = q.astype(np.uint16), entry.astype(np.uint16)                 # 12 bit: blocchi piccoli
+        rows, ids = [], []
+        for c in np.flatnonzero(np.bincount(card, minlength=13)).tolist():
+            sel = np.flatnonzero(card == c)
+            free = np.flatnonzero(best == c)
+            r, k = np.nonzero((q16[free, None] & ~e16[sel]) == 0)               # q contenuta nell'entrata
+            rows.append(free[r])
+            ids.append(sel[k])
+        rows, ids = np.concatenate(rows), np.concatenate(ids)
+        order = np.lexsort((ids, rows))
+        rows, ids = rows[order], ids[order]
+        self._best = ids
+        self._best_bounds = np.searchsorted(rows, np.arange(4097))
+        first = np.full(4096, -1, dtype=np.int64)
+        first[rows[::-1]] = ids[::-1]
+        self.first = first
+
+    def _pairs(self, ids: np.ndarray) -> list[tuple[str, int]]:
+        return [(self.names[i // 12], i % 12) for i in ids.tolist()]
+
+    def exact(self, mask: int) -> list[tuple[str, int]]:
+
+        """
+        Models containing exactly the pitch classes of ``mask``, as ``(name, root)``.
+        """
+
+        return self._pairs(self._exact[self._bounds[mask]:self._bounds[mask + 1]])
+
+    def superset(self, mask: int) -> list[tuple[str, int]]:
+
+        """
+        Smallest models containing the pitch classes of ``mask``, as ``(name, root)``.
+        """
+
+        return self._pairs(self._best[self._best_bounds[mask]:self._best_bounds[mask + 1]])
+
+    def __call__(self, mask: int, superset: bool = True) -> list[tuple[str, int]]:
+        return self.superset(mask) if superset else self.exact(mask)
+
+    def tag(self, m: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+
+        """
+        First match (exact, else smallest superset) of an array of masks.
+
+        :param m: Masks.
+        :type m: np.ndarray
+        :return: Model names (None where nothing matches) and roots (-1).
+        :rtype: tuple[np.ndarray, np.ndarray]
+
+        :Example:
+
+        >>> names, roots = Index({'maj': [0, 4, 7]}).tag(masks([[60, 64, 67], [62, 66], [0, 1]]))
+        >>> names.tolist(), roots.tolist()
+        (['maj', 'maj', None], [0, 2, -1])
+        """
+
+        ids = self.first[np.asarray(m, dtype=np.int64)]
+        names = np.asarray(self.names + (None,), dtype=object)
+        return names[np.where(ids >= 0, ids // 12, -1)], np.where(ids >= 0, ids % 12, -1)
+
+@cache
+def catalog(kind: str) -> Index:
+
+    """
+    ``Index`` of ``PMod.scales`` or ``PMod.chords``, built on first use.
+
+    :param kind: ``'scales'`` or ``'chords'``.
+    :type kind: str
+    :return: The index.
+    :rtype: Index
+    """
+
+    from .data import PMod
+    return Index(getattr(PMod, kind))
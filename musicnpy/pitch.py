@@ -4,13 +4,40 @@ from .data import PMod
 
 import numpy as np
 import numbers, operator
-from typing import Self, TypeAlias, Callable, Any, Literal
+from typing import Self, TypeAlias, Callable, Any, Literal, TYPE_CHECKING
 from collections.abc import Sequence, Iterator
+from functools import lru_cache
+from itertools import combinations_with_replacement
+
+if TYPE_CHECKING:                       # solo per le annotazioni: import lazy a runtime
+    from .tuning import Tuning
 
 Numeric = numbers.Real
 ArrayLike: TypeAlias = '_Set | Sequence[Numeric]'
 Index = int | slice | Sequence[int] | np.ndarray
 
+def to_freq(notes, a4: float = 440.0, tuning: Tuning | None = None) -> np.ndarray:
+
+    """
+    Frequencies of midinotes (any shape), in 12-TET or in a ``musicnpy.tuning.Tuning``.
+
+    :param notes: Midinotes.
+    :param a4: Frequency of midinote 69. Defaults to 440.
+    :type a4: float
+    :param tuning: Tuning system. Defaults to None (12-TET).
+    :type tuning: Tuning | None
+    :rtype: np.ndarray
+
+    :Example:
+
+    >>> to_freq([69, 81, 60]).round(2).tolist()
+    [440.0, 880.0, 261.63]
+    """
+
+    if tuning is not None:                      # tabella di cents del sistema (musicnpy.tuning)
+        return tuning.to_freq(notes, a4)
+    return a4 * np.exp2((np.asarray(notes, dtype=np.float64) - 69) / 12)
+
 class _PSet(_Set):
     
     # TODO
@@ -30,23 +57,660 @@ class _PSet(_Set):
         else:
             return self.deltas
     
-    def to_freq(self, a4: float = 440.0) -> list[float]:
-        return (a4 * (2 ** ((self.vals - 69) / 12))).tolist()
+    def to_freq(self, a4: float = 440.0, tuning: Tuning | None = None) -> list[float]:
+        return to_freq(self.vals, a4, tuning).tolist()
     
     @classmethod
-    def from_freq(cls, freqs: list[float], a4: float = 440.0) -> _PSet:
+    def from_freq(cls, freqs: list[float], a4: float = 440.0, tuning: Tuning | None = None) -> _PSet:
+        if tuning is not None:                  # grado piu' vicino del sistema
+            return cls(tuning.from_freq(freqs, a4))
         return cls(69 + 12 * np.log2(np.array(freqs) / a4))
 
+    # insiemi di classi di altezze: tabelle in musicnpy.pcset
+
+    @property
+    def mask(self) -> int:
+
+        """
+        12 bit mask of the pitch classes (bit ``n`` = pitch class ``n``).
+
+        :Example:
+
+        >>> _PSet([60, 64, 67, 72]).mask
+        145
+        """
+
+        from .pcset import to_mask
+        return to_mask(np.rint(self.vals).astype(np.int64))
+
+    @property
+    def prime_form(self) -> list[int]:
+
+        """
+        Prime form (Rahn) of the pitch-class set.
+
+        :Example:
+
+        >>> _PSet([64, 67, 72]).prime_form
+        [0, 3, 7]
+        """
+
+        from .pcset import PRIME, to_pcs
+        return to_pcs(int(PRIME[self.mask]))
+
+    @property
+    def normal_form(self) -> list[int]:
+
+        """
+        Normal form (Rahn) of the pitch-class set.
+
+        :Example:
+
+        >>> _PSet([64, 67, 72]).normal_form
+        [0, 4, 7]
+        """
+
+        from .pcset import normal_form
+        return normal_form(self.mask)
+
+    @property
+    def set_class(self) -> str:
+
+        """
+        Forte name of the set class.
+
+        :Example:
+
+        >>> _PSet([60, 61, 64, 66]).set_class
+        '4-Z15'
+        """
+
+        from .pcset import NAMES, CLASS
+        return NAMES[CLASS[self.mask]]
+
+    @property
+    def icv(self) -> list[int]:
+
+        """
+        Interval-class vector.
+
+        :Example:
+
+        >>> _PSet([60, 62, 64, 65, 67, 69, 71]).icv
+        [2, 5, 4, 3, 6, 1]
+        """
+
+        from .pcset import ICV
+        return ICV[self.mask].tolist()
+
+    @property
+    def z_relation(self) -> str | None:
+
+        """
+        Forte name of the Z-related set class, None if there is none.
+
+        :Example:
+
+        >>> _PSet([60, 61, 64, 66]).z_relation
+        '4-Z29'
+        """
+
+        from .pcset import NAMES, CLASS, Z
+        z = int(Z[self.mask])
+        return NAMES[CLASS[z]] if z >= 0 else None
+
+def _identify(kind: str, pset: ArrayLike | int, superset: bool) -> list[tuple[str, int]]:
+    from .pcset import catalog
+    if isinstance(pset, numbers.Integral):
+        mask = int(pset)
+    else:
+        mask = (pset if isinstance(pset, _PSet) else _PSet(pset)).mask
+    return catalog(kind)(mask, superset)
+
 class Scale(_PSet):
 
+    """
+    A scale: ``intervals`` above ``root``, repeated in every octave.
+
+    Degree 0 is the lowest pitch class of the scale above the root, degree ``n``
+    (the size of the scale) the same an octave higher, negative degrees go down.
+    Degrees and midinotes are converted through a table of every degree in the
+    midi range, so whole melodies are mapped with one gather.
+    """
+
     def __init__(self, intervals: ArrayLike, root: Numeric = 0, scale_harmo: ArrayLike = None) -> None:
         super().__init__(intervals, offset=root)
         self.chords = scale_harmo
+        self._cache = None
+
+    @classmethod
+    def new(cls, model: PMod | str, root: int = 60) -> Scale:
+
+        """
+        Scale from a model of ``PMod`` or the name of a scale of ``PMod.scales``.
+
+        :Example:
+
+        >>> Scale.new(PMod.minNat, 57).values
+        [57, 59, 60, 62, 64, 65, 67]
+        >>> Scale.new('dorian', 62).chords
+        ['min', 'min', 'maj', 'maj', 'min', 'dim', 'maj']
+        """
+
+        if isinstance(model, str):
+            model = PMod.model(model)
+        return cls(model['intervals'], root, model.get('scale_harmo'))
+
+    def _tables(self) -> tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+        key = (self.vals.tobytes(), self.offset)
+        if self._cache is None or self._cache[0] != key:
+            steps = np.unique(np.mod(self.vals - self.offset, 12))
+            n = len(steps)
+            first = int(np.floor((-12 - self.offset) / 12)) * n          # un'ottava sotto midinote 0
+            d = np.arange(first, first + 13 * n)
+            q, r = np.divmod(d, n)
+            table = self.offset + 12 * q + steps[r]
+            midi = np.arange(128)
+            lookup = np.searchsorted(table, midi, 'right') - 1 + first  # grado <= midinote
+            self._cache = (key, (steps, table, lookup, first))
+        return self._cache[1]
+
+    @property
+    def size(self) -> int:
+
+        """
+        Degrees per octave.
+        """
+
+        return len(self._tables()[0])
+
+    def degree(self, degrees: ArrayLike | np.ndarray | int) -> Any:
+
+        """
+        Midinotes of scale degrees.
+
+        :param degrees: Degree numbers (any shape), 0 = root.
+        :return: Midinotes, same kind as ``degrees``.
+
+        :Example:
+
+        >>> s = Scale([0, 2, 4, 5, 7, 9, 11], 60)
+        >>> s.degree([0, 2, 4, 7, -1, -7])
+        [60, 64, 67, 72, 59, 48]
+        """
+
+        steps, table, _, first = self._tables()
+        d = np.asarray(degrees, dtype=np.int64)
+        i = d - first
+        if d.size and i.min() >= 0 and i.max() < len(table):
+            out = table[i]
+        else:
+            q, r = np.divmod(d, len(steps))
+            out = self.offset + 12 * q + steps[r]
+        return out if isinstance(degrees, np.ndarray) else out.tolist()
+
+    def to_degree(self, pitches: ArrayLike | np.ndarray | Numeric) -> tuple[np.ndarray, np.ndarray]:
+
+        """
+        Degree of midinotes and their chromatic distance from it.
+
+        :param pitches: Midinotes (any shape); pitches outside the scale take the degree below.
+        :return: Degrees and alterations (``pitch = degree(d) + alteration``).
+        :rtype: tuple[np.ndarray, np.ndarray]
+
+        :Example:
+
+        >>> d, alt = Scale([0, 2, 4, 5, 7, 9, 11], 60).to_degree([60, 67, 61, 59, 73])
+        >>> d.tolist(), alt.tolist()
+        ([0, 4, 0, -1, 7], [0, 0, 1, 0, 1])
+        """
+
+        steps, table, lookup, first = self._tables()
+        p = pitches.vals if isinstance(pitches, _Set) else np.asarray(pitches)
+        if p.dtype.kind in 'iu' and p.size and p.min() >= 0 and p.max() < 128:
+            d = lookup[p]                                                   # una sola gather
+        else:
+            x = np.asarray(p, dtype=np.float64) - self.offset
+            q = np.floor(x / 12)
+            i = np.searchsorted(steps, x - 12 * q, 'right') - 1              # -1: sotto il primo grado
+            d = (q * len(steps) + i).astype(np.int64)
+        return d, p - self.degree(d)
+
+    def transpose(self, pitches: ArrayLike | np.ndarray, steps: int | np.ndarray) -> Any:
+
+        """
+        Diatonic transposition: every pitch moves ``steps`` degrees, keeping its alteration.
+
+        :param pitches: Midinotes (any shape) or ``_Set``.
+        :param steps: Degrees (or one per pitch).
+        :return: Same kind as ``pitches`` (``_PSet`` for a ``_Set``).
+
+        :Example:
+
+        >>> s = Scale([0, 2, 4, 5, 7, 9, 11], 60)
+        >>> s.transpose([60, 64, 67, 66, 72], 2)
+        [64, 67, 71, 70, 76]
+        >>> s.transpose(np.array([60, 62]), -8).tolist()
+        [47, 48]
+        """
+
+        d, alt = self.to_degree(pitches)
+        out = self.degree(d + np.asarray(steps)) + alt
+        if isinstance(pitches, _Set):
+            return _PSet(out)
+        return out if isinstance(pitches, np.ndarray) else out.tolist()
+
+    def mode(self, k: int) -> Scale:
+
+        """
+        Mode starting on degree ``k`` (root on that degree, harmony rotated).
+
+        :Example:
+
+        >>> m = Scale.new(PMod.maj, 60).mode(1)
+        >>> m.values, m.chords[:3]
+        ([62, 64, 65, 67, 69, 71, 72], ['min', 'min', 'maj'])
+        """
+
+        steps = self._tables()[0]
+        n = len(steps)
+        root, k = k, k % n
+        intervals = np.concatenate((steps[k:], steps[:k] + 12)) - steps[k]
+        harmo = None if self.chords is None else list(self.chords[k:]) + list(self.chords[:k])
+        return type(self)(intervals.tolist(), self.degree(root), harmo)
+
+    def chord(self, degrees: int | ArrayLike | np.ndarray, size: int = 3, step: int = 2) -> Chord | np.ndarray:
+
+        """
+        Chords built by thirds (``step`` degrees) on scale degrees.
+
+        :param degrees: One degree, or degrees (any shape).
+        :param size: Notes per chord. Defaults to 3.
+        :type size: int
+        :param step: Degrees between chord notes: 2 thirds, 3 fourths. Defaults to 2.
+        :type step: int
+        :return: A ``Chord`` for one degree, otherwise an array with one more axis of length ``size``.
+        :rtype: Chord | np.ndarray
+
+        :Example:
+
+        >>> s = Scale.new(PMod.maj, 60)
+        >>> s.chord(4, 4).values
+        [67, 71, 74, 77]
+        >>> s.chord(np.array([0, 1, 4])).tolist()
+        [[60, 64, 67], [62, 65, 69], [67, 71, 74]]
+        >>> s.quality([0, 1, 6])
+        ['maj', 'min', 'dim']
+        """
+
+        d = np.asarray(degrees, dtype=np.int64)
+        out = self.degree(d[..., None] + step * np.arange(size))
+        if d.ndim == 0:
+            return Chord(out)
+        return out
+
+    def quality(self, degrees: int | ArrayLike | np.ndarray) -> Any:
+
+        """
+        ``scale_harmo`` label of scale degrees (None without ``scale_harmo``).
+        """
+
+        if self.chords is None:
+            return None
+        d = np.asarray(degrees, dtype=np.int64) % len(self.chords)
+        labels = np.asarray(self.chords, dtype=object)[d]
+        return labels if d.ndim == 0 else labels.tolist()
 
     @classmethod
-    def new(cls, model: PMod, root: int = 60) -> Scale:
-        return cls(model['intervals'], model['scale_harmo'], root=root)
+    def identify(cls, pset: ArrayLike | int, superset: bool = True) -> list[tuple[str, int]]:
+
+        """
+        Scales of ``PMod.scales`` containing a set of pitches.
+
+        :param pset: ``_PSet``, midinotes or a 12 bit mask.
+        :type pset: ArrayLike | int
+        :param superset: If False only scales with exactly these pitch classes, otherwise
+            the smallest scales containing them (the exact ones when there are any). Defaults to True.
+        :type superset: bool
+        :return: ``(name, root pitch class)`` pairs, catalog order.
+        :rtype: list[tuple[str, int]]
+
+        :Example:
+
+        >>> Scale.identify([62, 64, 65, 67, 69, 71, 72])
+        [('major', 0), ('dorian', 2), ('phrygian', 4), ('lydian', 5), ('mixolydian', 7), ('minor', 9), ('locrian', 11)]
+        >>> Scale.identify([60, 63, 66, 69], superset=False)
+        []
+        """
+
+        return _identify('scales', pset, superset)
+
+    def quantize(self, values: ArrayLike | np.ndarray | Numeric, mode: Literal['nearest', 'up', 'down'] = 'nearest', *,
+                 offset: Numeric = 0, ties: Literal['down', 'up'] = 'down', octave: Numeric = 12) -> Any:
+
+        """
+        Snap values onto the scale, in every octave.
+
+        The pitch classes of the scale are repeated one octave below and above in
+        a sorted table; each value is reduced to its octave and placed in the table
+        with ``np.searchsorted``, so the cost does not depend on the scale size.
+
+        :param values: ``_Set``, list of ``_Set`` (e.g. ``interpolation``), array of any shape, sequence or number.
+        :param mode: ``'nearest'``, ``'up'`` (smallest scale pitch >= value) or ``'down'``. Defaults to 'nearest'.
+        :type mode: Literal['nearest', 'up', 'down']
+        :param offset: Transposition of the scale. Defaults to 0.
+        :type offset: Numeric
+        :param ties: Direction for values halfway between two degrees. Defaults to 'down'.
+        :type ties: Literal['down', 'up']
+        :param octave: Period of the scale. Defaults to 12.
+        :type octave: Numeric
+        :return: Same kind as ``values``: ``_PSet`` for a ``_Set``, list for lists, array for arrays.
+        :raises ValueError: If ``mode`` or ``ties`` is unknown.
+
+        :Example:
+
+        >>> s = Scale([0, 2, 4, 5, 7, 9, 11], 60)
+        >>> s.quantize([61, 66.4, 70, 47.2, 73.5])
+        [60.0, 67.0, 69.0, 47.0, 74.0]
+        >>> s.quantize(np.array([[61, 61], [66, 66]]), 'up', ties='up').tolist()
+        [[62.0, 62.0], [67.0, 67.0]]
+        >>> s.quantize(_Set([61, 63]), 'down', offset=1).values
+        [61.0, 63.0]
+        """
+
+        if mode not in ('nearest', 'up', 'down') or ties not in ('down', 'up'):
+            raise ValueError(f"Unknown mode or ties: {mode!r}, {ties!r}")
+        if isinstance(values, _Set):
+            return _PSet(self.quantize(values.vals, mode, offset=offset, ties=ties, octave=octave))
+        if isinstance(values, list) and values and isinstance(values[0], _Set):
+            return [self.quantize(v, mode, offset=offset, ties=ties, octave=octave) for v in values]
+
+        table = np.unique(np.mod(self.vals + offset, octave).astype(np.float64))
+        table = np.concatenate((table - octave, table, table + octave))
+        x = np.asarray(values, dtype=np.float64)
+        base = np.floor(x / octave)
+        base *= octave
+        r = x - base
+        if mode == 'up':
+            out = table[np.searchsorted(table, r, 'left')]
+        elif mode == 'down':
+            out = table[np.searchsorted(table, r, 'right') - 1]
+        else:                                                   # nearest: boundaries are the midpoints
+            mid = (table[:-1] + table[1:]) / 2
+            out = table[np.searchsorted(mid, r, 'left' if ties == 'down' else 'right')]
+        out += base
+
+        if isinstance(values, np.ndarray):
+            return out
+        return out.tolist()
+
+@lru_cache(maxsize=1024)
+def _voicings(pcs: tuple[int, ...], low: int, high: int, size: int, max_gap: int, max_span: int | None, bass: int | None) -> np.ndarray:
+    out = []
+    for extra in combinations_with_replacement(pcs, size - len(pcs)):      # raddoppi
+        slots = pcs + extra
+        cands = [np.arange(low + (pc - low) % 12, high + 1, 12) for pc in slots]
+        if any(len(c) == 0 for c in cands):
+            continue
+        grid = np.stack(np.meshgrid(*cands, indexing='ij'), axis=-1).reshape(-1, size)
+        out.append(np.sort(grid, axis=1))
+    if not out:
+        return np.zeros((0, size), dtype=np.int16)
+    v = np.unique(np.concatenate(out), axis=0)
+    gaps = np.diff(v, axis=1)
+    ok = (gaps > 0).all(axis=1) & (gaps <= max_gap).all(axis=1)
+    if max_span is not None:
+        ok &= v[:, -1] - v[:, 0] <= max_span
+    if bass is not None:
+        ok &= v[:, 0] % 12 == bass
+    v = v[ok].astype(np.int16)
+    v.flags.writeable = False
+    return v
 
 class Chord(_PSet):
-    
-    pass
\ No newline at end of file
+
+    """
+    A set of pitches heard together; ``values`` are midinotes, the first one is the root.
+    """
+
+    @classmethod
+    def new(cls, quality: str, root: Numeric = 60) -> Chord:
+
+        """
+        Chord of ``PMod.chords``.
+
+        :Example:
+
+        >>> Chord.new('min7', 62).values
+        [62, 65, 69, 72]
+        """
+
+        return cls(PMod.chords[quality], root)
+
+    def voicings(self, low: int = 48, high: int = 79, size: int | None = None, *, max_gap: int = 12,
+                 max_span: int | None = None, bass: bool | int = False) -> np.ndarray:
+
+        """
+        Every voicing of the chord's pitch classes within a range.
+
+        All octave placements (and, when ``size`` exceeds the number of pitch
+        classes, every choice of doubled classes) are generated at once as a
+        candidate matrix and filtered by spacing. Results are cached.
+
+        :param low: Lowest midinote. Defaults to 48.
+        :type low: int
+        :param high: Highest midinote. Defaults to 79.
+        :type high: int
+        :param size: Number of voices, at least the number of pitch classes. Defaults to that number.
+        :type size: int | None
+        :param max_gap: Largest interval between adjacent voices. Defaults to 12.
+        :type max_gap: int
+        :param max_span: Largest interval between lowest and highest voice. Defaults to None.
+        :type max_span: int | None
+        :param bass: True for the root in the bass, a pitch class for another bass. Defaults to False.
+        :type bass: bool | int
+        :return: ``(n, size)`` midinotes, each row ascending, rows in lexicographic order.
+        :rtype: np.ndarray
+        :raises ValueError: If ``size`` is smaller than the number of pitch classes.
+
+        :Example:
+
+        >>> Chord([60, 64, 67]).voicings(55, 67, bass=True).tolist()
+        [[60, 64, 67]]
+        >>> len(Chord([60, 64, 67]).voicings(48, 72, 4, max_span=12))
+        4
+        """
+
+        pcs = tuple(sorted(set(np.rint(self.vals).astype(int) % 12)))
+        size = len(pcs) if size is None else size
+        if size < len(pcs):
+            raise ValueError(f"{size} voices for {len(pcs)} pitch classes")
+        if bass is True:
+            bass = int(round(self.vals[0])) % 12
+        elif bass is False:
+            bass = None
+        return _voicings(pcs, low, high, size, max_gap, max_span, bass)
+
+    @classmethod
+    def identify(cls, pset: ArrayLike | int, superset: bool = True) -> list[tuple[str, int]]:
+
+        """
+        Chord qualities of ``PMod.chords`` matching a set of pitches.
+
+        :param pset: ``_PSet``, midinotes or a 12 bit mask.
+        :type pset: ArrayLike | int
+        :param superset: As in ``Scale.identify``. Defaults to True.
+        :type superset: bool
+        :return: ``(quality, root pitch class)`` pairs, catalog order.
+        :rtype: list[tuple[str, int]]
+
+        :Example:
+
+        >>> Chord.identify([64, 67, 71, 74])
+        [('min7', 4), ('6', 7)]
+        >>> Chord.identify([60, 66, 70])
+        [('min7b5', 0), ('aug7', 2), ('7b5', 0), ('7b5', 6), ('min6', 3)]
+        """
+
+        return _identify('chords', pset, superset)
+
+def voice_lead(chords: Sequence[ArrayLike], low: int = 48, high: int = 79, size: int = 4, *, max_gap: int = 12,
+               max_span: int | None = None, bass: bool = False, start: ArrayLike | None = None) -> np.ndarray:
+
+    """
+    Voicings of a progression with the smallest total voice-leading distance.
+
+    Each chord is expanded with ``Chord.voicings``; the cost of a step is the sum of
+    the absolute motions of the voices (voices sorted, so they do not cross), a
+    whole candidate-to-candidate matrix at a time. Dynamic programming keeps, for
+    every voicing of the current chord, the cheapest path reaching it.
+
+    :param chords: ``Chord``, ``_PSet`` or midinotes, in order.
+    :type chords: Sequence[ArrayLike]
+    :param low: Lowest midinote. Defaults to 48.
+    :type low: int
+    :param high: Highest midinote. Defaults to 79.
+    :type high: int
+    :param size: Number of voices. Defaults to 4.
+    :type size: int
+    :param max_gap: As in ``Chord.voicings``. Defaults to 12.
+    :type max_gap: int
+    :param max_span: As in ``Chord.voicings``. Defaults to None.
+    :type max_span: int | None
+    :param bass: Keep the first pitch of every chord in the bass. Defaults to False.
+    :type bass: bool
+    :param start: Voicing to start from (the first chord is then led from it). Defaults to None.
+    :type start: ArrayLike | None
+    :return: ``(len(chords), size)`` midinotes.
+    :rtype: np.ndarray
+    :raises ValueError: If a chord has more pitch classes than ``size`` or no voicing with these constraints.
+
+    :Example:
+
+    >>> voice_lead([[60, 64, 67], [65, 69, 72], [67, 71, 74, 77], [60, 64, 67]], 48, 72, 4, bass=True).tolist()
+    [[48, 60, 64, 67], [53, 60, 65, 69], [55, 62, 65, 71], [60, 64, 67, 72]]
+    """
+
+    candidates = []
+    for c in chords:
+        c = c if isinstance(c, Chord) else Chord(c.vals if isinstance(c, _Set) else c)
+        v = c.voicings(low, high, size, max_gap=max_gap, max_span=max_span, bass=bass)
+        if not len(v):
+            raise ValueError(f"No voicing of {c.values} in {low}-{high}")
+        candidates.append(v)
+    if not candidates:
+        return np.zeros((0, size), dtype=np.int16)
+
+    def distance(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        d = np.zeros((len(a), len(b)), dtype=np.int32)
+        for k in range(a.shape[1]):
+            d += np.abs(a[:, k, None].astype(np.int32) - b[None, :, k])
+        return d
+
+    cost = np.zeros(len(candidates[0]), dtype=np.int64)
+    if start is not None:
+        cost += distance(np.asarray(start, dtype=np.int16)[None, :], candidates[0])[0]
+    back = []
+    for a, b in zip(candidates, candidates[1:]):
+        total = cost[:, None] + distance(a, b)
+        best = total.argmin(axis=0)
+        back.append(best)
+        cost = total[best, np.arange(len(b))]
+
+    path = [int(cost.argmin())]
+    for best in reversed(back):
+        path.append(int(best[path[-1]]))
+    path.reverse()
+    return np.array([c[i] for c, i in zip(candidates, path)], dtype=np.int16)
+
+def _batch(chords: np.ndarray | Sequence[ArrayLike]) -> np.ndarray:
+    if isinstance(chords, np.ndarray):
+        a = chords.astype(np.float64)
+    else:
+        rows = [c.vals if isinstance(c, _Set) else c for c in chords]
+        if len({len(r) for r in rows}) > 1:
+            raise ValueError("Chords must have the same cardinality")
+        a = np.array(rows, dtype=np.float64)
+    if a.ndim != 2:
+        raise ValueError("Expected a batch of chords, shape (n, k)")
+    return a
+
+def voice_leading_matrix(A: np.ndarray | Sequence[ArrayLike], B: np.ndarray | Sequence[ArrayLike] | None = None, *,
+                         norm: Literal[1, 2] | float = 1, octave: bool = False, tile: int = 256,
+                         dtype: Any = np.float32, out: np.ndarray | None = None) -> np.ndarray:
+
+    """
+    Smallest voice-leading distance between every chord of ``A`` and every chord of ``B``.
+
+    In pitch space (``octave=False``) the optimal assignment matches the sorted
+    notes. With octave equivalence the notes are reduced to pitch classes and
+    sorted; the optimal assignment is then one of the ``2k + 1`` windows of
+    ``k`` consecutive notes of ``B`` repeated an octave below and above (its
+    rotations), so no permutation search is needed. The matrix is computed in
+    ``tile`` x ``tile`` blocks, one voice at a time in preallocated buffers, so
+    temporary memory does not depend on the batch sizes; ``out`` can be a
+    ``np.memmap`` for very large results.
+
+    :param A: ``(n, k)`` array or sequence of ``_PSet``/midinotes, all with ``k`` notes.
+    :param B: Same for ``(m, k)``. Defaults to ``A``.
+    :param norm: 1 (taxicab), 2 (euclidean) or ``np.inf`` (largest motion). Defaults to 1.
+    :type norm: Literal[1, 2] | float
+    :param octave: Octave equivalence. Defaults to False.
+    :type octave: bool
+    :param tile: Chords per block side. Defaults to 256.
+    :type tile: int
+    :param dtype: Type of the computation and of the result. Defaults to ``np.float32``.
+    :param out: ``(n, m)`` array to fill. Defaults to None.
+    :type out: np.ndarray | None
+    :return: ``(n, m)`` distances.
+    :rtype: np.ndarray
+    :raises ValueError: If the chords do not all have the same number of notes or ``norm`` is unknown.
+
+    :Example:
+
+    >>> voice_leading_matrix([[60, 64, 67]], [[60, 65, 69], [59, 62, 67]]).tolist()
+    [[3.0, 3.0]]
+    >>> voice_leading_matrix([[60, 64, 67]], [[57, 60, 64], [71, 74, 79]], octave=True).tolist()
+    [[2.0, 3.0]]
+    """
+
+    if norm not in (1, 2, np.inf):
+        raise ValueError(f"Unknown norm: {norm!r}")
+    a = _batch(A)
+    b = a if B is None else _batch(B)
+    if a.shape[1] != b.shape[1]:
+        raise ValueError(f"{a.shape[1]} and {b.shape[1]} notes")
+    k = a.shape[1]
+
+    if octave:
+        a, b = np.sort(a % 12, axis=1), np.sort(b % 12, axis=1)
+        ext = np.concatenate((b - 12, b, b + 12), axis=1)
+        b = np.stack([ext[:, s:s + k] for s in range(2 * k + 1)], axis=1)      # (m, windows, k)
+    else:
+        a, b = np.sort(a, axis=1), np.sort(b, axis=1)[:, None, :]
+    a, b = a.astype(dtype), b.astype(dtype)
+
+    if out is None:
+        out = np.empty((len(a), len(b)), dtype=dtype)
+    for i in range(0, len(a), tile):
+        ta = a[i:i + tile]
+        for j in range(0, len(b), tile):
+            tb = b[j:j + tile]
+            acc = np.empty((len(ta), len(tb)), dtype=dtype)    # 2D buffers, one voice at a time
+            tmp = np.empty_like(acc)
+            best = None
+            for w in range(b.shape[1]):
+                acc[:] = 0
+                for v in range(k):
+                    np.subtract(ta[:, v, None], tb[None, :, w, v], out=tmp)
+                    if norm == 2:
+                        np.multiply(tmp, tmp, out=tmp)
+                    else:
+                        np.abs(tmp, out=tmp)
+                    if norm == np.inf:
+                        np.maximum(acc, tmp, out=acc)
+                    else:
+                        acc += tmp
+                best = acc.copy() if best is None else np.minimum(best, acc, out=best)
+            out[i:i + tile, j:j + tile] = np.sqrt(best) if norm == 2 else best
+    return out
@@ -0,0 +1,231 @@
+"""
+musicnpy.player
+"""
+
+from __future__ import annotations
+import asyncio
+import time
+from abc import ABC, abstractmethod
+import numpy as np
+from .core import _Set
+from .pitch import Numeric
+from .midi import table, _channel, CHANNELS, TEMPO
+from .topyly import TPQ
+
+class Sink(ABC):
+
+    """
+    Destination of the MIDI messages sent by a ``Player``.
+
+    Subclasses must implement ``send``; ``open`` and ``close`` are optional.
+    """
+
+    def open(self) -> None:
+        pass
+
+    @abstractmethod
+    def send(self, messages: list[bytes]) -> None:
+
+        """
+        Send a batch of raw MIDI messages.
+        """
+
+    def close(self) -> None:
+        pass
+
+class MemorySink(Sink):
+
+    """
+    Loopback sink that keeps every message with the time it was received.
+
+    :Example:
+
+    >>> sink = MemorySink()
+    >>> stats = Player([60, 62], sink, tempo=600).run()
+    >>> len(sink.messages)
+    4
+    """
+
+    def __init__(self) -> None:
+        self.messages: list[tuple[float, bytes]] = []
+
+    def send(self, messages: list[bytes]) -> None:
+        now = time.perf_counter()
+        self.messages.extend((now, m) for m in messages)
+
+class RtMidiSink(Sink):
+
+    """
+    Send messages to a hardware or virtual MIDI port through ``python-rtmidi``.
+
+    :param port: Output port number, or None to open a virtual port.
+    :type port: int
+    :param name: Name of the virtual port. Defaults to ``'musicnpy'``.
+    :type name: str
+    :raises ImportError: If ``python-rtmidi`` is not installed.
+    """
+
+    def __init__(self, port: int = None, name: str = 'musicnpy') -> None:
+        try:
+            import rtmidi
+        except ImportError:
+            raise ImportError("RtMidiSink requires python-rtmidi (pip install python-rtmidi)")
+        self.out = rtmidi.MidiOut()
+        self.port = port
+        self.name = name
+
+    def open(self) -> None:
+        if self.port is None:
+            self.out.open_virtual_port(self.name)
+        else:
+            self.out.open_port(self.port)
+
+    def send(self, messages: list[bytes]) -> None:
+        for m in messages:
+            self.out.send_message(m)
+
+    def close(self) -> None:
+        self.out.close_port()
+
+class Player:
+
+    """
+    Real-time MIDI player built on ``asyncio``.
+
+    Every voice is scheduled by its own task against a common start time, so
+    timing errors never accumulate (each wait targets an absolute time, not a
+    delta). Messages falling within ``lookahead`` seconds of each other are sent
+    as one batch. Lateness of every message is recorded in ``stats``.
+
+    :param source: A ``_Voice``, ``Staff`` or ``Score``, an event table, a ``_Set``
+        of midinotes or midinotes as accepted by ``Staff`` (tuple for more voices).
+    :param sink: Where messages are sent. Defaults to a ``MemorySink``.
+    :type sink: Sink
+    :param dur: Durations when ``source`` holds midinotes.
+    :param vel: Velocities when ``source`` holds midinotes.
+    :param tempo: Quarter notes per minute. Defaults to 60.
+    :type tempo: Numeric
+    :param lookahead: Batching window in seconds. Defaults to 0.005.
+    :type lookahead: float
+
+    :Example:
+
+    >>> p = Player(([60, 64, 67], [48]), tempo=240)
+    >>> p.run()['count']
+    8
+    """
+
+    def __init__(self, source, sink: Sink = None, dur=None, vel=None, *, tempo: Numeric = TEMPO, lookahead: float = 0.005) -> None:
+        if isinstance(source, _Set):
+            source = source.values
+        self.events = table(source, dur, vel)
+        self.sink = MemorySink() if sink is None else sink
+        self.tempo = tempo
+        self.lookahead = lookahead
+        self.late: list[float] = []
+        self._tasks: list[asyncio.Task] = []
+
+    def _voices(self) -> list[tuple[np.ndarray, np.ndarray]]:
+
+        """
+        Split the event table into per-voice message lists (times in seconds, sorted).
+        """
+
+        ev = self.events
+        ids = ev['staff'].astype(np.int64) << 16 | ev['voice']
+        keys, inv = np.unique(ids, return_inverse=True)
+        ch = CHANNELS[inv % len(CHANNELS)]
+        out = []
+        for k in range(len(keys)):
+            sel = inv == k
+            tick, status, data1, data2 = _channel(ev[sel], ch[sel])
+            order = np.lexsort((status >> 4 == 0x9, tick))
+            secs = tick[order] * (60 / (self.tempo * TPQ))
+            msgs = np.stack((status[order], data1[order], data2[order]), axis=1)
+            out.append((secs, msgs))
+        return out
+
+    async def _voice(self, secs: np.ndarray, msgs: np.ndarray, t0: float) -> None:
+        loop = asyncio.get_running_loop()
+        i, n = 0, len(secs)
+        while i < n:
+            wait = t0 + secs[i] - loop.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            now = loop.time() - t0
+            j = int(np.searchsorted(secs, now + self.lookahead, 'right'))   # everything due in the window
+            j = max(j, i + 1)
+            self.sink.send([bytes(m) for m in msgs[i:j].tolist()])
+            self.late.extend((now - secs[i:j]).tolist())
+            i = j
+
+    async def play(self) -> None:
+
+        """
+        Play all voices concurrently; on cancellation every channel gets an all-notes-off.
+
+        Returns normally after ``stop``; errors raised by the sink are propagated.
+        """
+
+        voices = self._voices()
+        loop = asyncio.get_running_loop()
+        self.sink.open()
+        t0 = loop.time() + self.lookahead          # common start time
+        self._tasks = [asyncio.create_task(self._voice(s, m, t0)) for s, m in voices]
+        try:
+            done = await asyncio.gather(*self._tasks, return_exceptions=True)   # stopped voices do not raise
+            for r in done:
+                if isinstance(r, Exception):
+                    raise r
+        finally:
+            if any(t.cancelled() for t in self._tasks):
+                self.sink.send([bytes([0xB0 | ch, 123, 0]) for ch in CHANNELS[:len(voices)].tolist()])
+            self.sink.close()
+
+    def stop(self) -> None:
+
+        """
+        Stop the playback started by ``play``.
+        """
+
+        for t in self._tasks:
+            t.cancel()
+
+    def run(self) -> dict[str, float]:
+
+        """
+        Play from synchronous code (``asyncio.run(self.play())``).
+
+        :return: ``stats``, also when the playback was stopped or cancelled.
+        :rtype: dict[str, float]
+        """
+
+        try:
+            asyncio.run(self.play())
+        except asyncio.CancelledError:
+            pass
+        return self.stats
+
+    @property
+    def stats(self) -> dict[str, float]:
+
+        """
+        Lateness of the sent messages, in milliseconds.
+
+        Negative values are messages sent early inside the lookahead window.
+
+        :return: ``count``, ``mean``, ``std`` (jitter), ``min``, ``max`` and ``p95``.
+        :rtype: dict[str, float]
+        """
+
+        late = np.asarray(self.late) * 1000
+        if not len(late):
+            return {'count': 0, 'mean': 0.0, 'std': 0.0, 'min': 0.0, 'max': 0.0, 'p95': 0.0}
+        return {
+            'count': len(late),
+            'mean': float(late.mean()),
+            'std': float(late.std()),
+            'min': float(late.min()),
+            'max': float(late.max()),
+            'p95': float(np.percentile(late, 95)),
+        }
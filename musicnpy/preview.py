@@ -0,0 +1,130 @@
+"""
+musicnpy.preview
+"""
+
+from __future__ import annotations
+import struct
+import zlib
+import numpy as np
+from .midi import table
+from .topyly import TPQ
+
+BACKGROUND = (16, 16, 20)
+GRID = (44, 44, 52)           # lines under every C
+BEAT = (30, 30, 36)           # lines on every quarter note
+PALETTE = np.array([          # one colour per voice, repeated if there are more voices
+    (255, 99, 71), (65, 155, 255), (120, 210, 90), (250, 200, 60),
+    (190, 110, 240), (60, 210, 200), (245, 130, 190), (200, 200, 200)], dtype=np.float32)
+
+def png(image: np.ndarray, level: int = 6) -> bytes:
+
+    """
+    Encode an RGB image as PNG with ``zlib`` and ``struct`` only.
+
+    :param image: ``(height, width, 3)`` array of ``uint8``.
+    :type image: np.ndarray
+    :param level: zlib compression level. Defaults to 6.
+    :type level: int
+    :return: The PNG file.
+    :rtype: bytes
+
+    :Example:
+
+    >>> png(np.zeros((2, 2, 3), dtype=np.uint8))[:8]
+    b'\\x89PNG\\r\\n\\x1a\\n'
+    """
+
+    h, w, _ = image.shape
+    raw = np.empty((h, 1 + 3 * w), dtype=np.uint8)
+    raw[:, 0] = 0                                # filter type None on every row
+    raw[:, 1:] = image.reshape(h, 3 * w)
+
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data))
+
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', w, h, 8, 2, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(raw.tobytes(), level))
+            + chunk(b'IEND', b''))
+
+def roll(ev: np.ndarray, quarter: int = 24, row: int = 4, margin: int = 2) -> np.ndarray:
+
+    """
+    Rasterize an event table into a piano roll.
+
+    Time runs left to right (``quarter`` pixels per quarter note), pitch bottom
+    to top (``row`` pixels per semitone). Each voice has its own colour,
+    velocity sets the brightness. Rests and spaces are not drawn.
+
+    :param ev: Event table.
+    :type ev: np.ndarray
+    :param quarter: Pixels per quarter note. Defaults to 24.
+    :type quarter: int
+    :param row: Pixels per semitone. Defaults to 4.
+    :type row: int
+    :param margin: Empty semitones above and below. Defaults to 2.
+    :type margin: int
+    :return: ``(height, width, 3)`` array of ``uint8``.
+    :rtype: np.ndarray
+    """
+
+    ev = ev[ev['pitch'] >= 0]
+    if not len(ev):
+        return np.full((row, quarter, 3), BACKGROUND, dtype=np.uint8)
+
+    low, high = int(ev['pitch'].min()) - margin, int(ev['pitch'].max()) + margin
+    x0 = ev['onset'] * quarter // TPQ
+    x1 = np.maximum((ev['onset'] + ev['dur']) * quarter // TPQ, x0 + 1)
+    y = high - ev['pitch'].astype(np.int64)      # one row per semitone, high notes on top
+    width = int(x1.max()) + 1
+
+    ids = ev['staff'].astype(np.int64) << 16 | ev['voice']
+    _, voice = np.unique(ids, return_inverse=True)
+    bright = 0.3 + 0.7 * np.clip(ev['vel'], 0, 127) / 127
+    colour = (PALETTE[voice % len(PALETTE)] * bright[:, None].astype(np.float32)).astype(np.uint8)
+
+    img = np.empty((high - low + 1, width, 3), dtype=np.uint8)
+    img[:] = BACKGROUND
+    img[:, ::quarter] = BEAT
+    img[np.arange(high, low - 1, -1) % 12 == 0] = GRID
+    for a, b, r, c in zip(x0.tolist(), x1.tolist(), y.tolist(), colour):
+        img[r, a:b] = c
+        if b - a > 2:
+            img[r, a] = c // 2                   # darker onset: repeated notes stay distinct
+
+    return np.repeat(img, row, axis=0)
+
+def preview(filename: str | None, note=60, dur=None, vel=None, *, quarter: int = 24, row: int = 4, level: int = 6) -> bytes:
+
+    """
+    Piano-roll PNG of a score, without lilypond.
+
+    :param filename: Output path (``.png`` is added if missing). None only returns the bytes.
+    :type filename: str | None
+    :param note: A ``_Voice``, ``Staff`` or ``Score`` (their ``events`` are used), an event
+        table, or midinotes as accepted by ``Staff`` (tuple for more voices).
+    :param dur: Durations when ``note`` holds midinotes.
+    :param vel: Velocities when ``note`` holds midinotes.
+    :param quarter: Pixels per quarter note. Defaults to 24.
+    :type quarter: int
+    :param row: Pixels per semitone. Defaults to 4.
+    :type row: int
+    :param level: zlib compression level. Defaults to 6.
+    :type level: int
+    :return: The PNG file.
+    :rtype: bytes
+
+    :Example:
+
+    >>> data = preview(None, ([60, 64, 67, 72], [48, 43]), ([8, 'mod'], [4, 'mod']), ([40, 100, 'mod'], None))
+    >>> data[12:16], struct.unpack('>II', data[16:24])
+    (b'IHDR', (49, 136))
+    """
+
+    data = png(roll(table(note, dur, vel), quarter, row), level)
+    if filename is not None:
+        if not filename.endswith('.png'):
+            filename += '.png'
+        with open(filename, 'wb') as f:
+            f.write(data)
+    return data
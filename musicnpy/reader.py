@@ -0,0 +1,355 @@
+"""
+musicnpy.reader
+"""
+
+from __future__ import annotations
+import os
+import re
+import struct
+import numpy as np
+from fractions import Fraction
+from functools import lru_cache
+from .pitch import _PSet
+from .topyly import EVENT, TPQ, VELOCITY, VELS, EXPR, EXPR_ID
+
+# lilypond (english) pitch names written by mapPitch
+STEP = {'c': 0, 'd': 2, 'e': 4, 'f': 5, 'g': 7, 'a': 9, 'b': 11}
+ALTER = {'': 0, 's': 1, 'f': -1}
+
+LY_VEL = {v: 10 * k + 5 for k, v in enumerate(VELS)}     # middle of the mapVel band
+LY_EXP = {v: EXPR_ID[k] for k, v in EXPR.items() if v}  # lilypond symbol --> exp id
+
+_PITCH = r"[a-g][sf]?[',]*(?![A-Za-z])"
+_ALT = lambda items: '|'.join(re.escape(i) for i in sorted(items, key=len, reverse=True))
+
+LY_TOKEN = re.compile(rf"""
+     %[^\n]*                                        # comment
+    |"[^"]*"                                        # string (names, version, paper)
+    |\\tuplet\s+(?P<tn>\d+)/(?P<td>\d+)\s*\{{
+    |\\key\s+(?P<key>[a-g][sf]?)
+    |\\time\s+\d+/\d+
+    |\\clef\s+\S+
+    |(?P<staff>\\new\s+Staff(?![A-Za-z]))
+    |(?P<sep>\\\\)
+    |(?P<open>\{{)
+    |(?P<close>\}})
+    |<<|>>
+    |(?:(?P<chord><\s*(?:(?:{_PITCH}|[rs])\s*)+>)
+       |(?P<pitch>{_PITCH})
+       |(?P<rest>[rs](?![A-Za-z]))\s*
+       |(?P<bare>(?<=\s)(?=\d))                      # 00: duration without pitch
+      )(?P<dur>\d+\.*(?:~\d+\.*)*)?
+       (?P<vel>(?:{_ALT(VELS)})(?![A-Za-z]))?
+       (?P<exp>{_ALT(LY_EXP)})?
+    |\\[A-Za-z]+                                    # any other command
+    |[A-Za-z][\w-]*                                 # any other word
+""", re.X)
+
+@lru_cache(maxsize=None)
+def ly_pitch(name: str) -> int:
+
+    """
+    Lilypond pitch (``"cs''"``, ``'r'``, ``'s'``) to midinote, -1 for rests, -2 for spaces.
+
+    :Example:
+
+    >>> ly_pitch("cs''"), ly_pitch("bf,"), ly_pitch('r')
+    (73, 46, -1)
+    """
+
+    if name == 'r':
+        return -1
+    if name == 's':
+        return -2
+    octave = name.count("'") - name.count(',')
+    name = name.rstrip("',")
+    return 48 + 12 * octave + STEP[name[0]] + ALTER[name[1:]]
+
+@lru_cache(maxsize=None)
+def ly_dur(text: str) -> Fraction:
+
+    """
+    Lilypond duration (``'8.'``, ``'4~16'``) to a fraction of a whole note.
+
+    :Example:
+
+    >>> ly_dur('4~16.')
+    Fraction(11, 32)
+    """
+
+    out = Fraction(0)
+    for part in text.split('~'):
+        base = Fraction(1, int(part.rstrip('.')))
+        dots = len(part) - len(part.rstrip('.'))
+        out += base * (2 - Fraction(1, 2 ** dots))
+    return out
+
+def read_ly(source: str) -> np.ndarray:
+
+    """
+    Parse the lilypond written by ``_Voice``, ``Staff`` and ``Score`` into an event table.
+
+    Pitches with octave marks, chords, rests and spaces, durations (dots and
+    ``~`` ties), ``\\tuplet``, dynamics and ``EXPR`` symbols are read in a single
+    ``re.finditer`` pass. Each ``\\new Staff`` starts a new ``staff`` and each ``\\\\``
+    a new ``voice``. Dynamics give the middle velocity of their ``mapVel`` band.
+
+    :param source: Path of a ``.ly`` file or the lilypond text itself.
+    :type source: str
+    :return: The event table (``EVENT``), in ``TPQ`` ticks.
+    :rtype: np.ndarray
+
+    :Example:
+
+    >>> ev = read_ly("{ cs'4 < e' g' >8\\\\ff-. \\\\tuplet 3/2 { r 8 d'8 8 } }")
+    >>> ev['pitch'].tolist(), ev['onset'].tolist()
+    ([61, 64, 67, -1, 62, 62], [0, 480, 480, 720, 880, 1040])
+    """
+
+    if '{' not in source:                        # a path
+        with open(source, encoding='utf-8') as f:
+            source = f.read()
+
+    rows = []                                    # (onset, end, pitch, chord, vel, exp, voice, staff)
+    staff, voice = -1, 0
+    time, last, vel, slot = Fraction(0), Fraction(1, 4), VELOCITY, 0
+    pitches = [60]
+    scale = [Fraction(1)]                        # tuplet factors, one per open brace
+    music = None                                 # brace depth of the first note of the voice
+
+    for m in LY_TOKEN.finditer(source):
+        kind = m.lastgroup if m.lastgroup in ('tn', 'key', 'staff', 'sep', 'open', 'close') else None
+        if m.group('tn'):
+            scale.append(scale[-1] * Fraction(int(m.group('td')), int(m.group('tn'))))
+            continue
+        if kind == 'open':
+            scale.append(scale[-1])
+            continue
+        if kind == 'close':
+            if len(scale) > 1:
+                scale.pop()
+            if music is not None and len(scale) < music:
+                music = None
+            continue
+        if kind == 'staff' or kind == 'sep':
+            staff, voice = (staff + 1, 0) if kind == 'staff' else (staff, voice + 1)
+            time, last, vel, slot, pitches = Fraction(0), Fraction(1, 4), VELOCITY, 0, [60]
+            continue
+
+        if m.group('chord'):
+            pitches = [ly_pitch(p) for p in re.findall(rf"{_PITCH}|[rs]", m.group('chord')[1:-1])]
+        elif m.group('pitch'):
+            pitches = [ly_pitch(m.group('pitch'))]
+        elif m.group('rest'):
+            pitches = [ly_pitch(m.group('rest'))]
+        elif m.group('bare') is None or music is None or m.group('dur') is None:
+            continue                             # commands, words, numbers outside the music
+        if music is None:
+            music = len(scale)
+
+        if m.group('dur'):
+            last = ly_dur(m.group('dur'))
+        if m.group('vel'):
+            vel = LY_VEL[m.group('vel')]
+        exp = LY_EXP.get(m.group('exp'), 0)
+        end = time + last * scale[-1]
+        rows.extend((time, end, p, slot, vel, exp, voice, staff) for p in pitches)
+        time, slot = end, slot + 1
+
+    out = np.empty(len(rows), dtype=EVENT)
+    if not rows:
+        return out
+    cols = list(zip(*rows))
+    onset = np.rint(np.array(cols[0], dtype=float) * 4 * TPQ).astype(np.int64)
+    out['onset'] = onset
+    out['dur']   = np.rint(np.array(cols[1], dtype=float) * 4 * TPQ).astype(np.int64) - onset
+    for name, c in zip(('pitch', 'chord', 'vel', 'exp', 'voice', 'staff'), cols[2:]):
+        out[name] = c
+    np.maximum(out['staff'], 0, out=out['staff'])   # a _Voice has no \new Staff
+    return out
+
+def _varlen(data: bytes, i: int) -> tuple[int, int]:
+    v = 0
+    while True:
+        b = data[i]
+        i += 1
+        v = (v << 7) | (b & 0x7F)
+        if b < 0x80:
+            return v, i
+
+def read_midi(source: str | bytes) -> np.ndarray:
+
+    """
+    Parse a Standard MIDI File (format 0 or 1) into an event table.
+
+    Every (track, channel) pair with notes becomes a ``voice``; notes starting
+    together in a voice share their ``chord`` id. Times are converted to ``TPQ``.
+
+    :param source: Path of the file or its bytes.
+    :type source: str | bytes
+    :return: The event table (``EVENT``), without rests.
+    :rtype: np.ndarray
+    :raises ValueError: If the data is not a MIDI file or uses SMPTE time.
+
+    :Example:
+
+    >>> import os, tempfile
+    >>> from musicnpy.midi import write_midi
+    >>> path = os.path.join(tempfile.mkdtemp(), 'scale.mid')
+    >>> data = write_midi(path, [60, [64, 67]], [4, 8])
+    >>> bool((read_midi(path) == read_midi(data)).all())
+    True
+    >>> read_midi(data)[['onset', 'pitch', 'chord']].tolist()
+    [(0, 60, 0), (480, 64, 1), (480, 67, 1)]
+    """
+
+    if isinstance(source, str):
+        with open(source, 'rb') as f:
+            source = f.read()
+    data = bytes(source)
+    if data[:4] != b'MThd':
+        raise ValueError("Not a Standard MIDI File")
+    size, _, _, division = struct.unpack_from('>IHHH', data, 4)
+    if division & 0x8000:
+        raise ValueError("SMPTE time division is not supported")
+    scale = TPQ / division
+
+    rows = []                                    # (voice key, on, off, pitch, vel)
+    pos = 8 + size
+    track = 0
+    while pos + 8 <= len(data):
+        tag, length = struct.unpack_from('>4sI', data, pos)
+        i, end = pos + 8, min(pos + 8 + length, len(data))
+        pos = end
+        if tag != b'MTrk':
+            continue
+        t, status, held = 0, 0, {}
+        while i < end:
+            delta, i = _varlen(data, i)
+            t += delta
+            b = data[i]
+            if b == 0xFF:                        # meta
+                kind = data[i + 1]
+                n, i = _varlen(data, i + 2)
+                i += n
+                if kind == 0x2F:
+                    break
+                continue
+            if b == 0xF0 or b == 0xF7:           # sysex
+                n, i = _varlen(data, i + 1)
+                i += n
+                continue
+            if b & 0x80:
+                status = b
+                i += 1
+            kind, ch = status & 0xF0, status & 0x0F
+            if kind == 0xC0 or kind == 0xD0:
+                i += 1
+                continue
+            d1, d2 = data[i], data[i + 1]
+            i += 2
+            if kind == 0x90 and d2:
+                held.setdefault((ch, d1), []).append((t, d2))
+            elif kind == 0x80 or kind == 0x90:
+                if held.get((ch, d1)):
+                    on, v = held[(ch, d1)].pop(0)
+                    rows.append(((track, ch), on, t, d1, v))
+        for (ch, p), notes in held.items():      # never released: end of track
+            rows.extend(((track, ch), on, t, p, v) for on, v in notes)
+        track += 1
+
+    keys = {}
+    for r in rows:
+        keys.setdefault(r[0], len(keys))
+    out = np.empty(len(rows), dtype=EVENT)
+    if not rows:
+        return out
+    voice = np.array([keys[r[0]] for r in rows])
+    on, off, pitch, vel = (np.array(c, dtype=np.int64) for c in list(zip(*rows))[1:])
+    out['onset'] = np.rint(on * scale)
+    out['dur']   = np.rint(off * scale) - out['onset']
+    out['pitch'] = pitch
+    out['vel']   = vel
+    out['exp']   = 0
+    out['voice'] = voice
+    out['staff'] = 0
+    out = out[np.lexsort((np.arange(len(out)), out['onset'], out['voice']))]
+    new = np.ones(len(out), dtype=bool)          # a new chord when voice or onset change
+    new[1:] = (np.diff(out['voice']) != 0) | (np.diff(out['onset']) != 0)
+    first = np.ones(len(out), dtype=bool)
+    first[1:] = np.diff(out['voice']) != 0
+    count = np.cumsum(new)
+    out['chord'] = count - np.maximum.accumulate(np.where(first, count, 0))
+    return out
+
+def read(path: str) -> np.ndarray:
+
+    """
+    Read a ``.ly`` or ``.mid``/``.midi`` file into an event table.
+
+    :param path: File path.
+    :type path: str
+    :rtype: np.ndarray
+    :raises ValueError: If the extension is not supported.
+    """
+
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.ly':
+        return read_ly(path)
+    if ext in ('.mid', '.midi'):
+        return read_midi(path)
+    raise ValueError(f"Unsupported file type {ext!r} (.ly, .mid, .midi)")
+
+def _read(path: str) -> dict:
+    try:
+        return {'path': path, 'events': read(path), 'error': None}
+    except (OSError, ValueError, IndexError, struct.error) as e:
+        return {'path': path, 'events': None, 'error': f"{type(e).__name__}: {e}"}
+
+def read_many(paths: list[str], workers: int = 1, chunksize: int = 16) -> list[dict]:
+
+    """
+    Read many files, optionally in a process pool.
+
+    A file that cannot be parsed does not stop the others: its ``error`` is set.
+
+    :param paths: ``.ly`` and ``.mid`` paths.
+    :type paths: list[str]
+    :param workers: Number of processes, 1 reads in this process.
+    :type workers: int
+    :param chunksize: Files sent together to each process.
+    :type chunksize: int
+    :return: ``{'path', 'events', 'error'}`` for each path, in order.
+    :rtype: list[dict]
+
+    .. note:: With ``workers > 1`` the calling script needs ``if __name__ == '__main__'``
+        on platforms that do not fork (macOS, Windows).
+    """
+
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(_read, paths, chunksize=chunksize))
+    return [_read(p) for p in paths]
+
+def psets(ev: np.ndarray) -> list[_PSet]:
+
+    """
+    Group an event table into one ``_PSet`` per note or chord (rests are skipped).
+
+    :param ev: Event table.
+    :type ev: np.ndarray
+    :return: The pitch sets, ordered by staff, voice and chord.
+    :rtype: list[_PSet]
+
+    :Example:
+
+    >>> [p.values for p in psets(read_ly("{ c'4 < e' g' >4 r4 }"))]
+    [[60], [64, 67]]
+    """
+
+    ev = ev[ev['pitch'] >= 0]
+    ev = ev[np.lexsort((ev['chord'], ev['voice'], ev['staff']))]
+    ids = (ev['staff'].astype(np.int64) << 48) | (ev['voice'].astype(np.int64) << 32) | ev['chord']
+    cuts = np.flatnonzero(np.diff(ids)) + 1
+    return [_PSet(p) for p in np.split(ev['pitch'].astype(np.int64), cuts)] if len(ev) else []
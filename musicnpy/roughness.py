@@ -0,0 +1,146 @@
+"""
+musicnpy.roughness
+"""
+
+from __future__ import annotations
+import numpy as np
+from functools import lru_cache
+from collections.abc import Sequence
+from .core import _Set
+from .pitch import to_freq
+
+# Plomp-Levelt curve as parametrized by Sethares
+DSTAR, S1, S2, B1, B2 = 0.24, 0.0207, 18.96, 3.51, 5.75
+PARTIALS = tuple(0.88 ** h for h in range(6))       # amplitude of harmonics 1, 2, 3, ...
+BLOCK = 4096                                        # chords evaluated together
+
+def dissonance(f1: np.ndarray, f2: np.ndarray, a1: np.ndarray, a2: np.ndarray) -> np.ndarray:
+
+    """
+    Sensory dissonance of pairs of sine partials (broadcast).
+
+    :param f1: Frequencies.
+    :param f2: Frequencies.
+    :param a1: Amplitudes of ``f1``.
+    :param a2: Amplitudes of ``f2``.
+    :return: Dissonance of each pair, 0 for equal frequencies.
+    :rtype: np.ndarray
+
+    :Example:
+
+    >>> round(float(dissonance(440, 466.16, 1, 1)), 3), round(float(dissonance(440, 880, 1, 1)), 3)
+    (0.18, 0.0)
+    """
+
+    low = np.minimum(f1, f2)
+    s = DSTAR / (S1 * low + S2)
+    x = s * np.abs(np.subtract(f2, f1))
+    return np.minimum(a1, a2) * (np.exp(-B1 * x) - np.exp(-B2 * x))
+
+def _spectra(freq: np.ndarray, partials: Sequence[float]) -> tuple[np.ndarray, np.ndarray]:
+    h = np.arange(1, len(partials) + 1)
+    f = (freq[..., None] * h).reshape(*freq.shape[:-1], -1)
+    a = np.broadcast_to(np.asarray(partials, dtype=np.float64), freq.shape + (len(h),))
+    a = np.where(np.isfinite(freq)[..., None], a, 0).reshape(f.shape)
+    return np.nan_to_num(f), a
+
+def _batch(chords) -> np.ndarray:
+    if isinstance(chords, _Set):
+        return chords.vals[None, :].astype(np.float64)
+    if isinstance(chords, np.ndarray):
+        a = chords.astype(np.float64)
+        return a[None, :] if a.ndim == 1 else a
+    rows = [c.vals if isinstance(c, _Set) else np.asarray(c, dtype=np.float64) for c in chords]
+    width = max((len(r) for r in rows), default=0)
+    a = np.full((len(rows), width), np.nan)
+    for i, r in enumerate(rows):
+        a[i, :len(r)] = r
+    return a
+
+@lru_cache(maxsize=16)
+def table(partials: tuple = PARTIALS, a4: float = 440.0) -> tuple[np.ndarray, np.ndarray]:
+
+    """
+    Roughness of every pair of midinotes 0-127 and of every single note (its own partials), cached.
+
+    :param partials: Amplitude of each harmonic. Defaults to ``PARTIALS``.
+    :type partials: tuple
+    :param a4: Frequency of midinote 69. Defaults to 440.
+    :type a4: float
+    :return: ``(128, 128)`` pair table and ``(128,)`` single-note table.
+    :rtype: tuple[np.ndarray, np.ndarray]
+    """
+
+    freq = to_freq(np.arange(128.0), a4)
+    f, a = _spectra(freq[:, None], partials)                      # (128, H)
+    pair = np.empty((128, 128))
+    for i in range(128):                                          # nota i contro tutte: (H, 128, H) coppie
+        pair[i] = dissonance(f[i, :, None, None], f[None], a[i, :, None, None], a[None]).sum(axis=(0, 2))
+    iu = np.triu_indices(len(partials), 1)
+    single = dissonance(f[:, iu[0]], f[:, iu[1]], a[:, iu[0]], a[:, iu[1]]).sum(axis=1)
+    pair.flags.writeable = single.flags.writeable = False
+    return pair, single
+
+def roughness(chords, partials: Sequence[float] = PARTIALS, a4: float = 440.0, *, tuning=None,
+              intrinsic: bool = True, exact: bool = False, block: int = BLOCK) -> np.ndarray:
+
+    """
+    Sensory roughness of chords (sum over all pairs of partials, Sethares).
+
+    Roughness is a sum over pairs of notes, so for integer midinotes in 12-TET it
+    is read from ``table`` (``k * (k - 1) / 2`` lookups per chord). Otherwise the
+    partials of every note of ``block`` chords are compared at once by broadcasting.
+
+    :param chords: ``(n, k)`` midinotes (NaN or negative for missing notes), a sequence of
+        ``_PSet``/lists, or one ``_PSet``.
+    :param partials: Amplitude of each harmonic. Defaults to ``PARTIALS``.
+    :type partials: Sequence[float]
+    :param a4: Frequency of midinote 69. Defaults to 440.
+    :type a4: float
+    :param tuning: ``musicnpy.tuning.Tuning`` for the frequencies. Defaults to None (12-TET).
+    :param intrinsic: Count the pairs of partials of the same note. Defaults to True.
+    :type intrinsic: bool
+    :param exact: Always use the partials, never the table. Defaults to False.
+    :type exact: bool
+    :param block: Chords per broadcast. Defaults to 4096.
+    :type block: int
+    :return: ``(n,)`` roughness.
+    :rtype: np.ndarray
+
+    :Example:
+
+    >>> r = roughness([[60, 64, 67], [60, 61, 62], [60, 67]])
+    >>> bool(r[0] < r[1]), bool(r[2] < r[0])
+    (True, True)
+    >>> bool(np.allclose(r, roughness([[60, 64, 67], [60, 61, 62], [60, 67]], exact=True)))
+    True
+    """
+
+    x = _batch(chords)
+    x = np.where(x >= 0, x, np.nan)
+    partials = tuple(float(p) for p in partials)
+    n, k = x.shape
+    ok = np.isfinite(x)
+
+    whole = np.all(np.where(ok, (x == np.rint(x)) & (x < 128), True))
+    if tuning is None and whole and not exact:
+        pair, single = table(partials, a4)
+        idx = np.where(ok, x, 0).astype(np.int64)
+        iu = np.triu_indices(k, 1)
+        both = ok[:, iu[0]] & ok[:, iu[1]]
+        out = np.where(both, pair[idx[:, iu[0]], idx[:, iu[1]]], 0).sum(axis=1)
+        if intrinsic:
+            out += np.where(ok, single[idx], 0).sum(axis=1)
+        return out
+
+    freq = np.where(ok, to_freq(np.where(ok, x, 0), a4, tuning), np.nan)   # stessa conversione di _PSet.to_freq
+    H = len(partials)
+    iu = np.triu_indices(k * H, 1)
+    if not intrinsic:                                             # solo coppie tra note diverse
+        note = np.repeat(np.arange(k), H)
+        iu = tuple(i[note[iu[0]] != note[iu[1]]] for i in iu)
+    out = np.empty(n)
+    for s in range(0, n, block):
+        f, a = _spectra(freq[s:s + block], partials)
+        out[s:s + block] = dissonance(f[:, iu[0]], f[:, iu[1]], a[:, iu[0]], a[:, iu[1]]).sum(axis=1)
+    return out
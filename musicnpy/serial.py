@@ -0,0 +1,270 @@
+"""
+musicnpy.serial
+"""
+
+from __future__ import annotations
+import numpy as np
+from functools import cache
+from .pitch import _PSet, ArrayLike, Numeric
+from .pcset import BITS, COUNT, FULL, _rot, _inv
+
+# 48 forme: P0-P11, I0-I11, R0-R11, RI0-RI11 (R e RI: retrogradi di P e I allo stesso livello)
+FORMS = tuple(f"{f}{k}" for f in ('P', 'I', 'R', 'RI') for k in range(12))
+CHUNK = 65536       # righe espanse insieme nella ricerca
+
+class Row(_PSet):
+
+    """
+    A twelve-tone row (or any ordered set of distinct pitch classes).
+
+    :param values: Pitch classes or midinotes, in order.
+    :type values: ArrayLike
+    :param offset: Added to every value. Defaults to 0.
+    :type offset: Numeric
+    :raises ValueError: If pitch classes repeat.
+
+    :Example:
+
+    >>> r = Row([0, 11, 7, 8, 3, 1, 2, 10, 6, 5, 4, 9])
+    >>> r.matrix[:3].tolist()
+    [[0, 11, 7, 8, 3, 1, 2, 10, 6, 5, 4, 9], [1, 0, 8, 9, 4, 2, 3, 11, 7, 6, 5, 10], [5, 4, 0, 1, 8, 6, 7, 3, 11, 10, 9, 2]]
+    """
+
+    def __init__(self, values: ArrayLike, offset: Numeric = 0) -> None:
+        super().__init__(values, offset)
+        if len(np.unique(self.pcs)) != len(self.pcs):
+            raise ValueError("A row cannot repeat pitch classes")
+
+    @property
+    def pcs(self) -> np.ndarray:
+
+        """
+        Pitch classes of the row, as integers.
+        """
+
+        return np.mod(np.rint(self.vals), 12).astype(np.int64)
+
+    @property
+    def matrix(self) -> np.ndarray:
+
+        """
+        Twelve-tone matrix: row ``i`` is P starting on the ``i``-th note of I0,
+        so rows read P forms left to right and columns I forms top to bottom.
+        """
+
+        p = self.pcs
+        return (p[None, :] + p[0] - p[:, None]) % 12
+
+    def forms(self, *, rotations: bool = False, multiply: bool = False) -> np.ndarray:
+
+        """
+        Every form of the row, in the order of ``FORMS``.
+
+        :param rotations: Add every rotation of every form (axis 1). Defaults to False.
+        :type rotations: bool
+        :param multiply: Add the M5 forms after the 48 forms (M7 forms are M5 forms of I). Defaults to False.
+        :type multiply: bool
+        :return: ``(48, n)``; ``(96, n)`` with ``multiply``; ``(forms, n, n)`` with ``rotations``.
+        :rtype: np.ndarray
+
+        :Example:
+
+        >>> f = Row([0, 1, 3, 2]).forms()
+        >>> f.shape, f[FORMS.index('I3')].tolist(), f[FORMS.index('RI0')].tolist()
+        ((48, 4), [3, 2, 0, 1], [10, 9, 11, 0])
+        """
+
+        p = self.pcs - self.pcs[0]
+        k = np.arange(12)[:, None]
+        prime = (p[None, :] + k) % 12
+        inv = (k - p[None, :]) % 12
+        out = np.concatenate((prime, inv, prime[:, ::-1], inv[:, ::-1]))
+        if multiply:
+            out = np.concatenate((out, out * 5 % 12))
+        if rotations:
+            n = out.shape[1]
+            idx = (np.arange(n)[:, None] + np.arange(n)[None, :]) % n
+            out = out[:, idx]
+        return out
+
+    def multiply(self, m: int = 5) -> Row:
+
+        """
+        Multiplicative transform (M5, M7, ...) of the row.
+
+        :Example:
+
+        >>> Row([0, 1, 2, 3]).multiply(5).values
+        [0, 5, 10, 3]
+        """
+
+        return Row((self.pcs * m) % 12)
+
+    @property
+    def intervals_mod(self) -> list[int]:
+
+        """
+        Ordered intervals mod 12 between consecutive notes.
+        """
+
+        return (np.diff(self.pcs) % 12).tolist()
+
+    @property
+    def all_interval(self) -> bool:
+
+        """
+        True if the 11 intervals between consecutive notes are all different.
+
+        :Example:
+
+        >>> Row([0, 11, 7, 8, 3, 1, 2, 10, 6, 5, 4, 9]).all_interval, Row(range(12)).all_interval
+        (False, False)
+        >>> Row([0, 1, 3, 2, 9, 5, 10, 4, 7, 11, 8, 6]).all_interval
+        True
+        """
+
+        d = np.diff(self.pcs) % 12
+        return len(self.pcs) == 12 and len(np.unique(d)) == 11
+
+    def combinatoriality(self) -> dict[str, list[int]]:
+
+        """
+        Levels at which a form's first hexachord is the complement of the row's first hexachord.
+
+        :return: Levels of ``P`` (other than 0), ``I``, ``R`` (other than 0) and ``RI``.
+        :rtype: dict[str, list[int]]
+
+        :Example:
+
+        >>> Row([0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11]).combinatoriality()
+        {'P': [6], 'I': [11], 'R': [], 'RI': [5]}
+        """
+
+        f = self.forms()
+        hexa = np.bitwise_or.reduce(BITS[f[:, :6]], axis=1)
+        comp = FULL ^ hexa[FORMS.index('P0')]
+        hit = hexa == comp
+        return {name: [k for k in range(12) if hit[i * 12 + k] and not (name in ('P', 'R') and k == 0)]
+                for i, name in enumerate(('P', 'I', 'R', 'RI'))}
+
+@cache
+def _hexachords(kind: str) -> np.ndarray:
+    m = np.arange(4096, dtype=np.int64)
+    comp = FULL ^ m
+    six = COUNT == 6
+    inv = _inv(m)
+    P = np.zeros(4096, dtype=bool)
+    I = np.zeros(4096, dtype=bool)
+    RI = np.zeros(4096, dtype=bool)
+    for k in range(12):
+        P |= _rot(m, k) == comp
+        I |= _rot(inv, k) == comp
+        RI |= _rot(inv, k) == m
+    ok = {'P': P, 'I': I, 'RI': RI, 'all': P & I & RI}[kind]
+    return ok & six
+
+def _search(prefix: tuple[int, ...], all_interval: bool, combinatorial: str | None, limit: int | None) -> np.ndarray:
+
+    """
+    Batched depth-first search of the rows starting with ``prefix``.
+    """
+
+    allowed = None if combinatorial is None else _hexachords(combinatorial)
+    rows = np.array([prefix], dtype=np.int8)
+    used = np.array([int(np.bitwise_or.reduce(BITS[list(prefix)]))], dtype=np.int64)
+    ivs = np.array([int(np.bitwise_or.reduce(BITS[(np.diff(prefix) % 12).astype(np.int64)])) if len(prefix) > 1 else 0],
+                   dtype=np.int64)
+    found, count = [], 0
+    stack = [(rows, used, ivs)]
+    while stack and (limit is None or count < limit):
+        rows, used, ivs = stack.pop()
+        depth = rows.shape[1]
+        if depth == 12:
+            found.append(rows)
+            count += len(rows)
+            continue
+        cand = np.arange(12)
+        ok = (used[:, None] >> cand[None, :] & 1) == 0                      # pitch class not used yet
+        if all_interval:
+            step = BITS[(cand[None, :] - rows[:, -1:].astype(np.int64)) % 12]
+            ok &= (ivs[:, None] & step) == 0                               # interval not used yet
+        r, c = np.nonzero(ok)
+        new_used = used[r] | BITS[c]
+        new_ivs = ivs[r] | (BITS[(c - rows[r, -1]) % 12] if all_interval else 0)
+        keep = np.ones(len(r), dtype=bool)
+        if allowed is not None and depth + 1 == 6:
+            keep = allowed[new_used]                                       # first hexachord
+        r, c, new_used, new_ivs = r[keep], c[keep], new_used[keep], new_ivs[keep]
+        new_rows = np.concatenate((rows[r], c[:, None].astype(np.int8)), axis=1)
+        for s in reversed(range(0, len(new_rows), CHUNK)):                # first chunk on top
+            stack.append((new_rows[s:s + CHUNK], new_used[s:s + CHUNK], new_ivs[s:s + CHUNK]))
+    out = np.concatenate(found) if found else np.zeros((0, 12), dtype=np.int8)
+    return out[:limit] if limit is not None else out
+
+def find_rows(*, all_interval: bool = False, combinatorial: str | None = None, first: int = 0,
+              limit: int | None = None, workers: int = 1) -> np.ndarray:
+
+    """
+    Twelve-tone rows with given properties, starting on ``first``.
+
+    The search grows all partial rows of the same prefix together (numpy
+    arrays, ``CHUNK`` rows at a time), discarding a branch as soon as it
+    repeats an interval (``all_interval``) or its first hexachord is not
+    combinatorial. With ``workers > 1`` the eleven branches of the second note
+    are searched in a process pool.
+
+    :param all_interval: Only all-interval rows. Defaults to False.
+    :type all_interval: bool
+    :param combinatorial: First hexachord ``'P'``, ``'I'``, ``'RI'`` or ``'all'``-combinatorial. Defaults to None.
+    :type combinatorial: str | None
+    :param first: First pitch class. Defaults to 0.
+    :type first: int
+    :param limit: Most rows returned. Defaults to None (all); required without constraints (11! rows).
+    :type limit: int | None
+    :param workers: Processes. Defaults to 1.
+    :type workers: int
+    :return: ``(rows, 12)`` pitch classes (``int8``), in lexicographic order of their distances from ``first``.
+    :rtype: np.ndarray
+    :raises ValueError: If ``combinatorial`` is unknown, or if there are no constraints and no ``limit``.
+
+    .. note:: With ``workers > 1`` the calling script needs ``if __name__ == '__main__'``
+        on platforms that do not fork (macOS, Windows). Branches are submitted in order
+        and the pool stops as soon as ``limit`` rows are found.
+
+    :Example:
+
+    >>> len(find_rows(all_interval=True))
+    3856
+    >>> rows = find_rows(combinatorial='all', all_interval=True)
+    >>> len(rows), Row(rows[0]).combinatoriality()['I']
+    (176, [9])
+    >>> find_rows(limit=2, first=3).tolist()
+    [[3, 4, 5, 6, 7, 8, 9, 10, 11, 0, 1, 2], [3, 4, 5, 6, 7, 8, 9, 10, 11, 0, 2, 1]]
+    """
+
+    if combinatorial not in (None, 'P', 'I', 'RI', 'all'):
+        raise ValueError(f"Unknown combinatoriality: {combinatorial!r}")
+    if limit is None and not all_interval and combinatorial is None:
+        raise ValueError("Without constraints there are 11! rows: pass a limit")
+    prefixes = [(0, k) for k in range(1, 12)]
+    args = (all_interval, combinatorial, limit)
+    pool = None
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        pool = ProcessPoolExecutor(max_workers=workers)
+        futures = [pool.submit(_search, p, *args) for p in prefixes]
+        results = (f.result() for f in futures)                      # in prefix order
+    else:
+        results = (_search(p, *args) for p in prefixes)
+    parts, count = [], 0
+    try:
+        for part in results:
+            parts.append(part)
+            count += len(part)
+            if limit is not None and count >= limit:                 # the remaining branches are not needed
+                break
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+    out = (np.concatenate(parts) + np.int8(first % 12)) % 12          # int8: 12 bytes per row
+    return out[:limit] if limit is not None else out
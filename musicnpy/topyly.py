@@ -4,8 +4,13 @@ NB: Questo modulo è una copia del file pyly.5.py
 
 import numpy as np
 import os
+import glob
+import time
+import shutil
+import hashlib
+import copy
+from collections import OrderedDict
 # import sys
-# import time
 # import rtmidi
 # from rtmidi.midiutil import open_midioutput
 # from rtmidi.midiconstants import NOTE_OFF, NOTE_ON
@@ -17,6 +22,7 @@ import os
 #   • IDURS (tule di dict) = {simbolo:ratio}
 #   • VELS (tuple)         = contiene i simboli delle dinamiche in formato lilypond
 #   • EXPR (Dict)          = contiene i simboli delle espressioni in formato lilypond
+#   • EVENT (np.dtype)     = riga della tabella degli eventi (onset, dur, pitch, chord, vel, exp, voice, staff)
 # -------------------------------------------
 # - FUNZIONI:
 #   • tonalita('Eb')               specifica tonalità con diesis o bemolli           
@@ -27,9 +33,20 @@ import os
 #   • nDim([34,45,56])             riporta le dimensioni di una lista
 #   • l_mod([34,45,56], 5)         target >= list, se < riporta la lista originale
 #   • l_zero([34,00,56], 5)        target >= list, se < riporta la lista originale
+#   • flatten([4,[4,[1,1]]])       rappresentazione piatta: valori, offsets, irregolari, zeri
 #   • dflt(None)                   None, int, lista = crea lista o aggiunge 'zero' alla fine
 #   • selmode([60,56],'zero'], 5)   genera lista di size target in base al modo specificato
 #   • getmaxsize(note,dur,vel,exp) restituisce il size della lista più lunga
+#   • normalize(note,dur,vel,exp) indici normalizzati condivisi da _Map e events()
+#   • events(note,dur,vel,exp)    tabella degli eventi (array strutturato EVENT)
+#   • table(normalize(...))       tabella degli eventi da una normalizzazione già fatta
+#   • window(ev, 0, 1920)          eventi con onset tra due istanti (ticks)
+#   • check(note,dur,vel,exp)      riporta tutti gli errori degli input con la loro posizione
+#   • check_staff(note,...)        check() per Staff (tuple = più voci)
+#   • validate(errori)             solleva ValueError se check() ha trovato errori
+#   • outfiles('score')            riporta i files generati da lilypond (.ly .pdf .midi ...)
+#   • plain(np.int64(60))          scalari/array numpy --> valori python (chiavi della memo)
+#   • render_batch([a,b], chunk=16, workers=1)  compila più partiture con pochi processi lilypond
 # -------------------------------------------
 # - CLASSI:
 #   • _Map(note=[60], dur=[4], vel=[64], exp=[">"])
@@ -39,29 +56,45 @@ import os
 #                       .exp  --> recupera lista di espressioni
 #                       .max  --> size della lista più grande
 
-#   • _Print(filename="score", format="pdf", version="2.24.4")
+#   • _Cache(path="~/.cache/musicnpy", max_size=512)
+#                       .key       --> hash di sorgente, versione, formato e flags
+#                       .get       --> copia i files in cache (True se presenti)
+#                       .put       --> salva i files generati ed elimina i più vecchi (LRU)
+#
+#   • _Memo(size=1024)  --> MEMO condivisa da _Voice e Staff
+#                       .key       --> hash del contenuto degli argomenti
+#                       .restore   --> recupera un frammento già generato
+#                       .store     --> salva un frammento (elimina i meno recenti)
+#                       .clear     --> svuota la memoria
+#
+#   • _Print(filename="score", format="pdf", version="2.24.4", cache=None)
 #                       .print_out --> stampa la stringa nel terminale
-#                       .make_file --> genera tre files
+#                       .make_file --> genera tre files (o li recupera dalla cache)
+#                       .write_ly  --> scrive solo il file .ly (True se già in cache)
 #
 #   • _Voice(note=60, dur=None, vel=None, exp=None,
-#            filename="score", format="pdf", version="2.24.4")  --> ereditati dal _Print 
+#            filename="score", format="pdf", version="2.24.4", cache=None)  --> ereditati dal _Print 
 #                       .out       --> genera una stringa in output
+#                       .events    --> tabella degli eventi
 #                       .print_out --> stampa la stringa nel terminale
 #                       .make_file --> genera tre files)  
 #
 #   • Staff(voice=tuple di Voice,
 #           key=None, t_sig=None, clef=None,
 #           i_name=None, i_short=None, i_midi=None,
-#           filename="score", format="pdf", version="2.24.4") --> ereditati dal _Print 
+#           filename="score", format="pdf", version="2.24.4", cache=None) --> ereditati dal _Print 
 #                       .out       --> genera una stringa in output
+#                       .events    --> tabella degli eventi di tutte le voci
 #                       .print_out --> stampa la stringa nel terminale
 #                       .make_file --> genera tre files
 #   • Score(staff=tuple di Staff,
 #           staff_size=None, indent=None, s_indent=None,
 #           title=None, composer=None,
 #           size="a4landscape", margins=(10,10,10,10),
-#           filename="score", format="pdf", version="2.24.3") --> ereditati da _Print
+#           filename="score", format="pdf", version="2.24.3", cache=None) --> ereditati da _Print
 #                       .out       --> genera una stringa in output
+#                       .events    --> tabella degli eventi (ValueError se uno staff è una stringa)
+#                       .from_parts --> (classmethod) costruisce gli Staff in parallelo
 #                       .print_out --> stampa la stringa nel terminale
 #                       .make_file --> genera tre files
 
@@ -99,10 +132,8 @@ STEPS = ( '32',    '16',   '16.', '8',   # simboli lilypond
 REGOLA = 1/32  * np.arange(1,33,1)                # tempi assoluti regolari
 RATIOS = (1/1,3/2,5/4,6/4,7/4,9/8,11/8,13/8,15/8) # tempi assoluti regolari e irregolari
 VALS = [REGOLA/i for i in RATIOS]
-DURS = ({}, {},     {},      {},      {},      {},      {},       {},       {})
-for n in range(len(VALS)):      # RATIO:'4'       
-    for i in range(32):
-        DURS[n][np.round(VALS[n][i], decimals=5)] = STEPS[i] 
+                                # RATIO:'4' (un solo np.round per tutta la tabella)
+DURS = tuple(dict(zip(v, STEPS)) for v in np.round(np.array(VALS), decimals=5).tolist())
 
 IDURS = []
 for i in range(len(DURS)):
@@ -152,6 +183,19 @@ EXPR = {
     00:          ''        # nessuna espressione
 }
 
+EXPR_KEYS = (00,) + tuple(k for k in EXPR if k != 00)   # id numerico delle espressioni
+EXPR_ID   = {k: n for n, k in enumerate(EXPR_KEYS)}
+
+TPQ      = 480      # ticks per semiminima nella tabella degli eventi
+VELOCITY = 64       # velocity prima del primo valore specificato
+EVENT = np.dtype([('onset', 'i8'), ('dur', 'i8'),   # ticks
+                  ('pitch', 'i2'), ('chord', 'i4'), # midinote, id accordo
+                  ('vel',   'i2'), ('exp',   'i2'), # velocity, id espressione
+                  ('voice', 'i2'), ('staff', 'i2')])
+
+LY_FLAGS = "-dresolution=300 -dpixmap-format=png16m"   # flags di compilazione lilypond
+LY_EXTS  = ('.ly', '.pdf', '.png', '.svg', '.ps', '.eps', '.midi', '.mid') # files generati
+
 # -------------------------------------------
 # - FUNZIONI:
 
@@ -407,13 +451,35 @@ def nDim(a):
     1D = Tutto
     2D = Solo accordi (pitches)
     3D = Solo ritmi irregolari o puntati
+    Visita la lista per livelli (senza ricorsione)
     '''
     if not isinstance(a, list):
         return 0
-    elif not a:
-        return 1
-    else:
-        return 1 + max(nDim(item) for item in a)   # Ricorsione
+    depth = 0
+    level = [a]
+    while level:                                   # un livello di annidamento per ciclo
+        depth += 1
+        level = [i for l in level for i in l if isinstance(i, list)]
+    return depth
+
+def flatten(lista):
+    '''
+    Rappresentazione piatta di una lista (anche con ritmi irregolari):
+    • vals --> array (object) con tutti i valori, suddivisioni comprese
+    • offs --> array con l'inizio di ogni elemento in vals (len(lista)+1)
+    • irr  --> maschera degli elementi irregolari ([testa, [suddivisioni]])
+    • zero --> maschera degli elementi 00 (valore precedente)
+    '''
+    islist = [type(el) == list for el in lista]
+    irr  = np.array([l and len(el) > 1 and type(el[1]) == list and nDim(el[1]) == 1
+                     for el, l in zip(lista, islist)], dtype=bool)
+    zero = np.array([not l and el == 00 for el, l in zip(lista, islist)], dtype=bool)
+    counts = np.ones(len(lista), dtype=np.int64)
+    counts[irr] = [len(lista[i][1]) for i in np.flatnonzero(irr)]
+    offs = np.concatenate(([0], np.cumsum(counts)))
+    vals = np.empty(offs[-1], dtype=object)
+    vals[:] = [v for el, i in zip(lista, irr.tolist()) for v in (el[1] if i else (el,))]
+    return vals, offs, irr, zero
 
 # d = [23,34,45,[34,[45,56]]]
 # e = nDim(d)
@@ -423,29 +489,26 @@ def l_mod(lista, target):
     '''
     Genera una lista di n elementi (target) ripetendo la lista originale con operatore modulo.
     Se la lista contiene elementi irregolari (liste 2D), li espande correttamente.
+    Gli indici sono calcolati con np.resize sulla rappresentazione piatta (flatten).
     '''
-    nl = []
-    count = 0
-    if nDim(lista) == 3:                 # Se lista 3D (contiene ritmi irregolari)
-        idx = 0
-        while count < target:            # Fino a quando count < target 
-            el = lista[idx % len(lista)] # prende l'elemento corrente
-            if type(el) == list:         # se irregolare (2D)
-                sudd = []
-                for i in el[1]:          # per ogni suddivisione
-                    if count < target:
-                        sudd.append(i)   # aggiunge la suddivisione 
-                        count += 1       # aggiorna il count
-                    else:
-                        break            # esce dal ciclo se count >= target 
-                nl.append([el[0], sudd])
-            else:                        # altrimenti aggiorna di 1 
-                nl.append(el)
-                count += 1
-            idx += 1
-    else:                                # Se lista 1D o 2D (note o accordi)
-        for i in range(target):
-            nl.append(lista[i % len(lista)])
+    if target <= 0:
+        return []
+    if nDim(lista) != 3:                           # Se lista 1D o 2D (note o accordi)
+        return [lista[i] for i in np.resize(np.arange(len(lista)), target)]
+
+    _, offs, irr, _ = flatten(lista)               # Se lista 3D (contiene ritmi irregolari)
+    counts = np.diff(offs)
+    reps   = -(-target // max(int(offs[-1]), 1)) + 1  # cicli sufficienti a raggiungere target
+    seq    = np.resize(np.arange(len(lista)), reps * len(lista))
+    cum    = np.cumsum(counts[seq])
+    k      = int(np.searchsorted(cum, target)) + 1 # elementi necessari
+    seq    = seq[:k].tolist()
+    last   = int(target - (cum[k-2] if k > 1 else 0)) # suddivisioni dell'ultimo elemento
+
+    irr = irr.tolist()
+    nl  = [[lista[i][0], lista[i][1][:]] if irr[i] else lista[i] for i in seq]
+    if irr[seq[-1]]:                               # tronca l'ultimo irregolare
+        nl[-1][1] = nl[-1][1][:last]
     return nl
 
 #a = [60,64,67]          # Sequenza monofonica pitches
@@ -468,27 +531,11 @@ def l_zero(lista, target):
     '''
     Genera una lista di n elementi (target) sostituendo gli zeri (00) con ''.
     Se la lista è più corta di target, aggiunge '' alla fine fino a raggiungere target.
+    Il conteggio usa la rappresentazione piatta (flatten) invece di nDim su ogni elemento.
     '''
-    nl = []
-    idx = 0
-    for i in range(len(lista)):
-        el = lista[i]
-        idx += 1
-        if nDim(el) == 2:         # Se lista 3D (contiene ritmi irregolari)
-            idx += len(el[1])
-            idx -= 1
-            if el == 00:
-                 nl.append('')
-            else:
-                nl.append(el)
-        else:
-            if el == 00:
-                 nl.append('')
-            else:
-                nl.append(el)
-    for i in range(target-idx):
-        nl.append('')
-    return nl
+    _, offs, _, zero = flatten(lista)
+    nl = ['' if z else el for el, z in zip(lista, zero)]
+    return nl + [''] * (target - int(offs[-1]))
 
 # a = [69,67,68]      # Sequenza monofonica pitches
 # a = l_zero(a,5)
@@ -562,13 +609,248 @@ def selmode(lista, max):
 
 def getmaxsize(note,dur,vel,exp):
     '''Trova il size della lista più lunga'''
-    idx = 0                      # conteggio esatto elementi in durate
-    for i in dur:
-        if type(i) == list:                      # se irregolare
-            idx = idx + len(i[1])
-        else: idx += 1                           # se regolare
+    idx = sum(len(i[1]) if type(i) == list else 1 for i in dur)  # conteggio esatto elementi in durate
     return max(len(note),idx,len(vel),len(exp))  # trova il size max
 
+# -------------------------------------------
+# - TABELLA DEGLI EVENTI
+#   Rappresentazione numerica condivisa (lilypond, midi, analisi):
+#   una riga per ogni nota (o pausa), le note di un accordo hanno lo stesso 'chord'
+
+def splitmode(a, default=0):
+    '''
+    Come dflt() ma senza modificare la lista originale
+    OUT: (lista senza modo, 'mod' oppure 'zero')
+    '''
+    if a is None:
+        return [default], 'zero'
+    if type(a) is not list:
+        return [a], 'zero'
+    if a and (a[-1] == 'mod' or a[-1] == 'zero'):
+        return a[:-1], a[-1]
+    return list(a), 'zero'
+
+def fitmode(a, mode, target):
+    '''
+    Versione vettoriale di selmode() su array numerici:
+    'mod' ripete l'array (np.resize), 'zero' aggiunge 0 alla fine (np.pad)
+    '''
+    if mode == 'mod':
+        return np.resize(a, target)
+    return np.pad(a, (0, target - len(a)))
+
+def ffill(a, default):
+    '''Sostituisce gli 0 (valore precedente) con l'ultimo valore diverso da 0'''
+    idx = np.where(a != 0, np.arange(len(a)), 0)
+    np.maximum.accumulate(idx, out=idx)
+    out = a[idx]
+    if len(a) and a[0] == 0:
+        out[idx == 0] = default            # nessun valore precedente
+    return out
+
+def flatdur(a):
+    '''
+    Durate --> frazioni di semibreve (una per ogni nota)
+    [4, [4,[1,1,2]]] --> [0.25, 0.0625, 0.0625, 0.125]
+    00 = valore precedente (resta 0)
+    '''
+    out = []
+    for i in a:
+        if type(i) == list:                # se irregolare o puntato
+            tot = i[0] * sum(i[1])
+            out.extend(d / tot for d in i[1])
+        else:
+            out.append(1 / i if i else 0)
+    return np.asarray(out, dtype=float)
+
+def fitidx(n, mode, target):
+    '''
+    Indici di una lista di n elementi portata a target elementi:
+    'mod' ripete gli indici (np.resize), 'zero' aggiunge -1 (padding) alla fine
+    '''
+    if mode == 'mod' and n:
+        return np.resize(np.arange(n), target)
+    return np.concatenate((np.arange(min(n, target)), np.full(max(target - n, 0), -1))).astype(np.int64)
+
+def pick(vals, idx, fill=''):
+    '''vals[idx] per una lista di valori qualsiasi, fill dove idx == -1'''
+    a = np.empty(len(vals) + 1, dtype=object)
+    for n, v in enumerate(vals):                # elemento per elemento (accordi come tuple/liste)
+        a[n] = v
+    a[-1] = fill
+    return a[idx]
+
+def normalize(note=60, dur=None, vel=None, exp=None):
+    '''
+    Normalizzazione condivisa da events() (tabella numerica) e _Map (simboli lilypond):
+    liste di lunghezza diversa, 'mod' / 'zero', gruppi irregolari espansi in una nota per suddivisione.
+    Le liste originali non vengono modificate: ogni parametro diventa un array di indici,
+    uno per nota (-1 = padding di 'zero', cioè valore precedente)
+    OUT: dict • note, dur, vel, exp --> liste senza modo (splitmode)
+              • ni, vi, ei          --> indice in note, vel, exp di ogni nota
+              • fd                  --> indice nelle durate piatte (una per suddivisione) di ogni nota
+              • size                --> numero di note
+    '''
+    note, nmode = splitmode(note)
+    dur,  dmode = splitmode(dur)
+    vel,  vmode = splitmode(vel)
+    exp,  emode = splitmode(exp)
+
+    flat = sum(len(i[1]) if type(i) == list else 1 for i in dur)   # durate piatte (come flatdur)
+    size = max(len(note), flat, len(vel), len(exp))
+    return {'note': note, 'dur': dur, 'vel': vel, 'exp': exp, 'size': size,
+            'ni': fitidx(len(note), nmode, size),
+            'fd': fitidx(flat, dmode, size),
+            'vi': fitidx(len(vel), vmode, size),
+            'ei': fitidx(len(exp), emode, size)}
+
+def events(note=60, dur=None, vel=None, exp=None, voice=0, tpq=TPQ):
+    '''
+    Costruisce la tabella degli eventi di una voce (array strutturato EVENT)
+    Stesse regole di _Map (stessa normalize()): liste di lunghezza diversa, 'mod' / 'zero', 00 = valore precedente
+    • onset, dur  --> in ticks (tpq ticks per semiminima)
+    • pitch       --> midinote, -1 = pausa, -2 = spazio
+    • chord       --> indice della nota nella voce (uguale per le note di un accordo)
+    • vel         --> velocity (00 = la precedente)
+    • exp         --> indice in EXPR_KEYS (0 = nessuna espressione)
+    IN:  come _Voice
+    OUT: np.ndarray (EVENT)
+    '''
+    return table(normalize(note, dur, vel, exp), voice, tpq)
+
+def table(norm, voice=0, tpq=TPQ):
+    '''
+    Tabella degli eventi (EVENT) dall'output di normalize()
+    '''
+    size  = norm['size']
+    slots = pick([tuple(i) if type(i) is list else i for i in norm['note']], norm['ni'], 0)
+    slots = ffill(slots, 60)
+
+    whole = ffill(np.append(flatdur(norm['dur']), 0)[norm['fd']], 0.25)
+    vels  = ffill(np.append(np.asarray(norm['vel'], dtype=float), 0)[norm['vi']], VELOCITY)
+    exps  = np.append(np.array([EXPR_ID[i] for i in norm['exp']], dtype=np.int16), 0)[norm['ei']]
+
+    ends  = np.rint(np.cumsum(whole) * 4 * tpq).astype(np.int64)
+    start = np.concatenate(([0], ends[:-1]))
+
+    chords = [i if type(i) is tuple else (i,) for i in slots]
+    counts = np.fromiter((len(c) for c in chords), dtype=np.int64, count=size)
+    slot   = np.repeat(np.arange(size), counts)
+
+    out = np.empty(len(slot), dtype=EVENT)
+    out['onset'] = start[slot]
+    out['dur']   = (ends - start)[slot]
+    out['pitch'] = np.rint(np.fromiter((p for c in chords for p in c), dtype=float, count=len(slot)))
+    out['chord'] = slot
+    out['vel']   = np.rint(np.clip(vels, 1, 127))[slot]
+    out['exp']   = exps[slot]
+    out['voice'] = voice
+    out['staff'] = 0
+    return out
+
+def window(ev, start=0, end=None):
+    '''
+    Eventi che iniziano tra start e end (in ticks)
+    ev deve essere ordinata per onset (come per ogni singola voce)
+    '''
+    a = np.searchsorted(ev['onset'], start, 'left')
+    b = len(ev) if end is None else np.searchsorted(ev['onset'], end, 'left')
+    return ev[a:b]
+
+# -------------------------------------------
+# - VALIDAZIONE
+#   Controlla tutti gli input prima di costruire le stringhe lilypond,
+#   così gli errori arrivano tutti insieme e prima di scrivere files o avviare lilypond
+
+TUPLETS = {4: 0, 8: 0, 16: 0, 32: 0, 3: 1, 5: 2, 10: 2, 6: 3, 12: 3,   # somma suddivisioni --> DURS[n]
+           7: 4, 14: 4, 9: 5, 11: 6, 22: 6, 13: 7, 26: 7, 15: 8, 30: 8} # (stesso ordine di mapDur)
+
+def isnum(a):
+    '''Maschera dei valori numerici (non bool)'''
+    return np.array([isinstance(i, (int, float, np.integer, np.floating)) and not isinstance(i, bool)
+                     for i in a], dtype=bool)
+
+def check(note=60, dur=None, vel=None, exp=None, where=''):
+    '''
+    Controlla gli argomenti di una voce e riporta TUTTI gli errori con la loro posizione:
+    • note --> 0-127 (PCHS), -1 pausa, -2 spazio, 00 valore precedente
+    • dur  --> valori presenti in DURS, gruppi irregolari con somma supportata
+    • vel  --> 0-127
+    • exp  --> chiavi di EXPR
+    IN:  come _Voice, where = prefisso della posizione (es. 'staff 2, voce 1: ')
+    OUT: list (string), vuota se tutto è corretto
+    '''
+    err = []
+    note, _ = splitmode(note)
+    dur,  _ = splitmode(dur)
+    vel,  _ = splitmode(vel)
+    exp,  _ = splitmode(exp)
+
+    # altezze (accordi espansi): un solo controllo su tutto l'array
+    chord  = [type(i) is list for i in note]
+    counts = np.array([len(i) if c else 1 for i, c in zip(note, chord)], dtype=np.int64)
+    flat   = [p for i, c in zip(note, chord) for p in (i if c else (i,))]
+    num    = isnum(flat)
+    vals   = np.where(num, np.array(flat, dtype=object), 0.5).astype(float)
+    bad    = ~num | (vals != np.rint(vals)) | (vals < -2) | (vals > 127)
+    idx    = np.repeat(np.arange(len(note)), counts)
+    sub    = np.arange(len(flat)) - np.repeat(np.cumsum(counts) - counts, counts)
+    for k in np.flatnonzero(bad):
+        pos = f"note[{idx[k]}]" + (f"[{sub[k]}]" if chord[idx[k]] else '')
+        err.append(f"{where}{pos}: {flat[k]!r} non è in PCHS (0-127, -1 pausa, -2 spazio)")
+
+    # durate regolari
+    irr  = [type(i) is list for i in dur]
+    reg  = np.array([0 if i else d for d, i in zip(dur, irr)], dtype=object)
+    num  = isnum(reg)
+    r    = np.where(num, reg, 3).astype(float)               # 3 = non valido
+    with np.errstate(divide='ignore'):
+        ok = (r == 0) | np.isin(1 / r, list(DURS[0]))
+    for k in np.flatnonzero(~(ok & num) & ~np.array(irr, dtype=bool)):
+        err.append(f"{where}dur[{k}]: {dur[k]!r} non è in DURS")
+
+    # gruppi irregolari [testa, [suddivisioni]]
+    for k in np.flatnonzero(irr):
+        i = dur[k]
+        if len(i) != 2 or type(i[1]) is not list or not all(isnum([i[0], *i[1]])) or not i[0] or not i[1]:
+            err.append(f"{where}dur[{k}]: {i!r} deve essere [durata, [suddivisioni]]")
+            continue
+        tab = TUPLETS.get(sum(i[1]))
+        if tab is None:
+            err.append(f"{where}dur[{k}]: somma delle suddivisioni {sum(i[1])} non supportata {sorted(TUPLETS)}")
+            continue
+        for n, d in enumerate(i[1]):
+            if round((1/i[0] / sum(i[1])) * d, 5) not in DURS[tab]:
+                err.append(f"{where}dur[{k}][1][{n}]: {d!r} non è in DURS")
+
+    # velocities
+    num = isnum(vel)
+    v   = np.where(num, np.array(vel, dtype=object), -1).astype(float)
+    for k in np.flatnonzero(~num | (v < 0) | (v > 127)):
+        err.append(f"{where}vel[{k}]: {vel[k]!r} fuori da 0-127")
+
+    # espressioni
+    for k in np.flatnonzero([not (isinstance(i, (str, int)) and i in EXPR) for i in exp]):
+        err.append(f"{where}exp[{k}]: {exp[k]!r} non è in EXPR")
+    return err
+
+def check_staff(note=60, dur=None, vel=None, exp=None, where=''):
+    '''check() per gli argomenti di Staff (tuple = più voci)'''
+    if type(note) != tuple:
+        return check(note, dur, vel, exp, where)
+    err = []
+    for i, _ in enumerate(note):
+        err += check(note[i],
+                     None if dur is None else dur[i],
+                     None if vel is None else vel[i],
+                     None if exp is None else exp[i], f"{where}voce {i}, ")
+    return err
+
+def validate(err):
+    '''Solleva ValueError con l'elenco di tutti gli errori trovati da check()'''
+    if err:
+        raise ValueError(f"{len(err)} errori:\n  " + "\n  ".join(err))
+
 # -------------------------------------------
 # - CLASSI:
 
@@ -576,37 +858,41 @@ class _Map:
     '''
     Esegue il mapping.
     Accetta liste di lunghezza diversa in ingresso.
-    Genera liste di lunghezza uguale (l_map oppure l_zero)
+    Genera liste di lunghezza uguale con normalize() (la stessa di events())
     e le assegna a variabili d'istanza richiamate nelle classi figlie
     IN:  • pchs = list (int/list 2D) oppure int
          • durs = list (int/list 2D) oppure int
          • vels = list (int) oppure int
          • expr = list (string) oppure int
+         • norm = output di normalize() già calcolato (opzionale)
     '''   
-    def __init__(self, note=60,dur=None,vel=None,exp=None,key=None):
-
-        self.note = dflt(note)  # Assegna le variabili locali e genera eventuali default (dflt())
-        self.dur  = dflt(dur)
-        self.vel  = dflt(vel)
-        self.exp  = dflt(exp)
-        self.key  = key
-
-        self.note = [self.note[0:-1], self.note[-1]]    # [[seq], tipo] 
-        self.dur  = [self.dur[0:-1], self.dur[-1]]
-        self.vel  = [self.vel[0:-1], self.vel[-1]]
-        self.exp  = [self.exp[0:-1], self.exp[-1]]
-
-        self.note[0] = mapPitch(self.note[0],self.key)  # mapping con liste senza 'mod o 'zero'
-        self.dur[0]  = mapDur(self.dur[0]) 
-        self.vel[0]  = mapVel(self.vel[0]) 
-        self.exp[0]  = mapExp(self.exp[0]) 
-
-        self.max  = getmaxsize(self.note[0],self.dur[0],self.vel[0],self.exp[0]) # trova il size max delle liste
-                                                                                 # per normalizzazione
-        self.note = selmode(self.note, self.max) # normalizza la lunghezza delle liste
-        self.dur  = selmode(self.dur, self.max)  # in due modalità 'mod' oppure 'zero'
-        self.vel  = selmode(self.vel, self.max)
-        self.exp  = selmode(self.exp, self.max)
+    def __init__(self, note=60,dur=None,vel=None,exp=None,key=None,norm=None):
+
+        if norm is None:                        # stessa normalizzazione della tabella degli eventi
+            norm = normalize(note,dur,vel,exp)
+        self.key = key
+        self.max = norm['size']                 # size delle liste normalizzate
+
+        self.note = pick(mapPitch(norm['note'],self.key), norm['ni']).tolist()  # mapping sulle liste originali,
+        self.vel  = pick(mapVel(norm['vel']), norm['vi']).tolist()              # poi gli stessi indici di events()
+        self.exp  = pick(mapExp(norm['exp']), norm['ei']).tolist()
+
+        syms, heads, first = [], [], []         # un simbolo per suddivisione, intestazione dei gruppi irregolari
+        for i in norm['dur']:
+            n = len(i[1]) if type(i) == list else 1
+            m = mapDur([i])
+            tup = bool(m) and type(m[0]) == list
+            syms  += ((m[0][1] if tup else m) + [''] * n)[:n]
+            heads += [m[0][0] if tup else None] * n
+            first += [True] + [False] * (n - 1)
+        self.dur = []
+        for s, h, f in zip(*(pick(a, norm['fd'], d).tolist() for a, d in ((syms, ''), (heads, None), (first, False)))):
+            if h is None:                       # regolare (o padding)
+                self.dur.append(s)
+            elif f:                             # inizio di un gruppo irregolare
+                self.dur.append([h, [s]])
+            else:
+                self.dur[-1][1].append(s)
  
 #p = [60,45,56,[67,78,89],67,56,67] # Sequenza monodica
 #v = 89
@@ -620,6 +906,153 @@ class _Map:
 #print(a.vel)
 #print(a.exp)
 
+def outfiles(filename, since=0):
+    '''
+    Trova i files generati da lilypond per un dato filename
+    (score.ly, score.pdf, score.midi, score-page1.png, ...)
+    since --> considera solo i files modificati dopo questo istante (time.time())
+    IN:  string, float
+    OUT: list (string)
+    '''
+    base = glob.escape(filename)
+    out  = []
+    for f in glob.glob(base + '.*') + glob.glob(base + '-*'):
+        if os.path.splitext(f)[1] in LY_EXTS and os.path.getmtime(f) >= since:
+            out.append(f)
+    return sorted(out)
+
+class _Cache:
+    '''
+    Cache dei files compilati da lilypond.
+    Ogni elemento è una cartella il cui nome è l'hash di:
+        - sorgente lilypond (outstring)
+        - versione
+        - formato
+        - flags del comando
+    Se l'hash è già presente i files vengono copiati (mai collegati, così un file
+    di lavoro non condivide l'inode con la cache), altrimenti vengono salvati dopo la compilazione.
+    Quando la cartella supera max_size (MB) elimina gli elementi usati meno di recente (LRU).
+    IN: • path (string)
+        • max_size (int MB)
+    '''
+    def __init__(self, path="~/.cache/musicnpy", max_size=512):
+
+        self.path     = os.path.expanduser(path)
+        self.max_size = max_size * 1024 * 1024  # in bytes
+        os.makedirs(self.path, exist_ok=True)
+
+    def key(self, outo, version, format, flags=LY_FLAGS):
+        '''Hash sha256 degli input della compilazione'''
+        h = hashlib.sha256()
+        for i in (outo, version, format, flags):
+            h.update(str(i).encode('utf-8'))
+            h.update(b'\0')                       # separatore
+        return h.hexdigest()
+
+    def get(self, key, filename):
+        '''
+        Copia i files in cache con il nome filename.
+        OUT: list (string) dei files copiati, vuota se non presenti
+        '''
+        entry = os.path.join(self.path, key)
+        if not os.path.isdir(entry):
+            return []
+        out = []
+        for f in sorted(os.listdir(entry)):      # 'out.pdf', 'out-page1.png', ...
+            dst = filename + f[3:]
+            tmp = f"{dst}.{os.getpid()}.tmp"
+            shutil.copy2(os.path.join(entry, f), tmp) # copia (mai un link: lilypond riscrive i files)
+            os.replace(tmp, dst)                  # sostituzione atomica
+            out.append(dst)
+        os.utime(entry)                           # aggiorna l'ultimo utilizzo (LRU)
+        return out
+
+    def put(self, key, filename, since=0):
+        '''Salva in cache i files generati dopo since'''
+        entry = os.path.join(self.path, key)
+        if os.path.isdir(entry):
+            return
+        tmp = entry + f".{os.getpid()}.tmp"
+        os.makedirs(tmp, exist_ok=True)
+        for f in outfiles(filename, since):
+            shutil.copy2(f, os.path.join(tmp, 'out' + f[len(filename):]))
+        try:
+            os.rename(tmp, entry)                 # scrittura atomica
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)
+        self.evict()
+
+    def evict(self):
+        '''Elimina gli elementi più vecchi fino a rientrare in max_size'''
+        entries = []
+        total   = 0
+        for d in os.scandir(self.path):
+            if not d.is_dir() or d.name.endswith('.tmp'):
+                continue
+            size = sum(f.stat().st_size for f in os.scandir(d.path))
+            entries.append((d.stat().st_mtime, size, d.path))
+            total += size
+        for _, size, path in sorted(entries):    # dal meno recente
+            if total <= self.max_size:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+def plain(a):
+    '''Converte scalari e array numpy in valori python (liste e tuple restano tali)'''
+    if isinstance(a, np.ndarray):
+        return plain(a.tolist())
+    if isinstance(a, np.generic):
+        return a.item()
+    if type(a) in (list, tuple):
+        return type(a)(plain(i) for i in a)
+    return a
+
+class _Memo:
+    '''
+    Memoizzazione dei frammenti già generati (_Voice, Staff).
+    La chiave è l'hash del contenuto degli argomenti: se una voce non cambia
+    la sua stringa lilypond e la sua tabella degli eventi vengono riutilizzate,
+    quindi modificando una sola voce si rigenera solo quella.
+    Tiene al massimo size frammenti (elimina i meno usati di recente).
+    IN: • size (int)
+    '''
+    def __init__(self, size=1024):
+
+        self.size = size
+        self.data = OrderedDict()
+
+    def key(self, *args):
+        '''
+        Hash degli argomenti: valori numpy convertiti in python (np.int64(60) --> 60),
+        liste normalizzate con splitmode (anche dentro le tuple)
+        '''
+        args = [tuple(splitmode(i) if type(i) is list else i for i in a) if type(a) is tuple
+                else splitmode(a) if type(a) is list else a for a in plain(args)]
+        return hashlib.blake2b(repr(args).encode('utf-8'), digest_size=16).hexdigest()
+
+    def restore(self, obj, key):
+        '''Copia (deepcopy) gli attributi salvati in obj. OUT: True se presenti'''
+        data = self.data.get(key)
+        if data is None:
+            return False
+        self.data.move_to_end(key)
+        obj.__dict__.update(copy.deepcopy(data))  # mai condividere liste o array tra istanze
+        return True
+
+    def store(self, obj, key):
+        '''Salva una copia (deepcopy) degli attributi di obj (tranne quelli di _Print)'''
+        skip = ('filename', 'format', 'version', 'cache')
+        self.data[key] = copy.deepcopy({k: v for k, v in obj.__dict__.items() if k not in skip})
+        self.data.move_to_end(key)
+        while len(self.data) > self.size:
+            self.data.popitem(last=False)
+
+    def clear(self):
+        self.data.clear()
+
+MEMO = _Memo()      # condivisa da tutte le istanze
+
 class _Print:
     '''
     Salva un file lilypond (.ly) e lo compila generando:
@@ -627,16 +1060,18 @@ class _Print:
         - un file midi
     IN: • filename (string)
         • format (string [pdf, png, pngalpha, svg, ps])
-        • version (string)             
+        • version (string)
+        • cache (_Cache o None)
     '''
     def __init__(self,
                  filename="score", format="pdf",
-                 version="2.24.4"
+                 version="2.24.4", cache=None
                 ):
 
         self.filename  = filename
         self.format    = format
         self.version   = version
+        self.cache     = cache
 
     @property
     def print_out(self):
@@ -651,14 +1086,36 @@ class _Print:
     def make_file(self):
         '''
         Genera tre files: .ly .format e .midi
+        Se self.cache esiste e contiene lo stesso sorgente non ricompila.
+        '''
+        if self.write_ly():                       # già compilato
+            return
+
+        cmd = f"lilypond {LY_FLAGS} --format={self.format} --output={self.filename} {self.filename}.ly"
+        ret = os.system(cmd)
+        if self.cache is not None and ret == 0:
+            self.cache.put(self.key, self.filename, self.since)
+
+    def write_ly(self):
+        '''
+        Scrive solo il file .ly senza compilarlo.
+        OUT: True se i files sono già in cache (compilazione non necessaria),
+             in quel caso self.restored contiene i files copiati dalla cache
         '''
         self.outo = f"\n\\version \"{self.version}\"\n\\language \"english\"\n{self.outstring}"
+        self.key  = None
+        self.restored = []
+        if self.cache is not None:
+            self.key = self.cache.key(self.outo, self.version, self.format)
+            self.restored = self.cache.get(self.key, self.filename)
+            if self.restored:
+                return True
+        self.since = time.time() - 1              # risoluzione mtime del filesystem
+
         f = open(self.filename + ".ly", "w")  # crea un file di testo...
         f.write(self.outo)                    # lo scrive...
         f.close()                             # lo chiude in python
-
-        cmd = f"lilypond -dresolution=300 -dpixmap-format=png16m --format={self.format} --output={self.filename} {self.filename}.ly"
-        os.system(cmd)   
+        return False
 
 class _Voice(_Print):
     '''
@@ -672,11 +1129,19 @@ class _Voice(_Print):
     '''
     def __init__(self,
                  note=60,dur=None,vel=None,exp=None,key=None,
-                 filename="score", format="pdf", version="2.24.3"
+                 filename="score", format="pdf", version="2.24.3", cache=None,
+                 checked=False
                  ):
-        super().__init__(filename,format,version)
-
-        ins = _Map(note,dur,vel,exp,key)    # Crea liste della stessa lunghezza
+        super().__init__(filename,format,version,cache)
+        memo = MEMO.key('voice',note,dur,vel,exp,key)   # hash del contenuto degli argomenti
+        if MEMO.restore(self, memo):        # voce già generata
+            return
+        if not checked:                     # Staff controlla già tutte le voci
+            validate(check(note,dur,vel,exp))
+
+        norm = normalize(note,dur,vel,exp)  # una sola normalizzazione per lilypond e tabella degli eventi
+        self.events = table(norm)           # tabella numerica
+        ins = _Map(key=key, norm=norm)      # Crea liste della stessa lunghezza
         self.note = ins.note
         self.dur  = ins.dur 
         self.vel  = ins.vel 
@@ -698,6 +1163,7 @@ class _Voice(_Print):
                 self.music = self.music + self.note[self.id] + i + self.vel[self.id] + self.exp[self.id] + ' '     
                   
         self.outstring = f"{{ {self.music} }}"
+        MEMO.store(self, memo)
         
     @property
     def out(self):
@@ -744,7 +1210,7 @@ class Staff(_Print):
         • durate ([4, [4,[3,1]]])  oppure int
         • velocity ([64])          oppure int 
         • espressioni  (['>''])    oppure int
-        • tonalità ('C')
+        • tonalità ('C')           oppure 'auto' (stimata con musicnpy.keys)
         • tempo ('3/4')
         • chiave ('bass')
         • nome strumento ('Violino')
@@ -756,11 +1222,21 @@ class Staff(_Print):
                  note=60,dur=None,vel=None,exp=None,
                  key=None,t_sig=None,clef=None,
                  i_name=None,i_short=None,i_midi=None,
-                 filename="score", format="pdf", version="2.24.3"
+                 filename="score", format="pdf", version="2.24.3", cache=None
                  ):
-        super().__init__(filename,format,version)
+        super().__init__(filename,format,version,cache)
+        memo = MEMO.key('staff',note,dur,vel,exp,key,t_sig,clef,i_name,i_short,i_midi)
+        if MEMO.restore(self, memo):        # rigo già generato
+            return
+
+        validate(check_staff(note,dur,vel,exp))   # tutti gli errori di tutte le voci
+
+        if key == 'auto':                   # tonalità dalle altezze (relativa maggiore se minore)
+            from .keys import find_key, staff_key
+            key = staff_key(find_key(Staff(note,dur,vel,exp).events))
 
         self.voice = []
+        tables = []
         if type(note) == tuple: 
 
             for i, _ in enumerate(note):
@@ -768,10 +1244,15 @@ class Staff(_Print):
                 voicevel = None if vel is None else vel[i]
                 voiceexp = None if exp is None else exp[i]
 
-                a = _Voice(note[i], voicedur, voicevel, voiceexp, key)
+                a = _Voice(note[i], voicedur, voicevel, voiceexp, key, checked=True)
+                a.events['voice'] = i
                 self.voice.append(a.out)
+                tables.append(a.events)
         else:
-            self.voice.append(_Voice(note,dur,vel,exp,key).out)
+            a = _Voice(note,dur,vel,exp,key, checked=True)
+            self.voice.append(a.out)
+            tables.append(a.events)
+        self.events = np.concatenate(tables)    # tabella di tutte le voci
 
         self.multivoice = ""
         self.items = len(self.voice)
@@ -808,6 +1289,7 @@ class Staff(_Print):
             f"\t\t\t{self.vseq}\n" +
             "\t\t}"
         )
+        MEMO.store(self, memo)
         
 
     @property
@@ -862,12 +1344,16 @@ class Staff(_Print):
 # a = Staff(p,d,v,e,key='e',t_sig='2/4',clef='G',i_name='Ciccio').make_file
 
 
+def make_staff(part):
+    '''Costruisce uno Staff da un dict di argomenti (usato da Score.from_parts)'''
+    return part if isinstance(part, Staff) else Staff(**part)
+
 class Score(_Print):
     '''
         Definisce le caratteristiche della partitura. 
         Formattando gli outputs delle classi precedenti. 
         Di default crea uno StaffGroup.
-        IN: • staff (tuple di output di una o più istane di Staff)
+        IN: • staff (tuple di output di una o più istane di Staff, oppure le istanze stesse)
             • staff_size (in mm)
             • indent (rientro in mm)
             • s_indent (short indent in mm)
@@ -883,15 +1369,27 @@ class Score(_Print):
                  staff_size=None, indent=None, s_indent=None,
                  title=None, composer=None,
                  size="a4landscape", margins=(10,10,10,10),
-                 filename="score", format="pdf", version="2.24.3"    # ereditati da _Print
+                 filename="score", format="pdf", version="2.24.3",   # ereditati da _Print
+                 cache=None
                 ):
-        super().__init__(filename,format,version)
+        super().__init__(filename,format,version,cache)
 
         if type(staff) == tuple:
             self.staff = staff
         else: 
             self.staff = [staff]
 
+        self.tables = []                       # tabelle degli Staff
+        self.raw    = []                       # staff passati come stringhe (senza tabella)
+        for n, i in enumerate(self.staff):
+            if isinstance(i, Staff):
+                ev = i.events.copy()
+                ev['staff'] = n
+                self.tables.append(ev)
+            else:
+                self.raw.append(n)
+        self.staff = [i.out if isinstance(i, Staff) else i for i in self.staff]
+
         self.staff_size = f"\n\t#(layout-set-staff-size {staff_size})" if staff_size is not None else ""
         self.indent     = f"\n\tindent = {indent}" if indent is not None else ""
         self.s_indent   = f"\n\tshort-indent = {s_indent}" if s_indent is not None else ""
@@ -913,6 +1411,43 @@ class Score(_Print):
             self.multistaff = self.multistaff + i + "\n"
         self.outstring = f'''{self.page}\n\n\\score {{\n\t\\new StaffGroup\n\t\t<<\n{self.multistaff}\t\t>>\n{self.layout}\n\n\t\\midi {{ }}\n\t}}'''
 
+    @property
+    def events(self):
+        '''
+        Tabella degli eventi di tutti gli Staff (colonna 'staff' = posizione nella partitura).
+        Solleva ValueError se uno staff è una stringa lilypond (la tabella sarebbe incompleta)
+        '''
+        if self.raw:
+            raise ValueError(f"staff {self.raw}: stringhe lilypond senza tabella degli eventi "
+                             "(passare le istanze di Staff)")
+        return np.concatenate(self.tables) if self.tables else np.empty(0, dtype=EVENT)
+
+    @classmethod
+    def from_parts(cls, parts, workers=1, chunksize=1, **kwargs):
+        '''
+        Costruisce gli Staff in parallelo (un processo per rigo) e poi la partitura.
+        Il risultato è identico a Score(tuple(Staff(**p) for p in parts), **kwargs).
+        IN: • parts (list di dict con gli argomenti di Staff, oppure Staff già costruiti)
+            • workers (int) numero di processi, 1 = senza pool
+            • chunksize (int) righi inviati insieme a ogni processo
+            • kwargs --> argomenti di Score (title, composer, filename, ...)
+        NB: con workers > 1 lo script chiamante deve usare if __name__ == '__main__'
+            sui sistemi che non usano fork (macOS, Windows)
+        '''
+        err = []                               # controlla tutto prima di avviare i processi
+        for n, p in enumerate(parts):
+            if not isinstance(p, Staff):
+                err += check_staff(p.get('note', 60), p.get('dur'), p.get('vel'), p.get('exp'), f"staff {n}, ")
+        validate(err)
+
+        if workers > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                staff = tuple(pool.map(make_staff, parts, chunksize=chunksize)) # in ordine
+        else:
+            staff = tuple(make_staff(p) for p in parts)
+        return cls(staff, **kwargs)
+
     def sei_libero(self):
         '''
         Nasconde indicazione di tempo e linee di battuta.
@@ -981,3 +1516,93 @@ class Score(_Print):
 # e = (ea,eb)
 
 # a = Staff(p,d,v,e,key='e',t_sig='2/4',clef='G',i_name='Ciccio').make_file
+
+# -------------------------------------------
+# - COMPILAZIONE IN BATCH
+
+def ly_failed(err):
+    '''
+    Trova i files falliti nello stderr di lilypond
+    ('fatal error: failed files: "a.ly" "b.ly"')
+    IN:  string
+    OUT: set (string)
+    '''
+    out = set()
+    for line in err.splitlines():
+        if 'failed files:' in line:
+            out.update(line.split('failed files:')[1].replace('"', ' ').split())
+    return out
+
+def ly_run(chunk, format):
+    '''
+    Compila una lista di oggetti _Print (stessa cartella, stesso formato)
+    con un solo processo lilypond.
+    OUT: list di dict {'score', 'files', 'error'}
+    '''
+    import subprocess                             # import solo quando serve (avvio più veloce)
+    outdir = os.path.dirname(chunk[0].filename) or '.'
+    cmd = ['lilypond', *LY_FLAGS.split(), f'--format={format}', f'--output={outdir}']
+    cmd += [i.filename + '.ly' for i in chunk]
+    try:
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        err  = proc.stderr
+    except OSError as e:                          # lilypond non trovato
+        return [{'score': i, 'files': [], 'error': str(e)} for i in chunk]
+
+    failed = ly_failed(err)
+    out = []
+    for i in chunk:
+        files = [f for f in outfiles(i.filename, i.since) if not f.endswith('.ly')]
+        if os.path.basename(i.filename + '.ly') in failed or i.filename + '.ly' in failed or not files:
+            out.append({'score': i, 'files': [], 'error': err})
+        else:
+            if i.cache is not None:
+                i.cache.put(i.key, i.filename, i.since)
+            out.append({'score': i, 'files': files, 'error': None})
+    return out
+
+def render_batch(scores, chunk=16, workers=1):
+    '''
+    Compila molte partiture con il minor numero possibile di processi lilypond
+    (l'avvio di lilypond/guile è il costo maggiore per partiture piccole).
+    Le partiture sono raggruppate per cartella e formato e divise in blocchi di chunk files.
+    IN:  • scores  (list di _Voice, Staff o Score)
+         • chunk   (int) numero massimo di files per processo
+         • workers (int) numero di processi lilypond in parallelo
+    OUT: list di dict {'score': oggetto, 'files': [files generati], 'error': None o stderr}
+         nello stesso ordine di scores
+    '''
+    from concurrent.futures import ThreadPoolExecutor
+
+    names = [os.path.abspath(i.filename) for i in scores]
+    if len(set(names)) != len(names):
+        raise ValueError("render_batch: filename duplicati")
+
+    results = {}
+    groups  = {}
+    for n, i in enumerate(scores):
+        if i.write_ly():                          # già in cache: solo i files copiati (non quelli di compilazioni precedenti)
+            files = [f for f in i.restored if not f.endswith('.ly')]
+            results[n] = {'score': i, 'files': files, 'error': None}
+        else:
+            groups.setdefault((os.path.dirname(names[n]), i.format), []).append(n)
+
+    jobs = []                                     # [(indici, formato), ...]
+    for (_, format), idx in groups.items():
+        for c in range(0, len(idx), chunk):
+            jobs.append((idx[c:c + chunk], format))
+
+    def run(job):
+        idx, format = job
+        return idx, ly_run([scores[n] for n in idx], format)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for idx, res in pool.map(run, jobs):
+            results.update(zip(idx, res))
+
+    return [results[n] for n in range(len(scores))]
+
+# a = Staff([60,62,64], filename='./scores/a')
+# b = Staff([67,65,64], filename='./scores/b')
+# for r in render_batch([a, b], chunk=8, workers=2):
+#     print(r['score'].filename, r['files'], r['error'])
@@ -0,0 +1,182 @@
+"""
+musicnpy.tuning
+"""
+
+from __future__ import annotations
+import os
+import numpy as np
+from fractions import Fraction
+from functools import lru_cache
+from collections.abc import Sequence
+from .pitch import to_freq
+
+class Tuning:
+
+    """
+    A tuning system: the cents of the degrees of one period, repeated.
+
+    Midinote ``root`` is degree 0; every following midinote is the next degree,
+    so an ``n`` degree tuning repeats its period every ``n`` midinotes.
+    Fractional midinotes are interpolated in cents between two degrees.
+    The arrays are read-only: ``edo``, ``just`` and ``from_scl`` return cached instances.
+
+    :param cents: Cents of the degrees above degree 0 (the first is 0), ascending.
+    :type cents: Sequence[float]
+    :param period: Cents of the period. Defaults to 1200.
+    :type period: float
+    :param root: Midinote of degree 0. Defaults to 60.
+    :type root: int
+    :param freq: Frequency of degree 0. Defaults to None: the 12-TET frequency of ``root``
+        from the ``a4`` of ``to_freq``/``from_freq``.
+    :type freq: float | None
+    :param name: Description. Defaults to None.
+    :type name: str | None
+    :raises ValueError: If the cents are not ascending within the period.
+
+    :Example:
+
+    >>> t = Tuning.edo(19)
+    >>> np.round(t.to_freq([60, 79, 69]), 2).tolist()
+    [261.63, 523.25, 363.31]
+    """
+
+    def __init__(self, cents: Sequence[float], period: float = 1200.0, root: int = 60,
+                 freq: float | None = None, name: str | None = None) -> None:
+        cents = np.array(cents, dtype=np.float64)                           # own copy
+        if cents[0] != 0 or np.any(np.diff(cents) <= 0) or cents[-1] >= period:
+            raise ValueError("Cents must start at 0 and grow within the period")
+        self.cents = cents
+        self.period = float(period)
+        self.root = root
+        self.freq = freq
+        self.name = name
+        self.size = len(cents)
+        self._ext = np.append(cents, period)                              # degree n = next period
+        self._mid = (self._ext[:-1] + self._ext[1:]) / 2
+        for a in (self.cents, self._ext, self._mid):                      # shared by the cached tunings
+            a.flags.writeable = False
+
+    def __repr__(self) -> str:
+        return f"Tuning({self.name or self.size}, period={self.period:g}, root={self.root})"
+
+    def base(self, a4: float = 440.0) -> float:
+
+        """
+        Frequency of degree 0.
+        """
+
+        return self.freq if self.freq is not None else float(to_freq(self.root, a4))
+
+    def to_cents(self, notes) -> np.ndarray:
+
+        """
+        Cents above degree 0 of midinotes (any shape).
+
+        :Example:
+
+        >>> Tuning.just().to_cents([60, 64, 67, 72, 48]).tolist()
+        [0.0, 386.3137138648348, 701.9550008653874, 1200.0, -1200.0]
+        """
+
+        x = np.asarray(notes, dtype=np.float64) - self.root
+        octave, step = np.divmod(x, self.size)
+        deg = np.floor(step).astype(np.int64)
+        frac = step - deg
+        c = self._ext[deg]
+        if frac.any():
+            c += frac * (self._ext[deg + 1] - c)
+        return octave * self.period + c
+
+    def to_freq(self, notes, a4: float = 440.0) -> np.ndarray:
+
+        """
+        Frequencies of midinotes (any shape).
+        """
+
+        return self.base(a4) * np.exp2(self.to_cents(notes) / 1200)
+
+    def from_freq(self, freqs, a4: float = 440.0) -> np.ndarray:
+
+        """
+        Midinote of the nearest degree of each frequency (any shape).
+
+        The cents are reduced to one period and placed among the midpoints between
+        the degrees with ``np.searchsorted``.
+
+        :Example:
+
+        >>> Tuning.edo(24).from_freq([261.63, 269.3, 277.2]).tolist()
+        [60, 61, 62]
+        """
+
+        c = 1200 * np.log2(np.asarray(freqs, dtype=np.float64) / self.base(a4))
+        octave = np.floor(c / self.period)
+        deg = np.searchsorted(self._mid, c - octave * self.period)       # n = degree 0 of the next period
+        return (self.root + octave.astype(np.int64) * self.size + deg).astype(np.int64)
+
+    @staticmethod
+    @lru_cache(maxsize=64)
+    def edo(n: int = 12, period: float = 1200.0, root: int = 60) -> Tuning:
+
+        """
+        ``n`` equal divisions of the period (cached).
+        """
+
+        return Tuning(np.arange(n) * period / n, period, root, name=f"{n}-EDO")
+
+    @staticmethod
+    @lru_cache(maxsize=64)
+    def just(ratios: tuple = ('1/1', '16/15', '9/8', '6/5', '5/4', '4/3', '45/32', '3/2', '8/5', '5/3', '9/5', '15/8'),
+             period: str = '2/1', root: int = 60) -> Tuning:
+
+        """
+        Tuning from frequency ratios (cached). Defaults to 5-limit just intonation on 12 degrees.
+        """
+
+        cents = [1200 * np.log2(float(Fraction(r))) for r in ratios]
+        return Tuning(cents, 1200 * np.log2(float(Fraction(period))), root, name="just")
+
+    @staticmethod
+    def from_scl(source: str, root: int = 60, freq: float | None = None) -> Tuning:
+
+        """
+        Tuning from a Scala ``.scl`` file or its text.
+
+        Lines starting with ``!`` are comments; then come a description, the number
+        of degrees, and one degree per line: cents when it contains a ``.``, a ratio
+        otherwise. The last degree is the period. Files are cached by path and
+        modification time.
+
+        :param source: Path or text of the file.
+        :type source: str
+        :raises ValueError: If the file is malformed.
+
+        :Example:
+
+        >>> t = Tuning.from_scl('! x.scl\\n!\\nPentatonic\\n 5\\n!\\n 200.0\\n 400.0\\n 3/2\\n 1800/1000\\n 2\\n')
+        >>> t.name, t.cents.round(1).tolist(), t.period
+        ('Pentatonic', [0.0, 200.0, 400.0, 702.0, 1017.6], 1200.0)
+        """
+
+        if '\n' not in source and os.path.exists(source):
+            return _scl_file(os.path.abspath(source), os.path.getmtime(source), root, freq)
+        return _parse_scl(source, root, freq)
+
+@lru_cache(maxsize=64)
+def _scl_file(path: str, mtime: float, root: int, freq: float | None) -> Tuning:
+    with open(path, encoding='latin-1') as f:
+        return _parse_scl(f.read(), root, freq)
+
+def _parse_scl(text: str, root: int, freq: float | None) -> Tuning:
+    lines = [l.strip() for l in text.splitlines() if not l.startswith('!')]
+    try:
+        name, count = lines[0], int(lines[1].split()[0])
+        values = []
+        for line in lines[2:2 + count]:
+            token = line.split()[0]
+            values.append(float(token) if '.' in token else 1200 * np.log2(float(Fraction(token))))
+    except (IndexError, ValueError, ZeroDivisionError) as e:
+        raise ValueError(f"Malformed .scl data: {e}") from None
+    if len(values) != count or not count:
+        raise ValueError(f"Malformed .scl data: {count} degrees declared, {len(values)} found")
+    return Tuning([0.0] + values[:-1], values[-1], root, freq, name or None)
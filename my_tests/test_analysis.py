@@ -0,0 +1,74 @@
+import os, tempfile, wave
+import numpy as np
+from musicnpy.analysis import read_wav, find_peaks, iter_peaks, frame_psets, chord_sequence
+
+# Analisi spettrale (user-040): sinusoidi note --> frequenze, livelli e accordi
+
+tmp = tempfile.mkdtemp()
+RATE = 22050
+
+def scrivi(name, x, width=2, channels=1):
+    '''x in [-1, 1), stesso segnale su ogni canale'''
+    x = np.asarray(x)[:, None].repeat(channels, axis=1)
+    if width == 1:
+        data = np.clip(np.rint(x * 128 + 128), 0, 255).astype(np.uint8)
+    else:
+        big = 2 ** (8 * width - 1)
+        data = np.clip(np.rint(x * big), -big, big - 1).astype({2: '<i2', 4: '<i4'}[width])
+    path = os.path.join(tmp, name)
+    with wave.open(path, 'wb') as w:
+        w.setnchannels(channels)
+        w.setsampwidth(width)
+        w.setframerate(RATE)
+        w.writeframes(data.tobytes())
+    return path
+
+def sine(freqs, secs, amp=0.2):
+    t = np.arange(int(secs * RATE)) / RATE
+    return sum(amp * np.sin(2 * np.pi * f * t) for f in freqs)
+
+mtof = lambda m: 440 * 2 ** ((np.asarray(m) - 69) / 12)
+
+# find_peaks contro un ciclo esplicito
+rng = np.random.default_rng(0)
+mag = rng.uniform(-80, 0, (40, 64))
+bins, level = find_peaks(mag, n=4, threshold=-20, floor=-60)
+for row, b in zip(mag, bins):
+    peaks = [k for k in range(1, 63) if row[k] > row[k - 1] and row[k] >= row[k + 1] and row[k] > -60]
+    peaks = [k for k in peaks if row[k] >= max(row[peaks]) - 20]
+    peaks = sorted(peaks, key=lambda k: -row[k])[:4]
+    got = [int(round(x)) for x in b[np.isfinite(b)]]
+    assert all(abs(g - k) <= 1 for g, k in zip(got, peaks)) and len(got) == len(peaks)
+
+# frequenza e livello di una sinusoide (anche 8 e 32 bit, stereo)
+for width, channels in ((2, 1), (1, 1), (4, 2)):
+    path = scrivi(f's{width}{channels}.wav', sine([440.0, 1234.5], 1, 0.25), width, channels)
+    data, rate = read_wav(path)
+    assert rate == RATE and data.shape == (RATE, channels) and not data.flags.writeable
+    for times, freqs, levels in iter_peaks(path, n=3):
+        assert np.allclose(np.sort(freqs[:, :2], axis=1), [440.0, 1234.5], atol=1.0), freqs[:3]
+        assert np.allclose(levels[:, :2], 20 * np.log10(0.25), atol=0.5), levels[:3]
+        assert np.isnan(freqs[:, 2]).all()
+
+# chunk e workers non cambiano il risultato; tempi delle finestre
+path = scrivi('lungo.wav', sine([300.0], 3) + sine([650.0], 3, 0.05))
+ref = [np.concatenate(x) for x in zip(*iter_peaks(path, chunk=256))]
+assert np.allclose(ref[0], np.arange(len(ref[0])) * 1024 / RATE)
+assert len(ref[0]) == (3 * RATE - 4096) // 1024 + 1
+for chunk, workers in ((7, 1), (5, 3), (1000, 2)):
+    got = [np.concatenate(x) for x in zip(*iter_peaks(path, chunk=chunk, workers=workers))]
+    assert all(np.array_equal(a, b, equal_nan=True) for a, b in zip(ref, got)), (chunk, workers)
+
+# silenzio --> insiemi vuoti; file troppo corto --> nessuna finestra
+assert all(len(p) == 0 for _, p in frame_psets(scrivi('zero.wav', np.zeros(RATE))))
+assert list(iter_peaks(scrivi('corto.wav', np.zeros(100)))) == []
+
+# accordi: do maggiore poi fa maggiore (sinusoidi pure)
+x = np.concatenate((sine(mtof([60, 64, 67]), 1.5), sine(mtof([65, 69, 72]), 1.5)))
+seq = chord_sequence(scrivi('accordi.wav', x))
+assert seq[0][2] == (60, 64, 67) and seq[-1][2] == (65, 69, 72), seq
+assert seq[0][0] == 0 and seq[0][1] < 1.5 and abs(seq[-1][0] - 1.5) < 0.1, seq     # cambio a 1.5 s
+assert all(a[0] + a[1] <= b[0] + 1e-9 for a, b in zip(seq, seq[1:]))
+t, p = next(frame_psets(scrivi('la.wav', sine([440.0], 1))))
+assert t == 0 and np.allclose(p.vals, [69], atol=0.02)
+print("analysis: ok")
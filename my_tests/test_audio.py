@@ -0,0 +1,56 @@
+import os, tempfile, wave
+import numpy as np
+from musicnpy.audio import render_audio, polyphony, RELEASE
+
+# Sintesi audio (user-039): WAV leggibile, durata, frequenze, nessun clipping,
+# risultato indipendente da block e workers
+
+tmp = tempfile.mkdtemp()
+
+def leggi(path):
+    with wave.open(path) as w:
+        assert (w.getnchannels(), w.getsampwidth()) == (1, 2)
+        return np.frombuffer(w.readframes(w.getnframes()), dtype='<i2').astype(np.float64) / 32768, w.getframerate()
+
+# polifonia contro la forza bruta
+rng = np.random.default_rng(0)
+for _ in range(50):
+    s = rng.integers(0, 50, 20)
+    e = s + rng.integers(1, 20, 20)
+    bf = max(((s <= t) & (e > t)).sum() for t in range(80))
+    assert polyphony(s, e) == bf
+assert polyphony(np.array([], dtype=int), np.array([], dtype=int)) == 0
+
+# la69 = 440 Hz per 1 secondo (tempo 60, semiminima), una pausa, di nuovo la69
+rate, rel = 8000, int(RELEASE * 8000)
+path = render_audio(os.path.join(tmp, 'la'), [69, -1, 69], [4], [100], rate=rate)
+x, r = leggi(path)
+assert r == rate and len(x) == 3 * rate + rel, len(x)        # fino al release dell'ultima nota
+spec = np.abs(np.fft.rfft(x[:rate] * np.hanning(rate)))
+assert abs(np.argmax(spec) - 440) <= 1, np.argmax(spec)       # 1 Hz per bin
+assert np.abs(x[rate + rel + 1:2 * rate]).max() == 0, "silenzio durante la pausa"
+assert np.abs(x[2 * rate:2 * rate + 100]).max() > 0
+assert np.abs(x).max() < 0.9 + 1e-3
+
+# accordo denso forte: mai oltre il fondo scala
+x, _ = leggi(render_audio(os.path.join(tmp, 'forte'), [[40, 52, 55, 60, 64, 67, 72]], [2], [127], rate=rate))
+assert np.abs(x).max() <= 0.9 + 1e-3
+
+# block e workers non cambiano i campioni
+note = ([60, 62, [64, 67], -1, 65], [48, 43, 'mod'])
+dur = ([8, 8, 4, 8, 8], [4, 2])
+vel = ([40, 90], [70])
+base = open(render_audio(os.path.join(tmp, 'a'), note, dur, vel, rate=rate), 'rb').read()
+for block, workers in ((1000, 1), (777, 2), (65536, 3)):
+    p = render_audio(os.path.join(tmp, f'b{block}'), note, dur, vel, rate=rate, block=block, workers=workers)
+    assert open(p, 'rb').read() == base, (block, workers)
+
+# tempo doppio: metà dei campioni (più il release)
+x1, _ = leggi(render_audio(os.path.join(tmp, 't1'), [60, 62], [4], rate=rate))
+x2, _ = leggi(render_audio(os.path.join(tmp, 't2'), [60, 62], [4], rate=rate, tempo=120))
+assert len(x1) - int(RELEASE * rate) == 2 * (len(x2) - int(RELEASE * rate))
+
+# solo pause: file valido e vuoto
+x, _ = leggi(render_audio(os.path.join(tmp, 'vuoto.wav'), [-1], [4]))
+assert len(x) == 0
+print("audio: ok")
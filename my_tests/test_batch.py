@@ -0,0 +1,44 @@
+import os, tempfile
+from musicnpy.topyly import Staff, _Cache, render_batch, ly_failed
+
+# Compilazione in batch (user-027): lilypond non serve, i risultati in cache sono
+# preparati a mano e senza lilypond nel PATH ogni compilazione fallisce
+
+tmp   = tempfile.mkdtemp()
+cache = _Cache(os.path.join(tmp, 'cache'))
+
+pronto = Staff([60, 62, 64], filename=os.path.join(tmp, 'pronto'), cache=cache)
+pronto.write_ly()
+with open(pronto.filename + '.pdf', 'wb') as f:                # compilazione simulata
+    f.write(b'pdf')
+cache.put(pronto.key, pronto.filename, pronto.since)
+
+ly_path = os.environ['PATH']
+os.environ['PATH'] = ''                                      # lilypond non trovato
+try:
+    hit  = Staff([60, 62, 64], filename=os.path.join(tmp, 'h'), cache=cache)
+    with open(hit.filename + '.png', 'wb') as f:             # resto di una compilazione precedente
+        f.write(b'png vecchio')
+    miss = Staff([80], filename=os.path.join(tmp, 'm'), cache=cache)
+    solo = Staff([81], filename=os.path.join(tmp, 's'))      # senza cache
+    res  = render_batch([miss, hit, solo], chunk=1, workers=2)
+finally:
+    os.environ['PATH'] = ly_path
+
+# stesso ordine degli input, errori riportati senza eccezioni
+assert [r['score'] for r in res] == [miss, hit, solo]
+assert res[0]['files'] == [] and res[0]['error'], "un errore di lilypond deve essere riportato"
+assert res[2]['files'] == [] and res[2]['error']
+# hit: solo i files copiati dalla cache, non il png rimasto
+assert res[1]['files'] == [hit.filename + '.pdf'] and res[1]['error'] is None, res[1]['files']
+assert os.path.exists(miss.filename + '.ly') and os.path.exists(solo.filename + '.ly')
+
+try:
+    render_batch([Staff([60], filename=os.path.join(tmp, 'z')), Staff([62], filename=os.path.join(tmp, 'z'))])
+    raise AssertionError("filename duplicati non segnalati")
+except ValueError as e:
+    assert 'duplicati' in str(e)
+
+assert ly_failed('fatal error: failed files: "a.ly" "dir/b.ly"\n') == {'a.ly', 'dir/b.ly'}
+assert ly_failed('Success: compilation successfully completed\n') == set()
+print("render_batch: ok")
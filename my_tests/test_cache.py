@@ -0,0 +1,64 @@
+import os, tempfile
+from musicnpy.topyly import Staff, _Cache
+
+# Cache di compilazione (user-026): lilypond non serve, la compilazione è simulata
+# scrivendo a mano i files di output e salvandoli con cache.put
+
+tmp   = tempfile.mkdtemp()
+cache = _Cache(os.path.join(tmp, 'cache'), max_size=1500 / 2**20)   # 1500 bytes
+
+def compila(staff, data):
+    '''Simula lilypond: scrive filename.pdf e lo salva in cache'''
+    with open(staff.filename + '.pdf', 'wb') as f:
+        f.write(data)
+    cache.put(staff.key, staff.filename, staff.since)
+
+def leggi(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+# miss --> hit
+a = Staff([60, 62, 64], filename=os.path.join(tmp, 'a'), cache=cache)
+assert a.write_ly() is False, "primo write_ly deve essere un miss"
+compila(a, b'A' * 600)
+
+b = Staff([60, 62, 64], filename=os.path.join(tmp, 'b'), cache=cache)
+assert b.write_ly() is True, "stesso sorgente: deve essere un hit"
+assert leggi(b.filename + '.pdf') == b'A' * 600
+assert os.stat(b.filename + '.pdf').st_nlink == 1, "i files in cache vanno copiati, mai collegati"
+assert b.restored == [b.filename + '.ly', b.filename + '.pdf'], b.restored
+assert cache.get('0' * 64, os.path.join(tmp, 'nessuno')) == []
+
+# senza cache un hard link dell'utente non viene toccato
+u = Staff([50], filename=os.path.join(tmp, 'u'))
+with open(u.filename + '.pdf', 'wb') as f:
+    f.write(b'mio')
+os.link(u.filename + '.pdf', os.path.join(tmp, 'copia.pdf'))
+u.write_ly()
+assert os.path.exists(u.filename + '.pdf') and os.stat(u.filename + '.pdf').st_nlink == 2
+
+# regressione: riscrivere il file di lavoro non deve toccare la cache
+with open(b.filename + '.pdf', 'wb') as f:
+    f.write(b'corrotto')
+c = Staff([60, 62, 64], filename=os.path.join(tmp, 'c'), cache=cache)
+assert c.write_ly() is True
+assert leggi(c.filename + '.pdf') == b'A' * 600, "la cache è stata modificata dal file di lavoro"
+
+# sorgente, formato o versione diversi --> miss
+assert Staff([60, 62, 65], filename=os.path.join(tmp, 'd'), cache=cache).write_ly() is False
+assert Staff([60, 62, 64], filename=os.path.join(tmp, 'e'), format='png', cache=cache).write_ly() is False
+assert Staff([60, 62, 64], filename=os.path.join(tmp, 'f'), version='2.22.0', cache=cache).write_ly() is False
+
+# eviction LRU: 3 elementi da 600 bytes con max_size 1500 --> resta posto per due
+entry = lambda s: os.path.join(cache.path, s.key)
+x = Staff([70], filename=os.path.join(tmp, 'x'), cache=cache)
+x.write_ly()
+compila(x, b'X' * 600)                                       # cache: a, x
+os.utime(entry(x), (1, 1))                                   # x è il meno recente
+assert Staff([60, 62, 64], filename=os.path.join(tmp, 'g'), cache=cache).write_ly()   # usa a (LRU)
+y = Staff([71], filename=os.path.join(tmp, 'y'), cache=cache)
+y.write_ly()
+compila(y, b'Y' * 600)                                       # 1800 bytes --> elimina x
+assert not os.path.isdir(entry(x)), "l'elemento meno recente deve essere eliminato"
+assert os.path.isdir(entry(a)) and os.path.isdir(entry(y))
+print("cache: ok")
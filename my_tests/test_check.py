@@ -0,0 +1,49 @@
+from musicnpy.topyly import _Voice, Staff, Score, check, check_staff, validate, TUPLETS
+
+# Validazione (user-033): tutti gli errori insieme, con la loro posizione,
+# prima di costruire stringhe o scrivere files
+
+err = check([60, 200, [61, 'x']], [4, 3, [4, [1, 1]]], [64, 300], ['>', 'boh'])
+assert err == [
+    "note[1]: 200 non è in PCHS (0-127, -1 pausa, -2 spazio)",
+    "note[2][1]: 'x' non è in PCHS (0-127, -1 pausa, -2 spazio)",
+    "dur[1]: 3 non è in DURS",
+    f"dur[2]: somma delle suddivisioni 2 non supportata {sorted(TUPLETS)}",
+    "vel[1]: 300 fuori da 0-127",
+    "exp[1]: 'boh' non è in EXPR",
+], err
+
+# input corretti (anche con 'mod', 'zero', 00, pause e spazi)
+assert check([60, [64, 67], -1, -2, 'mod'], [4, [4, [1, 1, 1]], 0, 'zero'], [64, 00, 'mod'], ['>', 00, 'zero']) == []
+assert check(60) == [] and check([60.0]) == []
+assert check([60.5]) == ["note[0]: 60.5 non è in PCHS (0-127, -1 pausa, -2 spazio)"]
+assert check([True]) != [], "i bool non sono altezze"
+assert check([60], [[4, [1, 'a']]]) == ["dur[0]: [4, [1, 'a']] deve essere [durata, [suddivisioni]]"]
+
+# più voci: la posizione indica la voce
+err = check_staff(([60, 61], [62, 500]), ([4], [4, 7]))
+assert err == ["voce 1, note[1]: 500 non è in PCHS (0-127, -1 pausa, -2 spazio)",
+               "voce 1, dur[1]: 7 non è in DURS"], err
+
+try:
+    Staff(([60, 61], [62, 500]), ([4], [4]))
+    raise AssertionError("Staff deve validare tutte le voci")
+except ValueError as e:
+    assert str(e) == "1 errori:\n  voce 1, note[1]: 500 non è in PCHS (0-127, -1 pausa, -2 spazio)", e
+try:
+    _Voice([60, 128], [4, 5])
+    raise AssertionError("_Voice deve validare gli argomenti")
+except ValueError as e:
+    assert str(e).startswith("2 errori:")
+try:
+    Score.from_parts([{'note': [60]}, {'note': [61], 'vel': [200]}])
+    raise AssertionError("from_parts deve validare prima di avviare i processi")
+except ValueError as e:
+    assert "staff 1, vel[0]: 200 fuori da 0-127" in str(e)
+try:
+    validate(["a", "b"])
+    raise AssertionError("validate deve sollevare ValueError")
+except ValueError as e:
+    assert str(e) == "2 errori:\n  a\n  b"
+validate([])
+print("validazione: ok")
@@ -0,0 +1,62 @@
+import numpy as np
+from musicnpy.topyly import _Voice, Staff, Score, events, window, EXPR_KEYS, TPQ
+
+# Tabella degli eventi (user-029): _Voice.events ed events() usano la stessa
+# normalizzazione di _Map, quindi descrivono le stesse note del lilypond
+
+casi = [
+    ([60, 64, 67, 72], [8, 16, 16, 4], [60, 80, 00, 90], ['.', '.', '.', 00]),
+    ([60, [64, 72, 75], 67, -1, 71, 'mod'], [8, 16, 16, 4, 'mod'], [60, 'zero'], ['>', 'zero']),
+    ([60, 64, 67, 72, 67, 76, 67, 69, 71], [8, 16, 16, [4, [2, 1, 2]], 'mod'], [60, 00, 00, 90, 'zero'],
+     ['cresc', 00, 00, 'dim', 00, 00, 00, 'end']),
+    ([60, 64, 67, [72, 67, 76], 67, -1, 71, 82, 78, 60, 61], [8, 16, 16, [4, [1, 3, 3, 3, 4]], 'mod'],
+     [60, 00, 00, 90, 00, 00, 00, 00, 54, 'zero'], None),
+    ([61, -2, 63], [4, [8, [1, 1, 1]], 'zero'], None, None),
+]
+
+for note, dur, vel, exp in casi:
+    v  = _Voice(note, dur, vel, exp)
+    ev = events(note, dur, vel, exp)
+    assert (v.events == ev).all(), f"_Voice.events diverso da events() per {note}"
+    assert len(np.unique(ev['chord'])) == len(v.note), "una riga (o un accordo) per ogni simbolo di _Map"
+    assert (np.diff(ev['onset']) >= 0).all() and (ev['dur'] > 0).all()
+    # le note di un accordo condividono onset, durata, velocity ed espressione
+    for k in ('onset', 'dur', 'vel', 'exp'):
+        same = np.diff(ev['chord']) == 0
+        assert (np.diff(ev[k])[same] == 0).all(), k
+
+# valori attesi: durate in ticks, 'mod' ripete, 'zero' mantiene, 00 = valore precedente
+ev = events([60, 62, 64, 65], [4, 8, 'mod'], [50, 00, 70, 'zero'])
+assert ev['onset'].tolist() == [0, TPQ, TPQ * 3 // 2, TPQ * 5 // 2]
+assert ev['dur'].tolist() == [TPQ, TPQ // 2, TPQ, TPQ // 2]
+assert ev['vel'].tolist() == [50, 50, 70, 70]
+ev = events([60, [64, 67], -1], [[4, [1, 1, 1]]])             # terzina
+assert ev['dur'].tolist() == [TPQ // 3] * 4 and ev['pitch'].tolist() == [60, 64, 67, -1]
+assert ev['chord'].tolist() == [0, 1, 1, 2]
+assert EXPR_KEYS[events([60], [4], None, ['>'])['exp'][0]] == '>'
+
+# gli argomenti non vengono modificati
+note, dur = [60, 'mod'], [8, 4, 'zero']
+events(note, dur)
+assert note == [60, 'mod'] and dur == [8, 4, 'zero']
+
+# finestra temporale
+ev = events(list(range(60, 68)), [8])
+assert window(ev, TPQ, 2 * TPQ)['pitch'].tolist() == [62, 63]
+
+# più voci e più righi: colonne voice e staff
+a = Staff(([60, 62, 64], [48, 50]), ([4], [2]))
+b = Staff([72, 74], 8)
+s = Score((a, b))
+assert s.events['voice'].tolist() == [0, 0, 0, 1, 1, 0, 0]
+assert s.events['staff'].tolist() == [0, 0, 0, 0, 0, 1, 1]
+assert (a.events['staff'] == 0).all(), "Score non deve modificare la tabella dello Staff"
+
+# uno staff passato come stringa: la tabella sarebbe incompleta --> errore
+s = Score((a, b.out))
+try:
+    s.events
+    raise AssertionError("Score.events deve rifiutare gli staff stringa")
+except ValueError as e:
+    assert 'staff [1]' in str(e)
+print("events: ok")
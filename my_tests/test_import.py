@@ -0,0 +1,24 @@
+import subprocess, sys
+
+# Tempo di avvio: import musicnpy rispetto al solo import numpy (minimo di 5 esecuzioni)
+code = '''
+import time
+t0 = time.perf_counter()
+import numpy
+t1 = time.perf_counter()
+import musicnpy, sys
+t2 = time.perf_counter()
+print(t1 - t0, t2 - t1, 'musicnpy.topyly' in sys.modules)
+'''
+
+runs = []
+for _ in range(5):
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout.split()
+    runs.append((float(out[0]), float(out[1]), out[2] == 'True'))
+
+numpy_t = min(r[0] for r in runs)
+musicnpy_t = min(r[1] for r in runs)
+print(f"numpy: {numpy_t * 1000:.1f} ms  musicnpy: {musicnpy_t * 1000:.1f} ms")
+
+assert not any(r[2] for r in runs), "topyly non deve essere importato da 'import musicnpy'"
+assert musicnpy_t < 0.05, "import musicnpy troppo lento"
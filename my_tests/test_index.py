@@ -0,0 +1,38 @@
+import numpy as np
+from musicnpy.pcset import Index, catalog, to_mask, to_pcs, masks
+from musicnpy.data import PMod
+from musicnpy.pitch import Scale, Chord
+
+# Indice inverso dei modelli (user-042): confronto con la ricerca lineare su tutte le 4096 maschere
+
+for kind in ('chords', 'scales'):
+    models = getattr(PMod, kind)
+    idx = catalog(kind)
+    entries = [(name, root, to_mask([(root + i) for i in ints]))
+               for name, ints in models.items() for root in range(12)]             # ordine del catalogo, poi radice
+    for m in range(4096):
+        exact = [(n, r) for n, r, e in entries if e == m]
+        sup = [(n, r, bin(e).count('1')) for n, r, e in entries if e & m == m]
+        best = min((c for *_, c in sup), default=None)
+        smallest = [(n, r) for n, r, c in sup if c == best]
+        assert idx.exact(m) == exact, (kind, to_pcs(m))
+        assert idx.superset(m) == smallest and idx(m) == smallest and idx(m, superset=False) == exact, (kind, to_pcs(m))
+    # tag: la prima corrispondenza esatta, altrimenti il primo superset minimo
+    ms = np.arange(4096)
+    names, roots = idx.tag(ms)
+    for m in range(4096):
+        first = (idx.exact(m) or idx.superset(m) or [(None, -1)])[0]
+        assert (names[m], roots[m]) == first, (kind, m)
+
+assert catalog('chords') is catalog('chords'), "indice costruito una sola volta"
+
+# Scale/Chord.identify usano l'indice
+assert Chord.identify([64, 67, 71]) == [('min', 4)]
+assert ('maj', 2) in Chord.identify([62, 66, 69], superset=False)
+assert Scale.identify(Scale.new(PMod.maj, 62).values[:7], superset=False)[0] == Index(PMod.scales)(to_mask([2, 4, 6, 7, 9, 11, 1]), False)[0]
+
+# modelli piccoli scritti a mano
+idx = Index({'maj': [0, 4, 7], 'min': [0, 3, 7], 'dim': [0, 3, 6]})
+assert idx(to_mask([0, 3])) == [('maj', 8), ('min', 0), ('dim', 0), ('dim', 9)]     # catalogo, poi radice
+assert idx(to_mask([0, 1])) == [] and idx(0) != []
+print("index: ok")
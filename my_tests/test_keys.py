@@ -0,0 +1,62 @@
+import numpy as np
+from musicnpy import *
+from musicnpy.keys import KEYS, find_key, find_keys, iter_keys, histogram, correlate
+
+# Tonalita' per finestre (user-046): find_keys contro un calcolo finestra per
+# finestra, iter_keys contro find_keys su tutto il flusso, coda compresa
+
+def finestre(n, window, hop):
+    if n == 0:
+        return []
+    starts = list(range(0, max(n - window, 0) + 1, hop))
+    if starts[-1] + window < n and starts[-1] + hop < n:
+        starts.append(starts[-1] + hop)                      # coda dopo l'ultima finestra piena
+    return starts
+
+# tonalita' note
+c, fs = [60, 62, 64, 65, 67, 69, 71, 72], [66, 68, 70, 71, 73, 75, 77, 78]
+assert KEYS[find_key(c)] == 'c major'
+assert KEYS[find_key(fs)] == 'fs major'
+assert KEYS[find_key([57, 59, 60, 62, 64, 65, 68, 69], [4, 1, 2, 1, 3, 1, 1, 4])] == 'a minor'
+assert find_key([]) == -1 and find_key([-1, -1]) == -1, "senza altezze: -1"
+assert [KEYS[k] for k in find_keys(c + fs, window=8, hop=8)['key']] == ['c major', 'fs major']
+
+rng = np.random.default_rng(0)
+for n in list(range(0, 40)) + [97, 200]:
+    p = rng.integers(40, 90, n)
+    p[rng.random(n) < 0.1] = -1                              # pause: saltate
+    w = rng.integers(1, 5, n).astype(float)                  # pesi interi: somme esatte
+    for window, hop in ((16, 4), (8, 8), (8, 3), (5, 1), (4, 6)):
+        out = find_keys(p, w, window, hop)
+        ok = p >= 0
+        q, v = p[ok], w[ok]
+        starts = finestre(len(q), window, hop)
+        assert out['start'].tolist() == starts, (n, window, hop, out['start'].tolist(), starts)
+        for s, k, r in zip(starts, out['key'].tolist(), out['r'].tolist()):
+            h = histogram(q[s:s + window], v[s:s + window])
+            cr = correlate(h)
+            if not cr.any():
+                assert k == -1, (n, window, hop, s, k)
+            else:                                            # a pari merito basta il massimo
+                assert np.isclose(cr[k], cr.max()) and np.isclose(r, cr.max()), (n, window, hop, s, k)
+
+        # lo stesso flusso a pezzi casuali, con e senza durate
+        for _ in range(5):
+            cuts = np.sort(rng.integers(0, n + 1, rng.integers(0, 6)))
+            chunks = [(p[a:b], w[a:b]) for a, b in zip([0, *cuts], [*cuts, n])]
+            got = list(iter_keys(chunks, window, hop))
+            assert [s for s, _, _ in got] == out['start'].tolist(), (n, window, hop, cuts, got)
+            assert np.allclose([r for _, _, r in got], out['r']), (n, window, hop, cuts)
+            assert all(k == o or np.isclose(r, o_r) for (_, k, r), o, o_r in zip(got, out['key'], out['r'])), (n, window, hop, cuts)
+        plain = list(iter_keys([p[a:a + 7] for a in range(0, n, 7)], window, hop))
+        unit = find_keys(p, None, window, hop)
+        assert [s for s, _, _ in plain] == unit['start'].tolist(), (n, window, hop)
+        assert np.allclose([r for _, _, r in plain], unit['r']), (n, window, hop)
+
+# la coda parziale arriva solo alla fine del flusso
+g = iter_keys([c + fs[:3]], window=8, hop=4)
+assert [s for s, _, _ in g] == [0, 4]
+assert list(iter_keys([], window=8)) == []
+assert [(s, KEYS[k]) for s, k, _ in iter_keys([[60, 62, 64], [65, 67]], window=8)] == [(0, 'c major')]
+
+print("keys: ok")
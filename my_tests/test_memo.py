@@ -0,0 +1,54 @@
+import copy
+import numpy as np
+from musicnpy.topyly import _Voice, Staff, MEMO, _Memo
+
+# Memoizzazione dei frammenti (user-034)
+
+MEMO.clear()
+note = [60, [64, 67], 72, 'mod']
+dur  = [8, [4, [1, 1, 1]], 'mod']
+vel  = [60, 00, 'zero']
+exp  = ['>', 00]
+orig = copy.deepcopy((note, dur, vel, exp))
+
+a = _Voice(note, dur, vel, exp)                              # miss
+assert (note, dur, vel, exp) == orig, "un miss non deve modificare gli argomenti"
+b = _Voice(note, dur, vel, exp)                              # hit
+assert (note, dur, vel, exp) == orig, "un hit non deve modificare gli argomenti"
+assert len(MEMO.data) == 1
+assert b.outstring == a.outstring and (b.events == a.events).all()
+
+# mai condividere dati tra istanze (né con la memo)
+assert b.events is not a.events and b.note is not a.note
+b.events['pitch'] += 1
+b.note[0] = 'x'
+c = _Voice(note, dur, vel, exp)
+assert (c.events == a.events).all() and c.note == a.note, "la memo è stata modificata da un'istanza"
+
+# chiave: scalari numpy e python sono lo stesso contenuto
+assert MEMO.key('voice', [np.int64(60), np.float64(62.0)], [np.int64(4)]) == MEMO.key('voice', [60, 62.0], [4])
+d = _Voice([np.int64(i) if type(i) is int else i for i in note], dur, vel, exp)
+assert len(MEMO.data) == 1 and d.outstring == a.outstring
+
+# invalidazione: contenuto diverso --> nuovo frammento
+e = _Voice([61, [64, 67], 72, 'mod'], dur, vel, exp)
+assert len(MEMO.data) == 2 and e.outstring != a.outstring
+assert _Voice([61, [64, 67], 72, 'mod'], dur, vel, exp, key='bf').outstring != e.outstring   # cs --> df: anche la tonalità
+
+# modificando una voce di uno Staff si rigenerano solo quella voce e lo Staff
+MEMO.clear()
+Staff(([60, 62, 64], [48, 50]), ([4], [2]))
+assert len(MEMO.data) == 3                                   # 2 voci + staff
+Staff(([60, 62, 64], [48, 51]), ([4], [2]))
+assert len(MEMO.data) == 5                                   # + 1 voce + staff
+
+# dimensione massima: eliminati i meno usati di recente
+m = _Memo(size=2)
+class X: pass
+for k in ('a', 'b'):
+    x = X(); x.v = [k]; m.store(x, k)
+m.restore(X(), 'a')                                          # 'a' usato di recente
+x = X(); x.v = ['c']; m.store(x, 'c')
+assert list(m.data) == ['a', 'c']
+MEMO.clear()
+print("memo: ok")
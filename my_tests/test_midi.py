@@ -0,0 +1,50 @@
+import os, tempfile
+import numpy as np
+from musicnpy.topyly import Staff, Score
+from musicnpy.midi import write_midi, table
+from musicnpy.reader import read_midi
+
+# Writer MIDI (user-028): scrittura e rilettura devono restituire la stessa tabella degli eventi
+# (senza pause; gli id degli accordi vengono rinumerati dal reader)
+
+tmp = tempfile.mkdtemp()
+note = ([60, [64, 67], -1, 72, 71, 'mod'], [48, 50, 52])
+dur  = ([4, 8, 8, [4, [1, 1, 1]], 2], [2, 4, 4])
+vel  = ([60, 80, 100, 30], [90])
+
+def uguali(a, b):
+    a = a[a['pitch'] >= 0]
+    for k in ('onset', 'dur', 'pitch', 'vel', 'voice'):
+        assert a[k].tolist() == b[k].tolist(), f"campo {k} diverso dopo la rilettura"
+    for v in np.unique(a['voice']):                          # stesse note negli stessi accordi
+        ca, cb = a['chord'][a['voice'] == v], b['chord'][b['voice'] == v]
+        assert (np.diff(ca) == 0).tolist() == (np.diff(cb) == 0).tolist()
+
+ev = table(note, dur, vel)
+for fmt in (0, 1):
+    path = os.path.join(tmp, f'f{fmt}.mid')
+    data = write_midi(path, note, dur, vel, format=fmt)
+    assert data[:4] == b'MThd' and data[9] == fmt
+    uguali(ev, read_midi(path))
+    assert data == open(path, 'rb').read()
+    ntrk = data.count(b'MTrk')
+    assert ntrk == (1 if fmt == 0 else 3) and int.from_bytes(data[10:12], 'big') == ntrk   # tempo + una traccia per voce
+    assert data.count(b'\xff\x51\x03') == 1                 # un solo evento di tempo
+
+# da Staff e Score (colonna staff conservata come voce: un canale per voce)
+staff = Staff(note, dur, vel)
+write_midi(os.path.join(tmp, 'staff'), staff)
+uguali(staff.events, read_midi(os.path.join(tmp, 'staff.mid')))
+
+score = Score((staff, Staff([55, 57], 4)))
+back  = read_midi(write_midi(os.path.join(tmp, 'score.mid'), score))
+assert len(back) == (score.events['pitch'] >= 0).sum()
+assert sorted(back['pitch'].tolist()) == sorted(score.events['pitch'][score.events['pitch'] >= 0].tolist())
+
+# tempo diverso: stessi ticks
+uguali(ev, read_midi(write_midi(os.path.join(tmp, 'lento.mid'), note, dur, vel, tempo=37)))
+
+# nome senza estensione: aggiunge .mid
+write_midi(os.path.join(tmp, 'senza'), [60])
+assert os.path.exists(os.path.join(tmp, 'senza.mid'))
+print("midi: ok")
@@ -0,0 +1,83 @@
+import os, tempfile
+import xml.etree.ElementTree as ET
+from musicnpy.musicxml import write_musicxml, iter_musicxml
+from musicnpy.topyly import events
+
+# MusicXML (user-036): il documento si legge con xml.etree e in ogni misura
+# le durate di ogni voce (e la posizione con <backup>) sommano all'indicazione di tempo
+
+tmp = tempfile.mkdtemp()
+STEP = {'C': 0, 'D': 2, 'E': 4, 'F': 5, 'G': 7, 'A': 9, 'B': 11}
+
+def misure(part, voci):
+    '''Controlla le durate di ogni misura di una parte e restituisce le altezze lette, per voce'''
+    lette = {v: [] for v in range(1, voci + 1)}
+    for m in part.findall('measure'):
+        att = m.find('attributes')
+        if att is not None:
+            div = int(att.findtext('divisions'))
+            beats, beat_type = int(att.findtext('time/beats')), int(att.findtext('time/beat-type'))
+            span = div * 4 * beats // beat_type
+        pos, somma = 0, {}
+        for el in m:
+            if el.tag == 'backup':
+                pos -= int(el.findtext('duration'))
+                assert pos >= 0, "backup oltre l'inizio della misura"
+            elif el.tag == 'note' and el.find('chord') is None:
+                d, v = int(el.findtext('duration')), int(el.findtext('voice'))
+                somma[v] = somma.get(v, 0) + d
+                pos += d
+                assert pos <= span, f"misura {m.get('number')}: nota oltre la stanghetta"
+            if el.tag == 'note' and el.find('rest') is None:
+                p = el.find('pitch')
+                lette[int(el.findtext('voice'))].append(
+                    12 * (int(p.findtext('octave')) + 1) + STEP[p.findtext('step')] + int(p.findtext('alter') or 0))
+        assert set(somma) == set(lette), f"misura {m.get('number')}: voci {sorted(somma)}"
+        assert all(s == span for s in somma.values()), f"misura {m.get('number')}: {somma} invece di {span}"
+    return lette
+
+def altezze(n, d, v=None, e=None):
+    '''Altezze attese dalla tabella degli eventi (senza pause)'''
+    return [p for p in events(n, d, v, e)['pitch'].tolist() if p >= 0]
+
+# rigo a due voci in 3/4 (4 misure): terzine, accordi, pause, note a cavallo delle stanghette
+note = ([60, [64, 67], -1, 62, 71, 69, 67, 65, 64, 'mod'], [48, 43, 45, 41, 43, 36])
+dur  = ([4, 8, 8, [4, [1, 1, 1]], 2, 4, 4, 8, 8, 4, 2, 4], [4, 2, 2, 1, 2, 4])
+vel  = ([60, 90], [40])
+exp  = (['>', 00, '.'], None)
+path = write_musicxml(os.path.join(tmp, 'due'), note=note, dur=dur, vel=vel, exp=exp, key='bf', t_sig='3/4',
+                      clef='bass', i_name='Piano & voce')
+root = ET.parse(path).getroot()
+lette = misure(root.find('part'), 2)
+assert len(root.findall('part/measure')) == 4
+for v in range(2):
+    attese = altezze(note[v], dur[v], vel[v], exp[v])
+    # una nota legata oltre la stanghetta è scritta due volte: togliere le ripetizioni legate
+    el = [n for n in root.iter('note') if n.findtext('voice') == str(v + 1) and n.find('rest') is None]
+    scritte = [p for p, n in zip(lette[v + 1], el) if not any(t.get('type') == 'stop' for t in n.findall('tie'))]
+    assert scritte == attese, f"voce {v + 1}: {scritte} invece di {attese}"
+assert root.findtext('part-list/score-part/part-name') == 'Piano & voce'
+assert root.findtext('part/measure/attributes/key/fifths') == '-2'
+assert root.findtext('part/measure/attributes/clef/sign') == 'F'
+assert root.find('.//time-modification') is not None and root.find('.//tie') is not None
+
+# altri metri, più parti nello stesso documento
+parts = [dict(note=[60, 62, 64, 65, 67, 'mod'], dur=d, t_sig=t) for t, d in (
+    ('4/4', [8, 8, 4, [2, [1, 1, 1]], 4, 4, 2]),
+    ('6/8', [8, 4, [8, [1, 1, 1]], 4, 8, 2, 8]),
+    ('5/8', [8, 4, 4, 16, 16, 4, 8, 4, 4, 4]),
+)]
+parts.append(dict(note=([72, 74, 76, 77], [55]), dur=([4.0, 'mod'], [1]), t_sig='2/4'))
+path = write_musicxml(os.path.join(tmp, 'metri.xml'), *parts, title='Metri', composer='Io')
+root = ET.parse(path).getroot()
+assert root.findtext('work/work-title') == 'Metri' and len(root.findall('part')) == 4
+for p, part in zip(parts, root.findall('part')):
+    misure(part, 2 if type(p['note']) is tuple else 1)
+
+# streaming: i controlli avvengono prima del primo pezzo
+try:
+    next(iter_musicxml([{'note': [60]}, {'note': [300]}]))
+    raise AssertionError("input non valido accettato")
+except ValueError as e:
+    assert 'staff 1, note[0]: 300' in str(e)
+print("musicxml: ok")
@@ -0,0 +1,93 @@
+import itertools
+from collections import Counter
+import numpy as np
+from musicnpy.pcset import (NAMES, PRIME, CLASS, ICV, Z, COUNT, masks, to_mask, to_pcs, classify, forte,
+                            normal_form)
+from musicnpy.pitch import _PSet
+
+# Classi di insiemi (user-041): confronto con la tabella di Forte
+# (dati scritti qui, indipendenti da pcset._FORTE) e con la forza bruta
+
+# numero di classi (Tn/TnI) per cardinalità e coppie Z di Forte
+CLASSI = {0: 1, 1: 1, 2: 6, 3: 12, 4: 29, 5: 38, 6: 50, 7: 38, 8: 29, 9: 12, 10: 6, 11: 1, 12: 1}
+ZPAIRS = {('4-Z15', '4-Z29'), ('5-Z12', '5-Z36'), ('5-Z17', '5-Z37'), ('5-Z18', '5-Z38'),
+          ('6-Z3', '6-Z36'), ('6-Z4', '6-Z37'), ('6-Z6', '6-Z38'), ('6-Z10', '6-Z39'), ('6-Z11', '6-Z40'),
+          ('6-Z12', '6-Z41'), ('6-Z13', '6-Z42'), ('6-Z17', '6-Z43'), ('6-Z19', '6-Z44'), ('6-Z23', '6-Z45'),
+          ('6-Z24', '6-Z46'), ('6-Z25', '6-Z47'), ('6-Z26', '6-Z48'), ('6-Z28', '6-Z49'), ('6-Z29', '6-Z50'),
+          ('7-Z12', '7-Z36'), ('7-Z17', '7-Z37'), ('7-Z18', '7-Z38'), ('8-Z15', '8-Z29')}
+# vettori intervallari di Forte
+ICVS = {
+    '3-1': '210000', '3-2': '111000', '3-3': '101100', '3-4': '100110', '3-5': '100011', '3-6': '020100',
+    '3-7': '011010', '3-8': '010101', '3-9': '010020', '3-10': '002001', '3-11': '001110', '3-12': '000300',
+    '4-1': '321000', '4-2': '221100', '4-3': '212100', '4-4': '211110', '4-5': '210111', '4-6': '210021',
+    '4-7': '201210', '4-8': '200121', '4-9': '200022', '4-10': '122010', '4-11': '121110', '4-12': '112101',
+    '4-13': '112011', '4-14': '111120', '4-Z15': '111111', '4-16': '110121', '4-17': '102210',
+    '4-18': '102111', '4-19': '101310', '4-20': '101220', '4-21': '030201', '4-22': '021120',
+    '4-23': '021030', '4-24': '020301', '4-25': '020202', '4-26': '012120', '4-27': '012111',
+    '4-28': '004002', '4-Z29': '111111',
+    '5-1': '432100', '5-Z12': '222121', '5-Z36': '222121', '5-33': '040402', '5-35': '032140',
+    '6-1': '543210', '6-Z17': '322332', '6-Z43': '322332', '6-20': '303630', '6-32': '143250',
+    '6-35': '060603', '7-35': '254361', '8-28': '448444', '9-12': '666963',
+}
+PRIMI = {'3-11': [0, 3, 7], '4-Z15': [0, 1, 4, 6], '4-Z29': [0, 1, 3, 7], '5-35': [0, 2, 4, 7, 9],
+         '6-1': [0, 1, 2, 3, 4, 5], '6-32': [0, 2, 4, 5, 7, 9], '7-35': [0, 1, 3, 5, 6, 8, 10], '8-28': [0, 1, 3, 4, 6, 7, 9, 10]}
+
+# forza bruta: forma primaria = tupla minima (ordinata) tra trasposizioni e inversioni
+def primo(pcs):
+    forms = [tuple(sorted((s * p + t) % 12 for p in pcs)) for t in range(12) for s in (1, -1)]
+    return min(forms, key=lambda f: sum(1 << p for p in f))
+
+def icv(pcs):
+    v = [0] * 6
+    for a, b in itertools.combinations(pcs, 2):
+        d = min((a - b) % 12, (b - a) % 12)
+        v[d - 1] += 1
+    return v
+
+classi = {}
+for m in range(4096):
+    classi.setdefault(primo(to_pcs(m)), []).append(m)
+assert len(classi) == 224 == len(NAMES) == len(set(NAMES))
+assert Counter(len(p) for p in classi) == CLASSI
+assert Counter(int(n.split('-')[0]) for n in NAMES) == CLASSI
+
+for p, members in classi.items():
+    c = set(CLASS[members].tolist())
+    assert len(c) == 1 and PRIME[members[0]] == to_mask(p), f"{p}: classi {c}"
+    assert (ICV[members] == icv(p)).all(), p
+
+for name, v in ICVS.items():
+    assert ''.join(map(str, ICV[PRIME[CLASS == NAMES.index(name)][0]])) == v, name
+for name, p in PRIMI.items():
+    assert forte(np.array([to_mask(p)]))[0] == name, name
+
+# coppie Z: i nomi con Z sono esattamente quelli della tabella, e il partner è quello giusto
+assert {n for n in NAMES if 'Z' in n} == {n for pair in ZPAIRS for n in pair}
+for a, b in ZPAIRS:
+    ma = int(PRIME[CLASS == NAMES.index(a)][0])
+    mb = int(PRIME[CLASS == NAMES.index(b)][0])
+    assert Z[ma] == mb and Z[mb] == ma, (a, b)
+    assert (ICV[ma] == ICV[mb]).all()
+assert (Z[CLASS == NAMES.index('3-11')] == -1).all()
+
+# complementi: stessa posizione nella lista (7-10 da 5-2)
+for n in NAMES:
+    card, k = n.split('-')
+    if 7 <= int(card) <= 10:
+        m = int(PRIME[CLASS == NAMES.index(n)][0])
+        assert NAMES[CLASS[0xFFF ^ m]].replace('Z', '') == f"{12 - int(card)}-{k.replace('Z', '')}", n
+
+# forma normale contro la forza bruta: rotazione più compatta, poi più compatta a sinistra, poi prima più bassa
+rng = np.random.default_rng(0)
+for m in rng.integers(1, 4096, 300).tolist():
+    pcs = to_pcs(m)
+    rots = [pcs[i:] + pcs[:i] for i in range(len(pcs))]
+    key = lambda r: [(r[k] - r[0]) % 12 for k in range(len(r) - 1, 0, -1)] + [r[0]]
+    assert normal_form(m) == min(rots, key=key), (pcs, normal_form(m))
+
+# in batch come uno alla volta; _PSet usa le stesse tabelle
+chords = [rng.integers(36, 84, rng.integers(1, 7)).tolist() for _ in range(200)]
+r = classify(masks(chords))
+for c, cls, pr in zip(chords, r['cls'], r['prime']):
+    assert to_mask(c) == _PSet(c).mask and pr == to_mask(primo(to_pcs(to_mask(c)))) and NAMES[cls] == forte([to_mask(c)])[0]
+print("pcset: ok")
@@ -0,0 +1,68 @@
+import asyncio
+from musicnpy.player import Player, Sink, MemorySink
+from musicnpy.topyly import Staff
+
+# Player in tempo reale (user-035): messaggi, tempi, stop ed errori dei sink
+
+# ogni nota --> note on e note off, canali diversi per voce, tempi corretti
+sink = MemorySink()
+stats = Player(([60, 64, 67], [48]), sink, ([4], [2]), tempo=300).run()   # semiminima = 0.2 s
+msgs = [m for _, m in sink.messages]
+assert stats['count'] == len(msgs) == 8
+on  = [m for m in msgs if m[0] >> 4 == 0x9 and m[2] > 0]
+assert sorted(m[1] for m in on) == [48, 60, 64, 67]
+assert {m[0] & 0x0F for m in on if m[1] == 48} != {m[0] & 0x0F for m in on if m[1] == 60}, "un canale per voce"
+t0 = sink.messages[0][0]
+t  = {m[1]: s - t0 for s, m in sink.messages if m[0] >> 4 == 0x9 and m[2] > 0}
+attesi = {60: 0.0, 48: 0.0, 64: 0.2, 67: 0.4}
+assert all(abs(t[k] - attesi[k]) < 0.05 for k in attesi), t
+assert abs(stats['mean']) < 20, stats                             # ms di ritardo
+
+# da uno Staff: stesse note
+sink = MemorySink()
+Player(Staff([60, [64, 67], -1, 72], 8), sink, tempo=1200).run()
+assert sorted(m[1] for _, m in sink.messages if m[0] >> 4 == 0x9 and m[2] > 0) == [60, 64, 67, 72]
+
+# stop: run restituisce le statistiche e ogni canale riceve all-notes-off
+sink = MemorySink()
+p = Player(([60, 62, 64, 65], [48, 50]), sink, tempo=60)
+async def ferma():
+    task = asyncio.create_task(p.play())
+    await asyncio.sleep(0.3)
+    p.stop()
+    await task
+asyncio.run(ferma())
+last = [m for _, m in sink.messages][-2:]
+assert all(m[0] >> 4 == 0xB and m[1] == 123 for m in last), last
+assert p.stats['count'] < 12
+
+# cancellazione dall'esterno: run restituisce comunque le statistiche
+p = Player([60, 62], MemorySink(), tempo=60)
+async def cancella():
+    task = asyncio.create_task(p.play())
+    await asyncio.sleep(0.2)
+    task.cancel()
+    await task
+try:
+    asyncio.run(cancella())
+except asyncio.CancelledError:
+    pass
+assert p.stats['count'] >= 1
+
+# errori del sink propagati
+class Rotto(Sink):
+    def send(self, messages):
+        raise RuntimeError("porta chiusa")
+try:
+    Player([60], Rotto(), tempo=600).run()
+    raise AssertionError("errore del sink non propagato")
+except RuntimeError as e:
+    assert str(e) == "porta chiusa"
+
+# Sink è astratto: send obbligatorio
+try:
+    Sink()
+    raise AssertionError("Sink senza send istanziato")
+except TypeError:
+    pass
+print("player: ok")
@@ -0,0 +1,67 @@
+import os, struct, tempfile, zlib
+import numpy as np
+from musicnpy.preview import png, roll, preview, BACKGROUND, GRID, BEAT, PALETTE
+from musicnpy.topyly import events, Staff, TPQ
+
+# Anteprima piano roll (user-038): il PNG si decodifica con zlib e contiene l'immagine di roll()
+
+def decodifica(data):
+    '''Legge un PNG RGB 8 bit senza filtri (come quelli scritti da png) controllando i CRC'''
+    assert data[:8] == b'\x89PNG\r\n\x1a\n'
+    i, chunks = 8, {}
+    while i < len(data):
+        n, = struct.unpack('>I', data[i:i + 4])
+        tag, body = data[i + 4:i + 8], data[i + 8:i + 8 + n]
+        assert struct.unpack('>I', data[i + 8 + n:i + 12 + n])[0] == zlib.crc32(tag + body), f"CRC di {tag}"
+        chunks[tag] = chunks.get(tag, b'') + body
+        i += 12 + n
+    w, h, depth, kind = struct.unpack('>IIBB', chunks[b'IHDR'][:10])
+    assert (depth, kind) == (8, 2) and b'IEND' in chunks
+    raw = np.frombuffer(zlib.decompress(chunks[b'IDAT']), dtype=np.uint8).reshape(h, 1 + 3 * w)
+    assert (raw[:, 0] == 0).all()
+    return raw[:, 1:].reshape(h, w, 3)
+
+rng = np.random.default_rng(0)
+img = rng.integers(0, 256, (7, 5, 3), dtype=np.uint8)
+for level in (0, 6, 9):
+    assert (decodifica(png(img, level)) == img).all()
+
+# posizione delle note: colonne = tempo, righe = altezza (acute in alto)
+note, dur, vel = [60, [64, 67], -1, 72], [4, 8, 8, 2], [127]
+ev = events(note, dur, vel)
+q, r, m = 12, 3, 2
+im = roll(ev, q, r, m)
+high = 72 + m
+assert im.shape == ((72 - 60 + 2 * m + 1) * r, (ev['onset'][-1] + ev['dur'][-1]) * q // TPQ + 1, 3)
+for p, on, d in zip(ev['pitch'].tolist(), ev['onset'].tolist(), ev['dur'].tolist()):
+    if p < 0:
+        continue
+    riga = im[(high - p) * r:(high - p + 1) * r, on * q // TPQ + 1:(on + d) * q // TPQ]
+    assert (riga == PALETTE[0]).all(), f"nota {p} non disegnata"
+# la pausa non è disegnata: nessun colore di voce nella sua colonna
+c = ev['onset'][3] * q // TPQ + 1
+assert not any((im[:, c] == PALETTE[0]).all(axis=1))
+# sfondo, linee sui do e sulle semiminime
+assert (im[(high - 62) * r, 1] == BACKGROUND).all()
+assert (im[(high - 62) * r, q] == BEAT).all()
+assert (im[(high - 72) * r, 1] == GRID).all()
+
+# più voci: colori diversi, velocity più bassa --> più scuro
+two = np.concatenate((events([60], [4], [127]), events([64], [4], [30], voice=1)))
+b = roll(two, q, r, m)
+c1 = b[(64 + m - 60) * r, 5]
+c0 = b[(64 + m - 64) * r + 1, 5]
+assert (c0 == (PALETTE[1] * np.float32(0.3 + 0.7 * 30 / 127)).astype(np.uint8)).all(), c0
+assert (c1 == PALETTE[0]).all()
+
+# vuota: solo sfondo
+assert (roll(events([-1, -2], [4])) == BACKGROUND).all()
+
+# preview: file, bytes e oggetti topyly danno la stessa immagine
+path = os.path.join(tempfile.mkdtemp(), 'roll')
+data = preview(path, note, dur, vel, quarter=q, row=r)
+assert open(path + '.png', 'rb').read() == data
+assert (decodifica(data) == roll(ev, q, r)).all()
+assert preview(None, Staff(note, dur, vel), quarter=q, row=r) == data
+assert preview(None, ev, quarter=q, row=r) == data
+print("preview: ok")
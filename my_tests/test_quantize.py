@@ -0,0 +1,55 @@
+import numpy as np
+from musicnpy import *
+from musicnpy.pitch import _PSet
+
+# Quantizzazione sulla scala (user-043): confronto con la ricerca lineare
+# tra tutte le altezze della scala, per ogni modo e direzione dei casi pari
+
+def bf(scale, x, mode, offset=0, ties='down', octave=12):
+    pcs = sorted(set(np.mod(np.asarray(scale, dtype=float) + offset, octave).tolist()))
+    cands = np.array([p + k * octave for k in range(-20, 20) for p in pcs])
+    if mode == 'up':
+        return cands[cands >= x].min()
+    if mode == 'down':
+        return cands[cands <= x].max()
+    d = np.abs(cands - x)
+    near = cands[d == d.min()]
+    return near.min() if ties == 'down' else near.max()
+
+rng = np.random.default_rng(0)
+scale = Scale([0, 2, 4, 5, 7, 9, 11], 60)
+x = np.concatenate((rng.integers(20, 100, 200) / 2,           # semitoni e quarti di tono: molti casi pari
+                    rng.uniform(-30, 130, 200), [60, 61, 66, 70, 71.5, -1, 0]))
+for mode in ('nearest', 'up', 'down'):
+    for ties in ('down', 'up'):
+        for offset, octave, s in ((0, 12, scale), (1, 12, scale), (0.5, 12, scale),
+                                  (0, 19, Scale([0, 3, 6, 8, 11, 14, 17], 0)), (0, 12, Scale([0, 6], 60))):
+            got = s.quantize(x, mode, offset=offset, ties=ties, octave=octave)
+            want = [bf(s.vals, v, mode, offset, ties, octave) for v in x.tolist()]
+            assert np.allclose(got, want), (mode, ties, offset, octave,
+                                            [(v, g, w) for v, g, w in zip(x, got, want) if g != w][:3])
+
+# casi pari espliciti: 61 è a metà tra 60 e 62, 66 tra 65 e 67 (do maggiore)
+assert scale.quantize([61, 66], ties='down') == [60.0, 65.0]
+assert scale.quantize([61, 66], ties='up') == [62.0, 67.0]
+assert scale.quantize([61, 66], 'up', ties='down') == [62.0, 67.0]       # ties conta solo per 'nearest'
+assert scale.quantize([61, 66], 'down', ties='up') == [60.0, 65.0]
+# già sulla scala: invariati in ogni modo
+for mode in ('nearest', 'up', 'down'):
+    assert scale.quantize([48, 59, 60, 84], mode) == [48.0, 59.0, 60.0, 84.0]
+
+# tipo del risultato come l'input
+a = rng.uniform(40, 80, (3, 4, 5))
+assert scale.quantize(a).shape == (3, 4, 5)
+assert isinstance(scale.quantize(_Set([61, 63])), _PSet)
+assert [p.values for p in scale.quantize([_Set([61]), _Set([63, 66])], 'up')] == [[62.0], [64.0, 67.0]]
+assert scale.quantize(61.2) == 62.0 and isinstance(scale.quantize(61.2), float)      # numero --> numero
+assert isinstance(scale.quantize([60, 61]), list)
+
+for bad in (dict(mode='vicino'), dict(ties='sopra')):
+    try:
+        scale.quantize([60], **bad)
+        raise AssertionError(f"{bad} accettato")
+    except ValueError:
+        pass
+print("quantize: ok")
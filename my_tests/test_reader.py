@@ -0,0 +1,67 @@
+import os, tempfile
+import numpy as np
+from musicnpy.topyly import _Voice, Staff, Score, events, mapVel
+from musicnpy.midi import write_midi
+from musicnpy.reader import read_ly, read_midi, read, read_many, psets, ly_pitch, ly_dur
+from fractions import Fraction
+
+# Reader (user-037): il lilypond generato da topyly e i files MIDI di write_midi
+# vengono riletti nella stessa tabella degli eventi
+
+tmp = tempfile.mkdtemp()
+
+casi = [
+    ([60, 64, 67, 72], [8, 16, 16, 4], [60, 80, 00, 90], ['.', '.', '.', 00]),
+    ([60, [64, 72, 75], 67, -1, 71, 'mod'], [8, 16, 16, 4, 'mod'], [60, 'zero'], ['>', 'zero']),
+    ([60, 64, 67, 72, 67, 76, 67, 69, 71], [8, 16, 16, [4, [2, 1, 2]], 'mod'], [60, 00, 00, 90, 'zero'],
+     ['cresc', 00, 00, 'dim', 00, 00, 00, 'end']),
+    ([60, 64, 67, [72, 67, 76], 67, -1, 71, 82, 78, 60, 61], [8, 16, 16, [4, [1, 3, 3, 3, 4]], 'mod'],
+     [60, 00, 00, 90, 00, 00, 00, 00, 54, 'zero'], None),
+    ([61, -2, 63, 46, 101], [4, [8, [1, 1, 1]], 2, 'zero'], None, None),
+]
+
+for note, dur, vel, exp in casi:
+    ev = events(note, dur, vel, exp)
+    for key in (None, 'bf', 'e'):                            # diesis e bemolle
+        ly = read_ly(_Voice(note, dur, vel, exp, key).outstring)
+        for k in ('onset', 'dur', 'pitch', 'chord', 'exp'):
+            assert ly[k].tolist() == ev[k].tolist(), f"campo {k} diverso tra lilypond e tabella per {note}"
+        # read_ly restituisce il centro della fascia dinamica: stesso simbolo di mapVel
+        assert mapVel(ly['vel'].tolist()) == mapVel(ev['vel'].tolist())
+
+# partitura: voci e righi, anche da file
+a = Staff(([60, 62, 64], [48, 50]), ([4], [2]), key='d', t_sig='3/4', clef='bass', i_name='Vc')
+b = Staff([72, [74, 77]], 8)
+s = Score((a, b), title='Prova')
+path = os.path.join(tmp, 'score.ly')
+with open(path, 'w') as f:
+    f.write(s.outstring)
+for ly in (read_ly(s.outstring), read_ly(path), read(path)):
+    for k in ('onset', 'dur', 'pitch', 'chord', 'voice', 'staff'):
+        assert ly[k].tolist() == s.events[k].tolist(), f"campo {k} diverso nella partitura"
+
+assert ly_pitch("cs'") == 61 and ly_pitch("bf,") == 46 and ly_pitch("c''") == 72
+assert ly_dur('4.') == Fraction(3, 8) and ly_dur('2~8') == Fraction(5, 8)
+assert [p.values for p in psets(read_ly(b.outstring))] == [[72], [74, 77]]
+
+# MIDI: da file o da bytes lo stesso risultato
+data = write_midi(os.path.join(tmp, 'b.mid'), b)
+assert (read_midi(os.path.join(tmp, 'b.mid')) == read_midi(data)).all()
+assert read(os.path.join(tmp, 'b.mid'))['pitch'].tolist() == [72, 74, 77]
+for bad in (b'RIFF0000', b''):
+    try:
+        read_midi(bad)
+        raise AssertionError("dati non MIDI accettati")
+    except ValueError:
+        pass
+
+# molti files: un errore non ferma gli altri, risultati in ordine
+with open(os.path.join(tmp, 'rotto.mid'), 'wb') as f:
+    f.write(b'MThd rotto')
+paths = [path, os.path.join(tmp, 'rotto.mid'), os.path.join(tmp, 'b.mid'), os.path.join(tmp, 'x.txt')]
+res = read_many(paths)
+assert [r['path'] for r in res] == paths
+assert [r['error'] is None for r in res] == [True, False, True, False]
+res2 = read_many(paths, workers=2)
+assert all((r['events'] is None and q['events'] is None) or (r['events'] == q['events']).all() for r, q in zip(res, res2))
+print("reader: ok")
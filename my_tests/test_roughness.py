@@ -0,0 +1,93 @@
+import numpy as np
+from musicnpy.pitch import _PSet
+from musicnpy.tuning import Tuning
+from musicnpy.roughness import PARTIALS, dissonance, roughness, table
+
+# Rugosita' (user-050): tabella e calcolo esatto coincidono, con e senza
+# coppie interne alla stessa nota, contro una somma esplicita sulle parziali
+
+def ruvidita(chord, partials=PARTIALS, a4=440.0, intrinsic=True, tuning=None):
+    notes = [x for x in chord if x == x and x >= 0]
+    freq = [tuning.to_freq(x, a4) if tuning else a4 * 2 ** ((x - 69) / 12) for x in notes]
+    parts = [(f * (h + 1), a, i) for i, f in enumerate(freq) for h, a in enumerate(partials)]
+    tot = 0.0
+    for j in range(len(parts)):
+        for k in range(j + 1, len(parts)):
+            (f1, a1, n1), (f2, a2, n2) = parts[j], parts[k]
+            if intrinsic or n1 != n2:
+                tot += float(dissonance(f1, f2, a1, a2))
+    return tot
+
+rng = np.random.default_rng(0)
+chords = rng.integers(21, 109, (60, 5)).astype(float)
+chords[rng.random(chords.shape) < 0.2] = np.nan                # note mancanti: NaN ...
+chords[rng.random(chords.shape) < 0.1] = -1                    # ... o negative
+chords[0] = np.nan                                             # accordo vuoto
+chords[1, 1:] = np.nan                                         # una nota sola
+chords[2] = [60, 60, 60, 72, -1]                               # unisoni
+chords[3] = [0, 127, 1, 126, 64]                               # estremi della tabella
+
+for partials in (PARTIALS, (1.0,), (1.0, 0.5, 0.25)):
+    for a4 in (440.0, 432.0):
+        for intrinsic in (True, False):
+            fast = roughness(chords, partials, a4, intrinsic=intrinsic)
+            slow = roughness(chords, partials, a4, intrinsic=intrinsic, exact=True)
+            want = [ruvidita(c, partials, a4, intrinsic) for c in chords.tolist()]
+            assert np.allclose(fast, want, rtol=1e-10, atol=1e-12), (partials, a4, intrinsic)
+            assert np.allclose(slow, want, rtol=1e-10, atol=1e-12), (partials, a4, intrinsic)
+            assert fast[0] == slow[0] == 0
+            if not intrinsic:
+                assert fast[1] == 0 and slow[1] == 0, "una nota sola: nessuna coppia"
+
+# le coppie interne sono la tabella delle note singole
+pair, single = table()
+assert pair.shape == (128, 128) and single.shape == (128,)
+assert np.allclose(pair, pair.T), "dissonanza simmetrica"
+assert np.allclose(np.diag(pair), [ruvidita([x, x], intrinsic=False) for x in range(128)])
+assert np.allclose(single, [ruvidita([x]) for x in range(128)])
+d = roughness(chords) - roughness(chords, intrinsic=False)
+assert np.allclose(d, [single[[int(x) for x in c if x == x and x >= 0]].sum() for c in chords.tolist()])
+try:
+    pair[0, 0] = 1.0
+    raise AssertionError("tabella modificabile")
+except ValueError:
+    pass
+
+# dissonance: simmetrica, zero all'unisono, broadcast
+f1, f2 = rng.uniform(50, 4000, 200), rng.uniform(50, 4000, 200)
+a1, a2 = rng.uniform(0, 1, 200), rng.uniform(0, 1, 200)
+assert np.allclose(dissonance(f1, f2, a1, a2), dissonance(f2, f1, a2, a1))
+assert np.all(dissonance(f1, f1, a1, a2) == 0)
+assert np.all(dissonance(f1, f2, a1, a2) >= 0)
+assert dissonance(f1[:, None], f2[None, :], 1, 1).shape == (200, 200)
+
+# senza tabella: note frazionarie, fuori tabella, accordature
+frac = chords + rng.uniform(-0.5, 0.5, chords.shape)
+for intrinsic in (True, False):
+    assert np.allclose(roughness(frac, intrinsic=intrinsic), [ruvidita(c, intrinsic=intrinsic) for c in frac.tolist()])
+high = np.array([[120.0, 130.0, 140.0]])
+assert np.isclose(roughness(high)[0], ruvidita(high[0]))
+edo = Tuning.edo(12, root=60)
+for intrinsic in (True, False):
+    assert np.allclose(roughness(chords, tuning=edo, intrinsic=intrinsic), roughness(chords, intrinsic=intrinsic)), intrinsic
+just, e19 = Tuning.just(), Tuning.edo(19)
+for t in (just, e19):
+    assert np.allclose(roughness(chords, tuning=t, a4=415.0), [ruvidita(c, a4=415.0, tuning=t) for c in chords.tolist()])
+    assert np.allclose(roughness(chords, tuning=t, intrinsic=False),
+                       [ruvidita(c, intrinsic=False, tuning=t) for c in chords.tolist()])
+
+# blocchi e forme dell'ingresso
+ref = roughness(chords, exact=True)
+for block in (1, 7, 59, 60, 10 ** 6):
+    assert np.allclose(roughness(chords, exact=True, block=block), ref, rtol=1e-12, atol=0), block
+    assert np.allclose(roughness(chords, tuning=just, block=block), roughness(chords, tuning=just), rtol=1e-12, atol=0), block
+assert np.allclose(roughness([[60, 64, 67], [60], []]), roughness(np.array([[60, 64, 67], [60, np.nan, np.nan], [np.nan] * 3])))
+assert np.allclose(roughness(_PSet([60, 64, 67])), roughness([[60, 64, 67]]))
+assert np.allclose(roughness([_PSet([60, 64, 67]), _PSet([60, 61])]), roughness([[60, 64, 67], [60, 61, -1]]))
+assert np.allclose(roughness(np.array([60, 64, 67])), roughness([[60, 64, 67]]))
+
+# ordine atteso
+r = roughness([[60, 64, 67], [60, 61, 62], [60, 67], [60, 72]])
+assert r[3] < r[2] < r[0] < r[1], r.tolist()
+
+print("roughness: ok")
@@ -0,0 +1,88 @@
+import numpy as np
+from musicnpy import *
+from musicnpy.pitch import _PSet
+
+# Gradi e modi della scala (user-048): degree, to_degree, transpose, mode e
+# chord contro l'elenco esplicito delle altezze della scala
+
+def altezze(scale):
+    steps = sorted(set(((np.asarray(scale.vals) - scale.offset) % 12).tolist()))
+    pitches = [scale.offset + 12 * k + s for k in range(-250, 250) for s in steps]
+    return pitches, pitches.index(scale.offset + steps[0])     # grado 0
+
+scales = [Scale([0, 2, 4, 5, 7, 9, 11], 60), Scale.new(PMod.minNat, 57), Scale.new('dorian', 62),
+          Scale([0, 3, 7], 0), Scale([2, 5, 9, 14], 61),        # grado 0 sopra la fondamentale, intervalli oltre l'ottava
+          Scale([0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11], 64), Scale([0, 6], -5), Scale([0, 2, 4, 7, 9], 127)]
+
+rng = np.random.default_rng(0)
+degs = np.concatenate((np.arange(-90, 90), rng.integers(-400, 400, 50), [0]))
+for s in scales:
+    pitches, zero = altezze(s)
+    n = s.size
+    want = [pitches[zero + d] for d in degs.tolist()]
+    assert s.degree(degs.tolist()) == want, s.values
+    assert s.degree(degs).tolist() == want, s.values
+    assert s.degree(degs.reshape(-1, 1)).shape == (len(degs), 1)
+    assert s.degree(3) == pitches[zero + 3]
+
+    # to_degree: grado <= altezza e alterazione, su interi, float e fuori dall'estensione midi
+    p = np.arange(-40, 170)
+    for q in (p, p.astype(float), np.arange(0, 128)):
+        d, alt = s.to_degree(q)
+        for x, dd, a in zip(q.tolist(), d.tolist(), alt.tolist()):
+            i = max(i for i, y in enumerate(pitches) if y <= x)
+            assert dd == i - zero and a == x - pitches[i], (s.values, x, dd, a)
+    d, alt = s.to_degree(_PSet([60, 61]))
+    assert np.array_equal(s.degree(d) + alt, [60, 61])
+
+    # trasposizione diatonica: un grado alla volta conserva l'alterazione
+    mel = rng.integers(30, 100, 60)
+    for k in (0, 1, -1, 2, n, -n, 9, -13):
+        got = s.transpose(mel, k)
+        d, alt = s.to_degree(mel)
+        assert got.tolist() == [pitches[zero + x + k] + a for x, a in zip(d.tolist(), alt.tolist())], (s.values, k)
+        assert s.transpose(mel.tolist(), k) == got.tolist()
+        assert s.transpose(_PSet(mel.tolist()), k).values == got.tolist()
+    ks = rng.integers(-5, 6, len(mel))
+    assert s.transpose(mel, ks).tolist() == [s.transpose([m], k)[0] for m, k in zip(mel.tolist(), ks.tolist())]
+    inside = s.degree(s.to_degree(mel)[0])                     # solo note della scala: le alterate possono scavalcare un grado
+    assert s.transpose(s.transpose(inside, 5), -5).tolist() == inside.tolist(), "andata e ritorno"
+    assert s.transpose(mel, n).tolist() == (mel + 12).tolist(), "n gradi = un'ottava"
+
+    # modi: gli stessi gradi a partire da k
+    for k in (-n - 1, -1, 0, 1, n - 1, n, 2 * n + 2):
+        m = s.mode(k)
+        assert m.size == n
+        assert m.degree(list(range(-2 * n, 2 * n))) == [pitches[zero + k + j] for j in range(-2 * n, 2 * n)], (s.values, k)
+        assert m.values == [pitches[zero + k + j] for j in range(n)], (s.values, k, m.values)
+        if s.chords is not None:
+            assert m.chords == [s.chords[(k + j) % n] for j in range(n)]
+        else:
+            assert m.chords is None
+
+    # accordi per terze e quarte
+    for size, step in ((3, 2), (4, 2), (3, 3), (1, 2)):
+        c = s.chord(degs, size, step)
+        assert c.shape == (len(degs), size)
+        assert c.tolist() == [[pitches[zero + d + step * j] for j in range(size)] for d in degs.tolist()]
+        assert s.chord(2, size, step).values == c[degs.tolist().index(2)].tolist()
+
+# quality da scale_harmo
+maj = Scale.new(PMod.maj, 60)
+assert maj.quality([0, 1, 6, 7, -1]) == ['maj', 'min', 'dim', 'maj', 'dim']
+assert maj.quality(4) == 'maj'
+assert Scale([0, 2, 4], 60).quality([0]) is None
+assert Scale.new(PMod.maj, 60).mode(5).quality(0) == 'min'
+
+# new accetta modello o nome
+assert Scale.new(PMod.minNat, 57).values == [57, 59, 60, 62, 64, 65, 67]
+assert Scale.new('dorian', 62).values == Scale.new(PMod.maj, 60).mode(1).values
+
+# la tabella segue le modifiche dei valori
+s = Scale([0, 2, 4, 5, 7, 9, 11], 60)
+assert s.degree(1) == 62
+s.offset = 61
+s.vals = s.vals + 1
+assert s.degree([0, 1]) == [61, 63]
+
+print("scale: ok")
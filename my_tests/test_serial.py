@@ -0,0 +1,118 @@
+import numpy as np
+from itertools import combinations
+from musicnpy.serial import Row, FORMS, find_rows
+
+# Serie dodecafoniche (user-049): find_rows con piu' processi uguale al
+# processo singolo, limit rispettato, conteggi contro ricerche indipendenti
+
+def tutte_intervallari(prefix=(0,)):
+    # ricerca ricorsiva in puro python, indipendente da _search
+    out = []
+    def grow(row, used):
+        if len(row) == 12:
+            out.append(tuple(row))
+            return
+        for c in range(12):
+            iv = (c - row[-1]) % 12
+            if c not in row and iv not in used:
+                grow(row + [c], used | {iv})
+    grow(list(prefix), set())
+    return out
+
+def esacordo(h, kind):
+    row = Row(sorted(h) + sorted(set(range(12)) - set(h)))
+    c = row.combinatoriality()
+    ok = {k: bool(c[k]) for k in ('P', 'I', 'RI')}
+    return all(ok.values()) if kind == 'all' else ok[kind]
+
+def ordinata(rows):
+    # ordine lessicografico delle distanze dalla prima nota
+    d = (rows.astype(np.int64) - rows[:, :1]) % 12
+    key = d @ 12 ** np.arange(11, -1, -1)                     # 12**12 < 2**63
+    return bool(np.all(np.diff(key) > 0))
+
+# conteggi e proprieta'
+ai = find_rows(all_interval=True)
+assert ai.dtype == np.int8 and ai.shape == (3856, 12)
+AI = sorted(tutte_intervallari())
+assert sorted(map(tuple, ai.tolist())) == AI
+assert ordinata(ai)
+assert all(Row(r).all_interval for r in ai[::97])
+
+hexa = [h for h in combinations(range(12), 6) if 0 in h and esacordo(h, 'all')]
+rows = find_rows(combinatorial='all')
+assert len(rows) == len(hexa) * 120 * 720, (len(rows), len(hexa))  # ordini di ciascun esacordo e del complemento
+assert ordinata(rows)
+masks = np.bitwise_or.reduce(1 << rows[:, :6].astype(np.int64), axis=1)
+assert sorted(np.unique(masks).tolist()) == sorted(sum(1 << x for x in h) for h in hexa)
+for kind in ('P', 'I', 'RI'):
+    got = find_rows(combinatorial=kind, all_interval=True)
+    want = [r for r in AI if esacordo(r[:6], kind)]
+    assert sorted(map(tuple, got.tolist())) == sorted(want), kind
+both = find_rows(combinatorial='all', all_interval=True)
+assert len(both) == 176
+assert all(Row(r).combinatoriality()['I'] for r in both[::11])
+
+# first, limit e workers
+for first in (0, 3, 11, 14, -1):
+    r = find_rows(all_interval=True, first=first)
+    assert np.array_equal(r, (ai + first % 12) % 12), first
+    assert ordinata(r), first
+    assert (r[:, 0] == first % 12).all()
+base = find_rows(limit=5000)
+assert base.dtype == np.int8 and len(base) == 5000 and ordinata(base)
+assert base[0].tolist() == list(range(12))
+for kw in (dict(all_interval=True), dict(combinatorial='all', all_interval=True), dict(combinatorial='P', all_interval=True),
+           dict(limit=5000), dict(limit=1), dict(all_interval=True, limit=700), dict(combinatorial='I', limit=40000),
+           dict(all_interval=True, limit=10 ** 6), dict(combinatorial='RI', first=7, limit=20001)):
+    one = find_rows(**kw)
+    for workers in (2, 3):
+        many = find_rows(workers=workers, **kw)
+        assert many.dtype == np.int8 and np.array_equal(one, many), (kw, workers)
+    if 'limit' in kw:
+        rest = {k: v for k, v in kw.items() if k != 'limit'}
+        if rest.get('all_interval'):                          # prefisso del risultato completo
+            assert np.array_equal(one, find_rows(**rest)[:kw['limit']]), kw
+        else:
+            assert len(one) == kw['limit'], kw
+assert np.array_equal(find_rows(limit=5000)[:40], find_rows(limit=40)), "limit e' un prefisso"
+assert np.array_equal(find_rows(combinatorial='I', limit=40000)[:1000], find_rows(combinatorial='I', limit=1000))
+assert len(find_rows(all_interval=True, limit=10 ** 6)) == 3856
+
+# errori
+for kw in (dict(), dict(first=3), dict(workers=2), dict(combinatorial='X', limit=3), dict(combinatorial='p')):
+    try:
+        find_rows(**kw)
+        raise AssertionError(kw)
+    except ValueError:
+        pass
+
+# Row: forme, matrice, trasformazioni
+r = Row([0, 11, 7, 8, 3, 1, 2, 10, 6, 5, 4, 9])
+p = r.pcs
+f = r.forms()
+assert f.shape == (48, 12)
+for k in range(12):
+    assert f[FORMS.index(f'P{k}')].tolist() == ((p - p[0] + k) % 12).tolist()
+    assert f[FORMS.index(f'I{k}')].tolist() == ((p[0] - p + k) % 12).tolist()
+    assert f[FORMS.index(f'R{k}')].tolist() == f[FORMS.index(f'P{k}')][::-1].tolist()
+    assert f[FORMS.index(f'RI{k}')].tolist() == f[FORMS.index(f'I{k}')][::-1].tolist()
+m = r.matrix
+assert m[0].tolist() == p.tolist() and m[:, 0].tolist() == f[FORMS.index(f'I{p[0]}')].tolist()
+assert all(sorted(x) == list(range(12)) for x in np.concatenate((m, m.T)).tolist())
+assert (np.diag(m) == p[0]).all()
+fm = r.forms(multiply=True)
+assert fm.shape == (96, 12) and np.array_equal(fm[48:], fm[:48] * 5 % 12)
+assert fm[48].tolist() == r.multiply(5).pcs.tolist()
+fr = r.forms(rotations=True)
+assert fr.shape == (48, 12, 12) and fr[5, 3].tolist() == np.roll(f[5], -3).tolist()
+assert Row(range(12)).combinatoriality() == {'P': [6], 'I': [11], 'R': [], 'RI': [5]}
+assert r.intervals_mod == (np.diff(p) % 12).tolist()
+assert Row([60, 61, 63, 62]).forms()[FORMS.index('I3')].tolist() == [3, 2, 0, 1]
+try:
+    Row([0, 1, 13])
+    raise AssertionError("classi ripetute")
+except ValueError:
+    pass
+
+print("serial: ok")
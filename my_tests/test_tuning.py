@@ -0,0 +1,98 @@
+import os
+import tempfile
+import numpy as np
+from musicnpy.tuning import Tuning
+from musicnpy.pitch import _PSet, to_freq
+
+# Sistemi di accordatura (user-047): from_freq(to_freq(x)) == x per edo,
+# intonazione giusta e .scl, e coerenza con il 12-TET di pitch.to_freq
+
+SCL = """! test.scl
+!
+Slendro approssimato
+ 5
+!
+ 231.0
+ 474.0
+ 717.0
+ 955.0
+ 2/1
+"""
+
+notes = np.arange(0, 128)
+path = os.path.join(tempfile.mkdtemp(), 'test.scl')
+with open(path, 'w') as f:
+    f.write(SCL)
+
+tunings = [Tuning.edo(n) for n in (5, 12, 19, 24, 31)] + [
+    Tuning.edo(13, 1901.955),                                  # Bohlen-Pierce: periodo 3/1
+    Tuning.edo(12, root=57),
+    Tuning.just(), Tuning.just(root=62),
+    Tuning.just(('1/1', '9/8', '5/4', '3/2', '5/3'), '2/1'),
+    Tuning.from_scl(SCL), Tuning.from_scl(path), Tuning.from_scl(SCL, root=50, freq=100.0),
+]
+for t in tunings:
+    for a4 in (440.0, 415.0):
+        f = t.to_freq(notes, a4)
+        assert np.all(np.diff(f) > 0), (t, a4)
+        assert t.from_freq(f, a4).tolist() == notes.tolist(), (t, a4)
+        assert _PSet.from_freq(f.tolist(), a4, tuning=t).vals.tolist() == notes.tolist(), (t, a4)
+        assert np.allclose(_PSet(notes.tolist()).to_freq(a4, tuning=t), f), (t, a4)
+        assert np.allclose(to_freq(notes, a4, t), f), (t, a4)
+        # a meta' strada tra due gradi (in cents) si resta sul grado piu' vicino
+        near = f[:-1] * np.exp2(np.diff(t.to_cents(notes)) * 0.49 / 1200)
+        assert t.from_freq(near, a4).tolist() == notes[:-1].tolist(), (t, a4)
+        far = f[:-1] * np.exp2(np.diff(t.to_cents(notes)) * 0.51 / 1200)
+        assert t.from_freq(far, a4).tolist() == notes[1:].tolist(), (t, a4)
+    c = t.to_cents(notes)
+    assert np.all(np.diff(c) > 0), t
+    assert t.to_cents(t.root) == 0
+    assert np.isclose(t.to_cents(t.root + t.size), t.period), t
+    # note frazionarie: interpolazione lineare in cents
+    assert np.allclose(t.to_cents(notes[:-1] + 0.25), c[:-1] + 0.25 * np.diff(c)), t
+    # forme qualsiasi
+    assert t.to_freq(notes.reshape(8, 16)).shape == (8, 16)
+    assert t.from_freq(t.to_freq(notes).reshape(2, 64)).shape == (2, 64)
+
+# 12-EDO su 60 coincide con il 12-TET
+assert np.allclose(Tuning.edo(12).to_freq(notes), 440 * np.exp2((notes - 69) / 12))
+assert np.allclose(Tuning.edo(12).to_freq(notes, 415.0), to_freq(notes, 415.0))
+assert np.allclose(_PSet([60, 69]).to_freq(), [261.6255653005986, 440.0])
+assert _PSet.from_freq([440.0]).vals.tolist() == [69]
+
+# gradi espliciti
+assert np.allclose(Tuning.just().to_cents([60, 64, 67, 72, 48]), [0, 1200 * np.log2(5 / 4), 1200 * np.log2(3 / 2), 1200, -1200])
+s = Tuning.from_scl(SCL)
+assert s.name == 'Slendro approssimato' and s.size == 5 and s.period == 1200.0
+assert s.cents.tolist() == [0.0, 231.0, 474.0, 717.0, 955.0]
+assert np.isclose(Tuning.from_scl(SCL, root=50, freq=100.0).to_freq(55), 200.0)
+
+# cache e array in sola lettura
+assert Tuning.edo(19) is Tuning.edo(19) and Tuning.just() is Tuning.just()
+assert Tuning.from_scl(path) is Tuning.from_scl(path), "file in cache per percorso e mtime"
+for t in (Tuning.edo(19), Tuning.just(), Tuning.from_scl(path)):
+    try:
+        t.cents[1] = 0.0
+        raise AssertionError("cents modificabili")
+    except ValueError:
+        pass
+c = np.array([0.0, 500.0])
+t = Tuning(c)
+c[1] = 700.0
+assert t.cents.tolist() == [0.0, 500.0], "copia propria dei cents"
+
+# errori
+for bad in ([0.0, 300.0, 200.0], [10.0, 300.0], [0.0, 1200.0]):
+    try:
+        Tuning(bad)
+        raise AssertionError(bad)
+    except ValueError:
+        pass
+for bad in ("", "nome\n", "nome\n 2\n 100.0\n", "nome\n x\n", "nome\n 1\n 1/0\n"):
+    try:
+        Tuning.from_scl(bad + "\n")
+        raise AssertionError(repr(bad))
+    except ValueError:
+        pass
+
+print("tuning: ok")
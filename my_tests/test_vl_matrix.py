@@ -0,0 +1,43 @@
+import itertools
+import numpy as np
+from musicnpy.pitch import _PSet, voice_leading_matrix
+
+# Matrici di distanze di voice leading (user-045): confronto con la forza bruta
+# su tutte le permutazioni delle voci (e sulle classi di altezze con octave=True)
+
+def pc(x):
+    '''Intervallo più breve tra classi di altezze'''
+    return np.minimum(np.abs(x) % 12, 12 - np.abs(x) % 12)
+
+rng = np.random.default_rng(1)
+for norm in (1, 2, np.inf):
+    for k in (2, 3, 4):
+        A = rng.integers(40, 80, (15, k))
+        B = rng.integers(40, 80, (12, k))
+        d  = voice_leading_matrix(A, B, norm=norm, dtype=np.float64)
+        do = voice_leading_matrix(A, B, norm=norm, octave=True, dtype=np.float64)
+        for i, j in itertools.product(range(len(A)), range(len(B))):
+            perms = [B[j][list(p)] for p in itertools.permutations(range(k))]
+            best  = min(np.linalg.norm(A[i] - p, ord=norm) for p in perms)
+            besto = min(np.linalg.norm(pc(A[i] - p), ord=norm) for p in perms)
+            assert np.isclose(d[i, j], best), (norm, A[i], B[j], d[i, j], best)
+            assert np.isclose(do[i, j], besto), (norm, A[i], B[j], do[i, j], besto)
+
+# i blocchi (tile) e out non cambiano il risultato; B = None --> A contro A
+A = rng.integers(36, 84, (300, 4))
+d = voice_leading_matrix(A)
+assert d.dtype == np.float32 and d.shape == (300, 300) and (np.diag(d) == 0).all() and (d == d.T).all()
+assert (voice_leading_matrix(A, tile=7) == d).all()
+out = np.zeros((300, 300), dtype=np.float32)
+assert voice_leading_matrix(A, out=out) is out and (out == d).all()
+
+# _PSet e liste come input
+assert voice_leading_matrix([_PSet([60, 64, 67])], [[59, 62, 67]]).tolist() == [[3.0]]
+
+for args, kw in (([[[60, 64]], [[60, 64, 67]]], {}), ([[[60, 64], [60, 64, 67]]], {}), ([[[60, 64]]], {'norm': 3})):
+    try:
+        voice_leading_matrix(*args, **kw)
+        raise AssertionError(f"input non valido accettato: {args} {kw}")
+    except ValueError:
+        pass
+print("voice leading matrix: ok")
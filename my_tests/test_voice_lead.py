@@ -0,0 +1,61 @@
+import itertools
+import numpy as np
+from musicnpy.pitch import Chord, voice_lead
+
+# Voicings e voice leading (user-044): confronto con la forza bruta
+
+def voicings_bf(chord, low, high, size, max_gap=12, max_span=None, bass=None):
+    '''Tutte le combinazioni crescenti di size note distinte nel registro'''
+    pcs = set(p % 12 for p in chord)
+    out = []
+    for v in itertools.combinations(range(low, high + 1), size):
+        gaps = np.diff(v)
+        if (set(p % 12 for p in v) == pcs and (gaps <= max_gap).all()
+                and (max_span is None or v[-1] - v[0] <= max_span) and (bass is None or v[0] % 12 == bass)):
+            out.append(list(v))
+    return out
+
+def costo(path):
+    return int(sum(np.abs(np.diff(np.asarray(path, dtype=int), axis=0)).sum(axis=1)))
+
+rng = np.random.default_rng(0)
+checked = 0
+for _ in range(30):
+    chords = [sorted(set(rng.integers(48, 72, rng.integers(2, 4)).tolist())) for _ in range(4)]
+    low, high, size = 48, 72, 3
+    span = int(rng.choice([12, 19]))
+    bass = bool(rng.integers(2))
+
+    cands = []
+    for c in chords:
+        v = Chord(c).voicings(low, high, size, max_gap=12, max_span=span, bass=bass).tolist()
+        assert v == voicings_bf(c, low, high, size, 12, span, c[0] % 12 if bass else None), c
+        cands.append(v)
+    if not all(cands):
+        continue
+    checked += 1
+
+    path = voice_lead(chords, low, high, size, max_gap=12, max_span=span, bass=bass)
+    assert all(p.tolist() in c for p, c in zip(path, cands)), "ogni accordo deve usare un suo voicing"
+    best = min(costo(p) for p in itertools.product(*cands))
+    assert costo(path) == best, f"costo {costo(path)} invece di {best} per {chords}"
+
+    # con start il primo accordo parte dal voicing dato
+    start = cands[0][-1]
+    path = voice_lead(chords, low, high, size, max_gap=12, max_span=span, bass=bass, start=start)
+    best = min(costo([start, *p]) for p in itertools.product(*cands))
+    assert costo([start, *path]) == best
+
+try:
+    voice_lead([[60, 61, 62, 63, 64]], size=4)
+    raise AssertionError("5 classi in 4 voci")
+except ValueError:
+    pass
+try:
+    voice_lead([[60, 64, 67]], 60, 62)
+    raise AssertionError("nessun voicing nel registro")
+except ValueError as e:
+    assert 'No voicing' in str(e)
+
+assert checked >= 10, "troppe progressioni senza voicing"
+print(f"voice leading: ok ({checked} progressioni)")